@@ -0,0 +1,223 @@
+# ballistics.py
+# 弹道补偿 (查表)
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 水弹下坠与横向偏移很难用物理模型准确描述，且在树莓派上逐发求解也不划算。
+# 这里改为离线标定、在线查表:
+#   1. 在若干距离上试射，记录命中装甲板中心所需的 pitch / yaw 修正量 (标定记录 CSV: distance,pitch,yaw)
+#   2. python -m src.aimbot.ballistics build shots.csv -o model/aimbot/ballistics.csv
+#      按距离分组取中位数，得到 距离 -> 修正量 的补偿表
+#   3. 运行时按装甲板框的大小估计距离 (针孔模型)，在补偿表中线性插值
+#
+# 用法:
+#   table = load_default_table()
+#   distance = estimate_distance(w, h)
+#   pitch_lead, yaw_lead = table.lookup(distance)
+#
+
+import sys
+import argparse
+from typing import Iterable
+
+import numpy as np
+
+from src import config
+from src import logger
+
+
+def estimate_distance(width: float, height: float) -> float | None:
+    """
+    按装甲板框的像素尺寸估计距离 (针孔模型)
+    装甲板偏转时框的宽度会变窄、估计偏远，因此取宽、高两个估计中较近的一个
+
+    Args:
+        width (float): 框的像素宽度
+        height (float): 框的像素高度
+    Returns:
+        float | None: 距离（米），框的尺寸无效时返回 None
+    """
+
+    estimates = []
+    if width > 0:
+        estimates.append(config.CAMERA_FX * config.ARMOR_WIDTH / width)
+    if height > 0:
+        estimates.append(config.CAMERA_FY * config.ARMOR_HEIGHT / height)
+    return min(estimates) if estimates else None
+
+
+class BallisticTable:
+    """
+    弹道补偿表 距离 -> (pitch, yaw) 修正量
+    """
+
+    def __init__(self, distance: Iterable[float], pitch: Iterable[float], yaw: Iterable[float]):
+        """
+        Args:
+            distance (Iterable[float]): 距离（米）
+            pitch (Iterable[float]): 各距离上的俯仰修正量 (°)，向上为正
+            yaw (Iterable[float]): 各距离上的偏航修正量 (°)，向右为正
+        Raises:
+            ValueError: 数据为空或长度不一致
+        """
+
+        d = np.asarray(distance, dtype=np.float64)
+        p = np.asarray(pitch, dtype=np.float64)
+        y = np.asarray(yaw, dtype=np.float64)
+        if d.ndim != 1 or len(d) == 0 or p.shape != d.shape or y.shape != d.shape:
+            raise ValueError("补偿表数据为空或长度不一致")
+
+        order = np.argsort(d)
+        self.distance: np.ndarray = d[order]
+        self.pitch: np.ndarray = p[order]
+        self.yaw: np.ndarray = y[order]
+
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+
+    def lookup(self, distance: float) -> tuple[float, float]:
+        """
+        查询某一距离上的修正量 表内线性插值，超出范围时取端点值
+
+        Args:
+            distance (float): 距离（米）
+        Returns:
+            tuple[float, float]: (pitch, yaw) 修正量 (°)
+        """
+
+        return (
+            float(np.interp(distance, self.distance, self.pitch)),
+            float(np.interp(distance, self.distance, self.yaw)),
+        )
+
+
+    def lookup_box(self, width: float, height: float) -> tuple[float, float]:
+        """
+        按装甲板框的像素尺寸查询修正量
+
+        Args:
+            width (float): 框的像素宽度
+            height (float): 框的像素高度
+        Returns:
+            tuple[float, float]: (pitch, yaw) 修正量 (°)，框的尺寸无效时为 (0, 0)
+        """
+
+        distance = estimate_distance(width, height)
+        return (0.0, 0.0) if distance is None else self.lookup(distance)
+
+
+    @classmethod
+    def from_shots(cls, shots: np.ndarray, bin_width: float | None = None) -> "BallisticTable":
+        """
+        由标定记录生成补偿表 按距离分组，每组取距离与修正量的中位数
+
+        Args:
+            shots (np.ndarray): 形如 (N, 3) 的标定记录，每行为 (距离, pitch 修正量, yaw 修正量)
+            bin_width (float | None): 分组宽度（米），None 表示使用 AIMBOT_BALLISTIC_BIN
+        Returns:
+            BallisticTable: 补偿表
+        Raises:
+            ValueError: 标定记录格式错误
+        """
+
+        shots = np.asarray(shots, dtype=np.float64)
+        if shots.ndim != 2 or shots.shape[1] != 3 or len(shots) == 0:
+            raise ValueError("标定记录应为 (N, 3) 的数组: 距离, pitch, yaw")
+
+        bin_width = bin_width or config.AIMBOT_BALLISTIC_BIN
+        bins = np.round(shots[:, 0] / bin_width).astype(np.int64) # 以 bin_width 的整数倍为中心分组
+
+        rows = [np.median(shots[bins == b], axis=0) for b in np.unique(bins)]
+        table = np.array(rows)
+        return cls(table[:, 0], table[:, 1], table[:, 2])
+
+
+    @classmethod
+    def load(cls, path: str) -> "BallisticTable":
+        """
+        从 CSV 文件读取补偿表 (表头 distance,pitch,yaw)
+
+        Args:
+            path (str): 文件路径
+        Returns:
+            BallisticTable: 补偿表
+        Raises:
+            OSError: 文件无法读取
+            ValueError: 文件格式错误
+        """
+
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        if data.shape[1] != 3:
+            raise ValueError(f"补偿表 {path} 应有 3 列: distance,pitch,yaw")
+        return cls(data[:, 0], data[:, 1], data[:, 2])
+
+
+    def save(self, path: str) -> None:
+        """
+        把补偿表保存为 CSV 文件
+
+        Args:
+            path (str): 文件路径
+        """
+
+        data = np.column_stack([self.distance, self.pitch, self.yaw])
+        np.savetxt(path, data, delimiter=",", fmt="%.4f", header="distance,pitch,yaw", comments="")
+
+
+def load_default_table() -> BallisticTable | None:
+    """
+    读取 AIMBOT_BALLISTIC_TABLE_PATH 处的补偿表
+
+    Returns:
+        BallisticTable | None: 补偿表，文件不存在或格式错误时返回 None (不做补偿)
+    """
+
+    try:
+        table = BallisticTable.load(config.AIMBOT_BALLISTIC_TABLE_PATH)
+    except (OSError, ValueError) as e:
+        logger.warning(f"弹道补偿表读取失败，将不做弹道补偿: {e}")
+        return None
+
+    logger.info(f"已读取弹道补偿表 {config.AIMBOT_BALLISTIC_TABLE_PATH} ({len(table)} 个距离)")
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="弹道补偿表工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="由标定记录 (distance,pitch,yaw) 生成补偿表")
+    build.add_argument("shots", type=str, help="标定记录 CSV 文件路径 (首行为表头)")
+    build.add_argument("-o", "--output", type=str, default=config.AIMBOT_BALLISTIC_TABLE_PATH, help="补偿表保存路径")
+    build.add_argument("--bin", type=float, default=config.AIMBOT_BALLISTIC_BIN, help="按距离分组的宽度（米）")
+
+    query = commands.add_parser("query", help="查询某一距离上的修正量")
+    query.add_argument("distance", type=float, nargs="+", help="距离（米）")
+    query.add_argument("-t", "--table", type=str, default=config.AIMBOT_BALLISTIC_TABLE_PATH, help="补偿表路径")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        shots = np.loadtxt(args.shots, delimiter=",", skiprows=1, ndmin=2)
+        table = BallisticTable.from_shots(shots, args.bin)
+        table.save(args.output)
+        logger.info(f"已由 {len(shots)} 条标定记录生成 {len(table)} 个距离的补偿表: {args.output}")
+    else:
+        table = BallisticTable.load(args.table)
+        for distance in args.distance:
+            pitch, yaw = table.lookup(distance)
+            sys.stdout.write(f"{distance:.2f} m: pitch {pitch:+.3f}°, yaw {yaw:+.3f}°\n")
+
+
+__all__ = [
+    "estimate_distance",
+    "BallisticTable",
+    "load_default_table",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,539 @@
+# fire_control.py
+# 火控 (发射调度)
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# blaster_fire() / set_blaster_bead() 都是直接写串口，调用方需要自己控制射速与时机。
+# 本模块把发射请求放入队列，由后台线程按以下条件依次发射:
+#   - 射速: 两次发射间隔不小于 1 / FIRE_MAX_RATE
+#   - 热量: 每发水弹产生 FIRE_HEAT_PER_BEAD 热量，按 FIRE_HEAT_COOLING 持续冷却，不超过 FIRE_HEAT_LIMIT
+#   - 锁定: 目标中心距画面中心不超过 FIRE_LOCK_PIXELS 连续 FIRE_LOCK_FRAMES 帧 (可替换为 GimbalTracker.locked)
+#   - 超时: 超过 FIRE_REQUEST_TIMEOUT 仍未满足条件的请求会被丢弃
+# 每次发射都会记录当时最近一次检测结果的时间与位置，用于分析命中率与延迟的关系。
+#
+# 用法:
+#   fire_control = FireControl()
+#   fire_control.update_detection(detection, ts)      # 每帧输入检测结果
+#   fired = fire_control.fire(TRIPLE).result()        # 三连发，返回实际发射的次数
+#
+
+import csv
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, astuple, fields
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable
+
+from src import config
+from src import logger
+from src.uart.blaster import blaster_fire, set_blaster_bead
+
+if TYPE_CHECKING:
+    from src.vision.detector.gimbal import GimbalDetectionResult
+
+
+@dataclass(frozen=True)
+class BurstPattern:
+    """
+    连发模式
+    """
+
+    count:    int         # 发射次数
+    interval: float = 0.0 # 相邻两次发射的最小间隔（秒），实际间隔不小于 1 / FIRE_MAX_RATE
+    beads:    int = 1     # 每次发射的水弹数量 [1, 5]
+
+
+SINGLE = BurstPattern(1)
+DOUBLE = BurstPattern(2, 0.15)
+TRIPLE = BurstPattern(3, 0.15)
+
+
+@dataclass
+class ShotRecord:
+    """
+    一次发射的记录
+    """
+
+    fire_time:      float         # 发射指令发出的时刻 time.monotonic()
+    request_time:   float         # 发射请求提交的时刻
+    beads:          int           # 水弹数量
+    heat:           float         # 发射后的热量
+    detection_time: float | None  # 最近一次检测结果对应的帧时刻，无检测结果时为 None
+    u:              float | None  # 最近一次检测结果的目标中心像素坐标
+    v:              float | None
+    error_px:       float | None  # 目标中心到画面中心的距离（像素）
+    lock_frames:    int           # 发射时连续对准的帧数
+
+
+class _Burst:
+    """
+    一组连发请求的结果
+    """
+
+    def __init__(self, count: int):
+        self.future: Future[int] = Future() # 全部请求结束后结果为实际发射的次数
+        self._remaining = count
+        self._fired = 0
+
+    def resolve(self, fired: bool) -> None:
+        self._fired += int(fired)
+        self._remaining -= 1
+        if self._remaining == 0 and not self.future.done():
+            self.future.set_result(self._fired)
+
+
+@dataclass
+class _ShotRequest:
+    """
+    队列中的一次发射请求
+    """
+
+    beads:        int
+    not_before:   float # 最早的发射时刻
+    deadline:     float # 最晚的发射时刻
+    require_lock: bool
+    request_time: float
+    burst:        _Burst
+
+
+class FireControl:
+    """
+    火控 单例类
+    """
+
+    def __init__(
+        self,
+        fire: Callable[[], Future[bool]] = blaster_fire,
+        set_bead: Callable[[int], None] = set_blaster_bead
+    ):
+        """
+        Args:
+            fire (Callable[[], Future[bool]]): 发射指令，返回写入完成的 Future
+            set_bead (Callable[[int], None]): 设置单次发射量的指令
+        """
+
+        # 单例类 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
+        self._fire = fire
+        self._set_bead = set_bead
+        self._bead: int | None = None # 下位机当前的单次发射量 (None 表示未知)
+
+        self._cond = threading.Condition()
+        self._queue: deque[_ShotRequest] = deque()
+        self._thread: threading.Thread | None = None
+        self._stop: bool = False
+
+        # 射速与热量
+        self._next_allowed: float = 0.0
+        self._heat: float = 0.0
+        self._heat_time: float = time.monotonic()
+
+        # 锁定判断
+        self._lock_source: Callable[[], bool] | None = None
+        self._lock_frames: int = 0
+        self._detection: tuple[float, float, float] | None = None # (帧时刻, u, v)
+
+        # 发射记录
+        self.shots: deque[ShotRecord] = deque(maxlen=1000)
+        self._log_file = None
+        self._log_writer = None
+        if config.FIRE_LOG_PATH:
+            self.open_log(config.FIRE_LOG_PATH)
+
+        # 统计
+        self.requested: int = 0
+        self.fired: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+
+
+    # === 发射请求 ===
+
+    def fire(
+        self,
+        pattern: BurstPattern = SINGLE,
+        require_lock: bool = True,
+        timeout: float | None = None
+    ) -> Future[int]:
+        """
+        提交发射请求 (立即返回)
+
+        Args:
+            pattern (BurstPattern): 连发模式
+            require_lock (bool): 是否只在锁定目标时发射
+            timeout (float | None): 每次发射最多等待的时间（秒），None 表示使用 FIRE_REQUEST_TIMEOUT
+        Returns:
+            Future[int]: 全部请求结束 (发射或丢弃) 后结果为实际发射的次数
+        Raises:
+            ValueError: 连发模式参数不在范围内
+        """
+
+        if pattern.count < 1 or pattern.interval < 0 or not (1 <= pattern.beads <= 5):
+            raise ValueError(f"连发模式参数不在范围内: {pattern}")
+
+        timeout = config.FIRE_REQUEST_TIMEOUT if timeout is None else timeout
+        now = time.monotonic()
+        burst = _Burst(pattern.count)
+
+        with self._cond:
+            for i in range(pattern.count):
+                not_before = now + i * pattern.interval
+                self._queue.append(_ShotRequest(
+                    beads = pattern.beads,
+                    not_before = not_before,
+                    deadline = not_before + timeout,
+                    require_lock = require_lock,
+                    request_time = now,
+                    burst = burst,
+                ))
+            self.requested += pattern.count
+            self._cond.notify_all()
+
+            if self._thread is None or not self._thread.is_alive():
+                self._stop = False
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+
+        return burst.future
+
+
+    def cancel(self) -> int:
+        """
+        丢弃队列中全部尚未发射的请求
+
+        Returns:
+            int: 丢弃的请求数
+        """
+
+        with self._cond:
+            requests = list(self._queue)
+            self._queue.clear()
+            self.dropped += len(requests)
+
+        for request in requests:
+            request.burst.resolve(False)
+        return len(requests)
+
+
+    # === 锁定判断 ===
+
+    def update_target(self, u: float, v: float, timestamp: float) -> None:
+        """
+        输入一次目标的像素位置
+
+        Args:
+            u (float): 目标中心像素横坐标
+            v (float): 目标中心像素纵坐标
+            timestamp (float): 帧的曝光时刻 time.monotonic()
+        """
+
+        error = math.hypot(u - config.CAMERA_CX, v - config.CAMERA_CY)
+        with self._cond:
+            self._detection = (timestamp, u, v)
+            self._lock_frames = self._lock_frames + 1 if error <= config.FIRE_LOCK_PIXELS else 0
+            self._cond.notify_all()
+
+
+    def update_detection(self, detection: "GimbalDetectionResult", timestamp: float) -> None:
+        """
+        输入一次检测结果
+
+        Args:
+            detection (GimbalDetectionResult): 检测结果
+            timestamp (float): 帧的曝光时刻 time.monotonic()
+        """
+
+        x, y, _, _ = detection.xywh
+        self.update_target(x, y, timestamp)
+
+
+    def clear_target(self) -> None:
+        """
+        目标丢失 解除锁定
+        """
+
+        with self._cond:
+            self._lock_frames = 0
+
+
+    def set_lock_source(self, source: Callable[[], bool] | None) -> None:
+        """
+        替换锁定判断 如使用弹道补偿时瞄准点不在画面中心，可改用 lambda: tracker.locked
+
+        Args:
+            source (Callable[[], bool] | None): 返回是否锁定的函数，None 表示按像素误差判断
+        """
+        self._lock_source = source
+
+
+    def _locked(self, now: float) -> bool:
+        """
+        当前是否锁定目标 (调用方需持有锁)
+        """
+
+        if self._lock_source is not None:
+            return self._lock_source()
+        if self._detection is None or now - self._detection[0] > config.FIRE_LOCK_TIMEOUT:
+            return False
+        return self._lock_frames >= config.FIRE_LOCK_FRAMES
+
+
+    @property
+    def locked(self) -> bool:
+        """
+        当前是否满足锁定条件
+        """
+
+        with self._cond:
+            return self._locked(time.monotonic())
+
+
+    # === 热量 ===
+
+    def _heat_at(self, now: float) -> float:
+        """
+        某一时刻的热量 (调用方需持有锁)
+        """
+        return max(0.0, self._heat - config.FIRE_HEAT_COOLING * (now - self._heat_time))
+
+
+    @property
+    def heat(self) -> float:
+        """
+        当前热量
+        """
+
+        with self._cond:
+            return self._heat_at(time.monotonic())
+
+
+    # === 执行 ===
+
+    def _next_request(self) -> _ShotRequest | None:
+        """
+        等待队首请求满足发射条件
+
+        Returns:
+            _ShotRequest | None: 可以发射的请求，执行线程需要退出时返回 None
+        """
+
+        with self._cond:
+            while True:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return None
+
+                now = time.monotonic()
+                request = self._queue[0]
+                if now > request.deadline:
+                    self._queue.popleft()
+                    self.dropped += 1
+                    request.burst.resolve(False)
+                    continue
+
+                # 射速 / 连发间隔 / 热量 都只取决于时间，直接算出可发射的时刻
+                ready = max(request.not_before, self._next_allowed)
+                excess = self._heat_at(now) + request.beads * config.FIRE_HEAT_PER_BEAD - config.FIRE_HEAT_LIMIT
+                if excess > 0:
+                    ready = max(ready, now + excess / config.FIRE_HEAT_COOLING)
+
+                if ready > now:
+                    self._cond.wait(min(ready, request.deadline) - now)
+                    continue
+
+                if request.require_lock and not self._locked(now):
+                    # 按像素判断时检测结果到达会唤醒；外部锁定判断需要轮询
+                    self._cond.wait(min(0.01, request.deadline - now))
+                    continue
+
+                self._queue.popleft()
+                return request
+
+
+    def _worker(self) -> None:
+        """
+        执行线程 循环函数
+        """
+
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+
+            try:
+                fired = self._shoot(request)
+            except Exception as e:
+                logger.error(f"发射出现异常: {e}")
+                fired = False
+            request.burst.resolve(fired)
+
+
+    def _shoot(self, request: _ShotRequest) -> bool:
+        """
+        发射一次 并记录
+
+        Returns:
+            bool: 发射指令是否写入串口 未写入 (串口未打开 / 被作废 / 超时) 时不计入热量与射速
+        """
+
+        if self._bead != request.beads:
+            self._set_bead(request.beads)
+            self._bead = request.beads
+
+        future = self._fire()
+        try:
+            written = future.result(timeout=config.FIRE_REQUEST_TIMEOUT)
+        except Exception: # 被作废 (CancelledError) 或等待超时
+            written = False
+        now = time.monotonic()
+
+        if not written:
+            logger.warning("发射指令未能写入串口")
+            with self._cond:
+                self.failed += 1
+                self._bead = None # 单次发射量指令也可能没有写入，下次发射时重新设置
+            return False
+
+        with self._cond:
+            self._heat = self._heat_at(now) + request.beads * config.FIRE_HEAT_PER_BEAD
+            self._heat_time = now
+            self._next_allowed = now + 1.0 / config.FIRE_MAX_RATE
+            self.fired += 1
+
+            detection = self._detection
+            if detection is not None:
+                detection_time, u, v = detection
+                error = math.hypot(u - config.CAMERA_CX, v - config.CAMERA_CY)
+            else:
+                detection_time = u = v = error = None
+
+            record = ShotRecord(
+                fire_time = now,
+                request_time = request.request_time,
+                beads = request.beads,
+                heat = self._heat,
+                detection_time = detection_time,
+                u = u,
+                v = v,
+                error_px = error,
+                lock_frames = self._lock_frames,
+            )
+            self.shots.append(record)
+
+        if self._log_writer is not None:
+            self._log_writer.writerow(astuple(record))
+            self._log_file.flush() # type: ignore[union-attr]
+        return True
+
+
+    def shutdown(self, timeout: float | None = 1.0) -> None:
+        """
+        丢弃全部请求并停止执行线程
+        """
+
+        self.cancel()
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+        self.close_log()
+
+
+    # === 发射记录 ===
+
+    def open_log(self, path: str) -> bool:
+        """
+        开始把发射记录写入 CSV 文件
+
+        Args:
+            path (str): 文件路径，支持 time.strftime 格式
+        Returns:
+            bool: 是否成功打开文件
+        """
+
+        self.close_log()
+        try:
+            self._log_file = open(time.strftime(path), "w", newline="", encoding="utf-8")
+        except OSError as e:
+            logger.error(f"发射记录文件打开失败: {e}")
+            return False
+
+        self._log_writer = csv.writer(self._log_file)
+        self._log_writer.writerow([f.name for f in fields(ShotRecord)])
+        return True
+
+
+    def close_log(self) -> None:
+        """
+        停止写入发射记录文件
+        """
+
+        if self._log_file is not None:
+            self._log_file.close()
+        self._log_file = None
+        self._log_writer = None
+
+
+    def get_stats(self) -> dict[str, float | int | None]:
+        """
+        获取统计信息
+
+        Returns:
+            dict[str, float | int | None]:
+                requested / fired / dropped / failed: 请求 / 发射 / 丢弃 / 指令写入失败的次数
+                queued: 队列中等待的请求数
+                heat: 当前热量
+                queue_delay_avg_ms: 最近 1000 次发射从提交到发射的平均时间
+                frame_age_avg_ms: 最近 1000 次发射时所依据的检测结果的平均帧龄
+        """
+
+        shots = list(self.shots)
+        delays = [s.fire_time - s.request_time for s in shots]
+        ages = [s.fire_time - s.detection_time for s in shots if s.detection_time is not None]
+
+        with self._cond:
+            queued = len(self._queue)
+
+        return {
+            "requested": self.requested,
+            "fired": self.fired,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": queued,
+            "heat": round(self.heat, 1),
+            "queue_delay_avg_ms": round(sum(delays) / len(delays) * 1000, 1) if delays else None,
+            "frame_age_avg_ms": round(sum(ages) / len(ages) * 1000, 1) if ages else None,
+        }
+
+
+    # === 单例类机制 ===
+    # 单例类设计
+    _instance: 'FireControl | None' = None
+    _instance_lock = threading.Lock() # 线程锁 防止多个线程同时访问该类造成问题
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = super(FireControl, cls).__new__(cls)
+        return cls._instance
+
+
+__all__ = [
+    "BurstPattern",
+    "SINGLE",
+    "DOUBLE",
+    "TRIPLE",
+    "ShotRecord",
+    "FireControl",
+]
@@ -0,0 +1,464 @@
+# tracker.py
+# 云台跟踪控制器
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 以固定频率运行的闭环控制:
+#   检测结果 (像素) -> 角度误差 -> PID + 目标角速度前馈 -> gimbal speed 指令
+#
+# 检测结果对应的是帧曝光时刻，而控制周期在此之后；每个周期都会用目标的世界角度
+# (曝光时刻云台角度 + 角度误差) 与角速度外推到当前时刻，再减去当前云台角度得到误差。
+# 云台角度优先使用推送反馈 (DataHolder.gimbal_attitude_at)，没有反馈时按已发送的速度指令推算。
+#
+# 用法:
+#   tracker = GimbalTracker()
+#   tracker.start()
+#   ok, frame, ts = cam.read_timestamped()
+#   tracker.update_detection(detector.detect(frame)[0], ts)
+#   ...
+#   tracker.stop()
+#
+
+import math
+import time
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Callable
+
+from src import config
+from src import logger
+from src.uart.gimbal import send_gimbal_speed
+from src.uart.state_history import StateHistory
+from .ballistics import BallisticTable
+
+if TYPE_CHECKING:
+    from src.vision.detector.gimbal import GimbalDetectionResult
+
+
+def pixel_to_angle(u: float, v: float) -> tuple[float, float]:
+    """
+    把像素坐标换算为相对光轴的角度 (针孔模型)
+
+    Args:
+        u (float): 像素横坐标
+        v (float): 像素纵坐标
+    Returns:
+        tuple[float, float]: (pitch, yaw) 单位 °，目标在上方 / 右侧时为正
+    """
+
+    yaw = math.degrees(math.atan((u - config.CAMERA_CX) / config.CAMERA_FX))
+    pitch = math.degrees(math.atan((config.CAMERA_CY - v) / config.CAMERA_FY))
+    return pitch, yaw
+
+
+class PIDController:
+    """
+    单轴 PID 控制器 (带前馈、死区、输出饱和与积分抗饱和)
+    """
+
+    def __init__(
+        self,
+        kp: float,
+        ki: float,
+        kd: float,
+        kff: float = 0.0,
+        output_limit: float = math.inf,
+        deadband: float = 0.0,
+        integral_limit: float = math.inf,
+        derivative_filter: float = 0.5
+    ):
+        """
+        Args:
+            kp (float): 比例增益
+            ki (float): 积分增益
+            kd (float): 微分增益
+            kff (float): 前馈增益
+            output_limit (float): 输出绝对值上限
+            deadband (float): 误差死区，死区内误差按 0 处理
+            integral_limit (float): 积分项绝对值上限
+            derivative_filter (float): 微分项一阶低通系数 (0, 1]，1 表示不滤波
+        """
+
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.kff = kff
+        self.output_limit = output_limit
+        self.deadband = deadband
+        self.integral_limit = integral_limit
+        self.derivative_filter = derivative_filter
+
+        self.saturated: bool = False # 上一次输出是否饱和
+        self.reset()
+
+
+    def reset(self) -> None:
+        """
+        清空积分与微分状态
+        """
+
+        self._integral: float = 0.0
+        self._last_error: float | None = None
+        self._derivative: float = 0.0
+        self.saturated = False
+
+
+    def update(self, error: float, dt: float, feedforward: float = 0.0) -> float:
+        """
+        计算一次输出
+
+        Args:
+            error (float): 误差
+            dt (float): 距上一次计算的时间（秒）
+            feedforward (float): 前馈量 (乘以 kff 后叠加到输出)
+        Returns:
+            float: 输出 (已裁剪到 [-output_limit, output_limit])
+        """
+
+        if abs(error) <= self.deadband:
+            error = 0.0
+
+        if self._last_error is not None and dt > 0:
+            raw = (error - self._last_error) / dt
+            self._derivative += self.derivative_filter * (raw - self._derivative)
+        self._last_error = error
+
+        unclamped = self.kp * error + self.ki * self._integral + self.kd * self._derivative + self.kff * feedforward
+        output = max(-self.output_limit, min(self.output_limit, unclamped))
+        self.saturated = output != unclamped
+
+        # 条件积分: 输出饱和且误差会让饱和加深时停止积分
+        if dt > 0 and not (self.saturated and error * unclamped > 0):
+            self._integral = max(-self.integral_limit, min(self.integral_limit, self._integral + error * dt))
+
+        return output
+
+
+class GimbalTracker:
+    """
+    云台跟踪控制器
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        feedback: Callable[[float], tuple[float, float] | None] | None = None,
+        send: Callable[[float, float], None] = send_gimbal_speed,
+        ballistics: BallisticTable | None = None
+    ):
+        """
+        Args:
+            rate (float | None): 控制循环频率（Hz），None 表示使用 AIMBOT_TRACK_RATE
+            feedback (Callable[[float], tuple[float, float] | None] | None):
+                按时刻查询云台 (pitch, yaw) 的函数，如 DataHolder().gimbal_attitude_at；None 表示只按已发送的指令推算
+            send (Callable[[float, float], None]): 发送 (pitch, yaw) 速度指令的函数
+            ballistics (BallisticTable | None): 弹道补偿表，update_detection 时按框的大小叠加修正量；None 表示不补偿
+        """
+
+        self.rate: float = rate or config.AIMBOT_TRACK_RATE
+        self._feedback = feedback
+        self._send = send
+        self.ballistics: BallisticTable | None = ballistics
+
+        def _pid() -> PIDController:
+            return PIDController(
+                kp = config.AIMBOT_TRACK_KP,
+                ki = config.AIMBOT_TRACK_KI,
+                kd = config.AIMBOT_TRACK_KD,
+                kff = config.AIMBOT_TRACK_KFF,
+                output_limit = config.AIMBOT_TRACK_MAX_SPEED,
+                deadband = config.AIMBOT_TRACK_DEADBAND,
+                integral_limit = config.AIMBOT_TRACK_INTEGRAL_LIMIT
+            )
+
+        self.pitch_pid: PIDController = _pid()
+        self.yaw_pid: PIDController = _pid()
+
+        # 按已发送的速度指令推算的云台角度 (没有推送反馈时使用)
+        self._dead_reckoning = StateHistory(2, capacity=512, max_extrapolation=math.inf)
+        self._estimate: list[float] = [0.0, 0.0]
+        self._command: tuple[float, float] = (0.0, 0.0)
+
+        # 目标 (世界角度、角速度、最后一次检测的时刻)
+        self._lock = threading.Lock()
+        self._target: tuple[float, float] | None = None
+        self._target_rate: tuple[float, float] = (0.0, 0.0)
+        self._target_time: float = 0.0
+
+        # 锁定统计
+        self._acquired_at: float | None = None
+        self._locked: bool = False
+        self._lock_count: int = 0
+        self._lock_times: deque[float] = deque(maxlen=100)
+
+        # 循环统计
+        self._jitter: deque[float] = deque(maxlen=1000)
+        self.ticks: int = 0
+        self.overruns: int = 0
+        self.commands: int = 0
+
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+
+    # === 输入 ===
+
+    def gimbal_angle_at(self, timestamp: float) -> tuple[float, float]:
+        """
+        某一时刻的云台角度 优先使用推送反馈
+
+        Args:
+            timestamp (float): time.monotonic() 时刻
+        Returns:
+            tuple[float, float]: (pitch, yaw) 单位 °
+        """
+
+        if self._feedback is not None:
+            angle = self._feedback(timestamp)
+            if angle is not None:
+                return angle
+
+        values = self._dead_reckoning.lookup(timestamp)
+        if values is None:
+            return self._estimate[0], self._estimate[1]
+        return float(values[0]), float(values[1])
+
+
+    def update_target(
+        self,
+        u: float,
+        v: float,
+        timestamp: float,
+        offset: tuple[float, float] = (0.0, 0.0)
+    ) -> None:
+        """
+        输入一次目标的像素位置
+
+        Args:
+            u (float): 目标中心像素横坐标
+            v (float): 目标中心像素纵坐标
+            timestamp (float): 帧的曝光时刻 time.monotonic() (Camera.read_timestamped)
+            offset (tuple[float, float]): 瞄准点相对目标的 (pitch, yaw) 修正量 (°)，如弹道补偿
+        """
+
+        error_p, error_y = pixel_to_angle(u, v)
+        gimbal_p, gimbal_y = self.gimbal_angle_at(timestamp)
+        world = (gimbal_p + error_p + offset[0], gimbal_y + error_y + offset[1])
+
+        with self._lock:
+            previous, previous_time = self._target, self._target_time
+            fresh = previous is None or timestamp - previous_time > config.AIMBOT_TRACK_TARGET_TIMEOUT
+
+            if fresh:
+                self._target_rate = (0.0, 0.0)
+                if self._acquired_at is None:
+                    self._acquired_at = timestamp
+            elif previous is not None and timestamp > previous_time:
+                # 目标角速度 一阶低通
+                dt = timestamp - previous_time
+                rate_p = (world[0] - previous[0]) / dt
+                rate_y = (world[1] - previous[1]) / dt
+                self._target_rate = (
+                    0.5 * self._target_rate[0] + 0.5 * rate_p,
+                    0.5 * self._target_rate[1] + 0.5 * rate_y,
+                )
+
+            self._target = world
+            self._target_time = timestamp
+
+
+    def update_detection(self, detection: "GimbalDetectionResult", timestamp: float) -> None:
+        """
+        输入一次检测结果 设置了弹道补偿表时按框的大小叠加修正量
+
+        Args:
+            detection (GimbalDetectionResult): 检测结果
+            timestamp (float): 帧的曝光时刻 time.monotonic()
+        """
+
+        x, y, w, h = detection.xywh
+        offset = self.ballistics.lookup_box(w, h) if self.ballistics is not None else (0.0, 0.0)
+        self.update_target(x, y, timestamp, offset)
+
+
+    def clear_target(self) -> None:
+        """
+        丢弃当前目标 下一个周期起停止跟踪
+        """
+
+        with self._lock:
+            self._target = None
+
+
+    # === 控制循环 ===
+
+    def _tick(self, now: float, dt: float) -> None:
+        """
+        执行一次控制
+        """
+
+        with self._lock:
+            target = self._target
+            target_rate = self._target_rate
+            target_time = self._target_time
+
+        if target is None or now - target_time > config.AIMBOT_TRACK_TARGET_TIMEOUT:
+            command = (0.0, 0.0)
+            self.pitch_pid.reset()
+            self.yaw_pid.reset()
+            self._lock_count = 0
+            self._locked = False
+            self._acquired_at = None
+        else:
+            # 目标外推到当前时刻
+            ahead = now - target_time
+            gimbal_p, gimbal_y = self.gimbal_angle_at(now)
+            error_p = target[0] + target_rate[0] * ahead - gimbal_p
+            error_y = target[1] + target_rate[1] * ahead - gimbal_y
+            error_y = (error_y + 180.0) % 360.0 - 180.0
+
+            command = (
+                self.pitch_pid.update(error_p, dt, target_rate[0]),
+                self.yaw_pid.update(error_y, dt, target_rate[1]),
+            )
+            self._update_lock(now, error_p, error_y)
+
+        # 只在速度变化时发送 降低链路占用
+        if abs(command[0] - self._command[0]) >= 0.5 or abs(command[1] - self._command[1]) >= 0.5 or \
+           (command == (0.0, 0.0) and self._command != (0.0, 0.0)):
+            self._send(command[0], command[1])
+            self.commands += 1
+            self._command = command
+
+        # 按实际发送的指令推算云台角度 (未发送的微小变化不会被执行)
+        self._estimate[0] += self._command[0] * dt
+        self._estimate[1] += self._command[1] * dt
+        self._dead_reckoning.append(now, self._estimate[0], self._estimate[1])
+
+
+    def _update_lock(self, now: float, error_p: float, error_y: float) -> None:
+        """
+        统计从发现目标到锁定的时间
+        """
+
+        deadband = config.AIMBOT_TRACK_DEADBAND
+        if abs(error_p) <= deadband and abs(error_y) <= deadband:
+            self._lock_count += 1
+        else:
+            self._lock_count = 0
+            self._locked = False
+
+        if not self._locked and self._lock_count >= config.AIMBOT_TRACK_LOCK_FRAMES:
+            self._locked = True
+            if self._acquired_at is not None:
+                self._lock_times.append(now - self._acquired_at)
+                logger.debug(f"云台锁定目标 用时 {(now - self._acquired_at) * 1000:.0f} ms")
+
+
+    def _worker(self) -> None:
+        """
+        控制线程 按固定频率执行 _tick
+        """
+
+        period = 1.0 / self.rate
+        next_tick = time.monotonic()
+        last = next_tick
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            self._jitter.append(now - next_tick)
+            self.ticks += 1
+
+            try:
+                self._tick(now, now - last)
+            except Exception as e:
+                logger.error(f"云台跟踪控制 出现异常: {e}")
+            last = now
+
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # 跟不上时不追赶 从当前时刻重新计时
+                self.overruns += 1
+                next_tick = time.monotonic()
+
+        self._send(0.0, 0.0)
+        self._command = (0.0, 0.0)
+
+
+    def start(self) -> None:
+        """
+        启动控制线程
+        """
+
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+
+    def stop(self, timeout: float | None = 1.0) -> None:
+        """
+        停止控制线程 并让云台停止转动
+        """
+
+        if not self._thread:
+            return
+
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+    @property
+    def locked(self) -> bool:
+        """
+        是否已锁定目标
+        """
+        return self._locked
+
+
+    def get_stats(self) -> dict[str, float | int | None]:
+        """
+        获取控制循环统计信息
+
+        Returns:
+            dict[str, float | int | None]:
+                ticks: 已执行的周期数
+                overruns: 超时的周期数
+                commands: 发送的速度指令数
+                jitter_p50_ms / jitter_p99_ms / jitter_max_ms: 周期实际开始时刻相对计划时刻的延迟
+                lock_time_ms: 最近一次锁定用时 (未锁定过为 None)
+                lock_time_avg_ms: 最近 100 次锁定的平均用时
+        """
+
+        jitter = sorted(self._jitter)
+        lock_times = list(self._lock_times)
+
+        def pick(q: float) -> float | None:
+            if not jitter:
+                return None
+            return round(jitter[min(len(jitter) - 1, int(q * len(jitter)))] * 1000, 3)
+
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "commands": self.commands,
+            "jitter_p50_ms": pick(0.50),
+            "jitter_p99_ms": pick(0.99),
+            "jitter_max_ms": round(jitter[-1] * 1000, 3) if jitter else None,
+            "lock_time_ms": round(lock_times[-1] * 1000, 1) if lock_times else None,
+            "lock_time_avg_ms": round(sum(lock_times) / len(lock_times) * 1000, 1) if lock_times else None,
+        }
+
+
+__all__ = [
+    "pixel_to_angle",
+    "PIDController",
+    "GimbalTracker",
+]
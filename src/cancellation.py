@@ -0,0 +1,189 @@
+# cancellation.py
+# 协作式取消
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# Python 线程无法从外部强制结束，技能需要自己在合适的位置检查是否已被取消。
+# BaseSkill 为每次调用创建一个 CancellationToken 传给技能函数:
+#   - token.sleep() / token.wait_for() 代替 time.sleep() / future.result()，取消时立即抛出 OperationCancelled
+#   - rotate_gimbal() 等串口运动函数接受 token 参数，在每一步之间检查
+#   - token.add_callback() 注册取消时需要执行的清理 (如停止云台)
+#
+# 用法:
+#   def action(skill: BaseSkill, token: CancellationToken) -> None:
+#       while True:
+#           rotate_gimbal(yaw=90, vyaw=180, token=token)
+#           token.sleep(1.0)
+#
+
+import time
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, TypeVar
+
+from src import logger
+
+
+T = TypeVar("T")
+
+
+class OperationCancelled(Exception):
+    """
+    操作已被取消
+    """
+
+
+class CancellationToken:
+    """
+    取消令牌 一经取消不可恢复
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+
+    def cancel(self) -> None:
+        """
+        取消 (立即返回) 依次执行已注册的回调
+        """
+
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"取消回调 {callback} 出现异常: {e}")
+
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        是否已被取消
+        """
+        return self._event.is_set()
+
+
+    def raise_if_cancelled(self) -> None:
+        """
+        已被取消时抛出 OperationCancelled
+
+        Raises:
+            OperationCancelled: 已被取消
+        """
+
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """
+        注册取消时执行的回调 已取消时立即执行
+
+        Args:
+            callback (Callable[[], None]): 回调函数 (在调用 cancel() 的线程中执行)
+        """
+
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """
+        取消注册回调
+        """
+
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        等待取消
+
+        Args:
+            timeout (float | None): 超时时间，单位秒，None 表示无限等待
+        Returns:
+            bool: 是否已被取消
+        """
+        return self._event.wait(timeout)
+
+
+    def sleep(self, seconds: float) -> None:
+        """
+        可被取消的 time.sleep()
+
+        Args:
+            seconds (float): 等待时间（秒）
+        Raises:
+            OperationCancelled: 等待期间被取消
+        """
+
+        if self._event.wait(max(0.0, seconds)):
+            raise OperationCancelled()
+
+
+    def wait_for(self, future: Future[T], timeout: float | None = None) -> T:
+        """
+        可被取消的 future.result() 取消时会同时取消 future
+
+        Args:
+            future (Future[T]): 要等待的 Future
+            timeout (float | None): 超时时间，单位秒，None 表示无限等待
+        Returns:
+            T: future 的结果
+        Raises:
+            OperationCancelled: 等待期间被取消
+            TimeoutError: 超时
+        """
+
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        self.add_callback(done.set)
+        try:
+            done.wait(timeout)
+        finally:
+            self.remove_callback(done.set)
+
+        if future.done():
+            return future.result()
+        if self._event.is_set():
+            future.cancel()
+            raise OperationCancelled()
+        raise FutureTimeoutError()
+
+
+def sleep(seconds: float, token: CancellationToken | None = None) -> None:
+    """
+    token 为 None 时等同于 time.sleep()，否则为可被取消的等待
+
+    Args:
+        seconds (float): 等待时间（秒）
+        token (CancellationToken | None): 取消令牌
+    Raises:
+        OperationCancelled: 等待期间被取消
+    """
+
+    if token is None:
+        time.sleep(max(0.0, seconds))
+        return
+    token.sleep(seconds)
+
+
+__all__ = [
+    "OperationCancelled",
+    "CancellationToken",
+    "sleep",
+]
@@ -22,22 +22,86 @@ CAMERA_FPS           =    60   # 摄像头帧率
 CAMERA_FOURCC        = "MJPG"  # 摄像头编码格式
 CAMERA_AUTO_EXPOSURE =     1   # 自动曝光模式
 CAMERA_EXPOSURE      =    64   # 曝光时间
+CAMERA_LATENCY       =  0.02   # 曝光到读取完成的估计延迟（秒），用于把帧对齐到云台姿态
+CAMERA_FX            = 520.0   # 相机内参 焦距 fx（像素），需按实际标定结果修改
+CAMERA_FY            = 520.0   # 相机内参 焦距 fy（像素）
+CAMERA_CX            = 320.0   # 相机内参 主点 cx（像素）
+CAMERA_CY            = 240.0   # 相机内参 主点 cy（像素）
 
 # === 串口参数配置 ===
 import serial as s
-SERIAL_PORT          = "/dev/ttyUSB0"  # 串口设备路径
-SERIAL_BAUDRATE      = 115200          # 串口波特率
-SERIAL_TIMEOUT       = 3               # 串口超时时间（秒）
-SERIAL_BYTESIZE      = s.EIGHTBITS     # 串口数据位
-SERIAL_PARITY        = s.PARITY_NONE   # 串口校验位
-SERIAL_STOPBITS      = s.STOPBITS_ONE  # 串口停止位
-SERIAL_EOL           = "\n"            # 串口通信结束符
-SERIAL_RX_READ_DELAY = 0.08            # 串口接收线程轮询延时（秒）
+SERIAL_PORT            = "/dev/ttyUSB0"  # 串口设备路径
+SERIAL_BAUDRATE        = 115200          # 串口波特率
+SERIAL_TIMEOUT         = 3               # 串口超时时间（秒）
+SERIAL_BYTESIZE        = s.EIGHTBITS     # 串口数据位
+SERIAL_PARITY          = s.PARITY_NONE   # 串口校验位
+SERIAL_STOPBITS        = s.STOPBITS_ONE  # 串口停止位
+SERIAL_EOL             = "\n"            # 串口通信结束符
+SERIAL_RX_READ_DELAY   = 0.08            # 串口接收线程出现异常后的重试延时（秒）
+SERIAL_RX_BUFFER_LIMIT = 4096            # 串口接收半行缓冲上限（字节），超过仍无结束符则丢弃
+SERIAL_RX_QUEUE_SIZE   = 512             # 串口接收队列容量（行）
+SERIAL_RX_QUEUE_POLICY = "drop_oldest"   # 串口接收队列满时的策略 ("drop_oldest" / "drop_newest" / "block")
+SERIAL_TX_BATCH_LIMIT  = 256             # 串口发送线程单次合并写入的字节上限
+SERIAL_TX_LINK_BUDGET  = 0.9             # 发送调度可占用的链路带宽比例 (0, 1]
+SERIAL_TX_MAX_BACKLOG  = 0.005           # 允许已写出但尚未传完的数据量（秒），超过后指令留在队列中等待合并
+SERIAL_TX_DEDUP_WINDOW = 0.5             # 相同设定值指令的去重时间窗（秒），0 表示不去重
+SERIAL_REPLY_TIMEOUT   = 1.0             # 指令应答超时时间（秒）
+SERIAL_RECORD_PATH     = None            # 串口流量录制文件路径 (支持 strftime 格式，如 "serial_%y%m%d_%H%M%S.bin")，None 表示不录制
+
+# === 底盘速度控制器 ===
+CHASSIS_CTRL_RATE         = 50.0   # 控制循环频率（Hz）
+CHASSIS_CTRL_MAX_ACCEL_XY = 3.0    # 平移加速度上限（m/s²）
+CHASSIS_CTRL_MAX_ACCEL_Z  = 720.0  # 旋转角加速度上限（°/s²）
+CHASSIS_CTRL_MAX_JERK_XY  = 20.0   # 平移加加速度上限（m/s³）
+CHASSIS_CTRL_MAX_JERK_Z   = 5000.0 # 旋转角加加速度上限（°/s³）
+CHASSIS_CTRL_THRESHOLD_XY = 0.02   # 平移速度变化超过该值（m/s）才发送
+CHASSIS_CTRL_THRESHOLD_Z  = 2.0    # 旋转速度变化超过该值（°/s）才发送
+CHASSIS_CTRL_TIMEOUT      = 0.3    # 超过该时间（秒）没有新的目标速度则立即停车
+CHASSIS_CTRL_RESEND       = 1.0    # 速度不变时重发当前速度的间隔（秒），防止单条指令丢失
+
+# === 鼠标操控云台 ===
+MOUSE_CTRL_ENABLED         = False # 是否由比赛数据中的鼠标移动直接控制云台 (会与技能争用云台，默认关闭)
+MOUSE_CTRL_MAX_SPEED_YAW   = 360.0 # 鼠标移动量达到满量程 (100) 时的偏航速度（°/s）
+MOUSE_CTRL_MAX_SPEED_PITCH = 180.0 # 鼠标移动量达到满量程 (100) 时的俯仰速度（°/s）
+MOUSE_CTRL_EXPONENT        = 1.6   # 灵敏度曲线指数，1 为线性，越大小幅移动越精细
+MOUSE_CTRL_DEADZONE        = 2     # 鼠标移动量死区，绝对值不超过该值视为 0
+MOUSE_CTRL_SMOOTHING       = 0.3   # 平滑系数 [0, 1)，越大越平滑、延迟越高，0 表示不平滑
+MOUSE_CTRL_INVERT_Y        = False # 是否反转俯仰方向 (默认鼠标向前推 mouse_y < 0 时云台抬头)
+MOUSE_CTRL_TIMEOUT         = 0.15  # 超过该时间（秒）没有新的数据包则停止云台
 
 # === 自瞄模型相关配置 ===
 AIMBOT_MODEL_PATH      = "model/aimbot/model.onnx"  # 自瞄模型路径
 AIMBOT_PREDICT_DEVICE  = "CPU"                     # 自瞄模型推理设备 ("CPU" 或 "GPU")
 
+# === 自瞄跟踪控制器 ===
+AIMBOT_TRACK_RATE           = 100.0 # 控制循环频率（Hz）
+AIMBOT_TRACK_KP             = 8.0   # 比例增益 (°/s 每 ° 误差)
+AIMBOT_TRACK_KI             = 1.0   # 积分增益 (°/s 每 °·s)
+AIMBOT_TRACK_KD             = 0.05  # 微分增益 (°/s 每 °/s)
+AIMBOT_TRACK_KFF            = 1.0   # 目标角速度前馈增益
+AIMBOT_TRACK_MAX_SPEED      = 300.0 # 输出速度上限（°/s）
+AIMBOT_TRACK_DEADBAND       = 0.3   # 误差死区（°），死区内不修正
+AIMBOT_TRACK_INTEGRAL_LIMIT = 10.0  # 积分项上限（°·s）
+AIMBOT_TRACK_TARGET_TIMEOUT = 0.2   # 超过该时间（秒）没有新的检测结果则停止跟踪
+AIMBOT_TRACK_LOCK_FRAMES    = 5     # 误差连续处于死区内的周期数达到该值视为锁定
+
+# === 火控 ===
+FIRE_MAX_RATE        = 5.0   # 最高发射频率（次/秒）
+FIRE_HEAT_PER_BEAD   = 10.0  # 每发水弹产生的热量
+FIRE_HEAT_LIMIT      = 100.0 # 热量上限，发射后会超过上限的请求需要等待冷却
+FIRE_HEAT_COOLING    = 20.0  # 每秒冷却的热量
+FIRE_LOCK_PIXELS     = 15.0  # 目标中心距画面中心不超过该值（像素）视为对准
+FIRE_LOCK_FRAMES     = 3     # 连续对准的帧数达到该值才允许发射
+FIRE_LOCK_TIMEOUT    = 0.1   # 最近一次检测结果超过该时间（秒）则不再视为锁定
+FIRE_REQUEST_TIMEOUT = 1.0   # 发射请求在该时间（秒）内未能发射则丢弃
+FIRE_LOG_PATH        = None  # 发射记录 CSV 路径 (支持 strftime 格式)，None 表示只保存在内存中
+
+# === 弹道补偿 ===
+ARMOR_WIDTH                 = 0.135 # 装甲板实际宽度（米），需按实际测量修改
+ARMOR_HEIGHT                = 0.125 # 装甲板实际高度（米）
+AIMBOT_BALLISTIC_TABLE_PATH = "model/aimbot/ballistics.csv" # 弹道补偿表路径 (由 python -m src.aimbot.ballistics build 生成)
+AIMBOT_BALLISTIC_BIN        = 0.25  # 生成补偿表时按距离分组的宽度（米）
+
 # =================================
 
 __all__ = [
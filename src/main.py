@@ -6,10 +6,13 @@
 
 import time
 
+from src import config
 from src import logger
 from src.uart import conn
 from src.uart.sdk import enter_sdk_mode, exit_sdk_mode
 from src.uart.dataholder import DataHolder
+from src.uart.events import EventType
+from src.uart.mouse_control import MouseGimbalControl
 from src.skill.manager import SkillManager
 from src.skill.example import skill as example_skill
 from src.vision.camera import Camera
@@ -66,6 +69,9 @@ def main() -> None:
         logger.error("串口打开失败！请检查连接。")
         return
 
+    if config.SERIAL_RECORD_PATH:
+        conn.start_recording(config.SERIAL_RECORD_PATH)
+
     if not conn.handshake_serial():
         logger.error("串口握手失败！请检查连接。")
         return
@@ -77,11 +83,17 @@ def main() -> None:
     # === 初始化数据存储器 ===
     data_holder = DataHolder()
 
+    # 鼠标移动随比赛数据到达直接转为云台速度指令
+    mouse_control = MouseGimbalControl()
+    if config.MOUSE_CTRL_ENABLED:
+        mouse_control.start(data_holder.events)
+
     logger.info("4. 数据存储器初始化完毕.")
 
     # === 初始化技能管理器 ===
     skill_manager = SkillManager()
     skill_manager.add_skill(example_skill)
+    data_holder.events.subscribe(skill_manager.on_key_event, [EventType.KEY_DOWN]) # 每次按下切换一次技能状态
 
     logger.info("5. 技能管理器初始化完毕.")
 
@@ -90,20 +102,16 @@ def main() -> None:
 
     try:
         while True:
-            data_holder.fetch_and_process() # 获取比赛数据
-            pressed_keys = data_holder.pressed_keys # 获取按键信息
-
-            if len(pressed_keys) > 0:
-                for key in pressed_keys:
-                    if skill_manager.get_skill_enabled_state(key):
-                        skill_manager.cancel_skill_by_key(key)
-                    else:
-                        skill_manager.invoke_skill_by_key(key)
+            # 阻塞等待新数据到达，避免空转占满 CPU
+            # 按键事件在此线程中回调 skill_manager.on_key_event
+            data_holder.fetch_and_process(timeout=0.1) # 获取比赛数据
     except KeyboardInterrupt:
         logger.info("收到退出信号，正在关闭...")
     finally:
+        mouse_control.stop()
         cam.close()
         exit_sdk_mode()
+        conn.stop_recording()
 
 
 if __name__ == "__main__":
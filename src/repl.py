@@ -26,7 +26,7 @@ import shutil
 from time import monotonic
 
 from src import logger
-from src.uart.conn import (open_serial, writeline, start_rx_thread, readline,)
+from src.uart.aio import AsyncSerial
 
 class TUILogger:
     """维护上方滚动缓冲，触发界面重绘，并提供彩色渲染。"""
@@ -144,22 +144,20 @@ class TUILogger:
 
 # 移除 logger 注入：按需求只展示 TX/RX 两类数据
 
-async def serial_reader_task(stop_event: asyncio.Event, log: TUILogger):
+async def serial_reader_task(stop_event: asyncio.Event, log: TUILogger, port: AsyncSerial):
     """持续读取串口并更新界面顶部日志。"""
     try:
-        # 使用后台队列无阻塞获取，提高高频场景性能
-        while not stop_event.is_set():
-            line = readline()
-            if line:
-                log.append(f"[接收] {line}")
-            else:
-                await asyncio.sleep(0.003)
+        # 与界面共用同一个事件循环，数据到达即刻唤醒，无需轮询
+        async for line in port.lines():
+            if stop_event.is_set():
+                break
+            log.append(f"[接收] {line}")
     except asyncio.CancelledError:
         logger.debug("serial_reader_task 被取消。")
         raise
 
 
-def build_app(stop_event: asyncio.Event, logger_view: TUILogger) -> Application:
+def build_app(stop_event: asyncio.Event, logger_view: TUILogger, port: AsyncSerial) -> Application:
     # 顶部 UART 输出区域（占总高度约 80%），使用可着色的 FormattedTextControl
     output_control = FormattedTextControl(text=lambda: logger_view.render_fragments(), focusable=False, show_cursor=False)
     output_area = Window(
@@ -233,13 +231,15 @@ def build_app(stop_event: asyncio.Event, logger_view: TUILogger) -> Application:
             return
         # 异步写串口（立即在视图里记录 TX）
         async def _send(cmd: str):
-            payload = cmd + _eol_value()
-            ok = await asyncio.to_thread(writeline, payload)
+            # 与 encode_command 一致: 补全结尾的 ';' (输入时带不带均可)，再加上行结尾
+            command = f"{cmd.rstrip().rstrip(';').rstrip()};"
+            payload = command + _eol_value()
+            ok = await port.send_raw(payload.encode("utf-8"))
             if not ok:
                 logger_view.append("[WARN] 发送失败，串口可能未连接或已断开。")
             else:
                 # 即时显示已发送的数据（不等待设备回显）
-                view_text = cmd if eol_mode["value"] != "none" else payload
+                view_text = command
                 logger_view.append(f"[发送] {view_text}")
         asyncio.create_task(_send(text))
 
@@ -279,7 +279,8 @@ def build_app(stop_event: asyncio.Event, logger_view: TUILogger) -> Application:
 
 
 async def amain():
-    result = open_serial()
+    port = AsyncSerial()
+    result = await port.open()
     if not result:
         # 启动失败时仅在控制台日志输出，不在 TUI 区域显示
         logger.error("无法连接到UART设备，程序退出。")
@@ -288,7 +289,7 @@ async def amain():
     stop_event = asyncio.Event()
 
     tui_log = TUILogger(buffer_lines=8)
-    app = build_app(stop_event, tui_log)
+    app = build_app(stop_event, tui_log, port)
 
     # 首次渲染后对齐：探测输出区视口高度，修正底部对齐
     async def _probe_viewport_and_align():
@@ -306,9 +307,8 @@ async def amain():
 
     asyncio.create_task(_probe_viewport_and_align())
 
-    # 启动后台接收线程
-    start_rx_thread()
-    reader = asyncio.create_task(serial_reader_task(stop_event, tui_log))
+    # 启动接收协程
+    reader = asyncio.create_task(serial_reader_task(stop_event, tui_log, port))
 
     try:
         await app.run_async()
@@ -319,6 +319,7 @@ async def amain():
         if not reader.done():
             reader.cancel()
         await asyncio.gather(reader, return_exceptions=True)
+        port.close()
 
 
 def main():
@@ -9,6 +9,7 @@ import threading as t
 from typing import Callable
 
 from src import logger
+from src.cancellation import CancellationToken, OperationCancelled
 
 
 class BaseSkill:
@@ -25,16 +26,18 @@ class BaseSkill:
         """
         Args:
             binding_key (str): 绑定的按键
-            invoke_func (Callable[..., None]): 调用的函数
+            invoke_func (Callable[..., None]): 调用的函数 invoke_func(skill, token)，
+                需要在循环 / 等待中检查 token (token.sleep() 等)，取消后尽快返回
             name (str | None, optional): 技能名称. 若为None则默认为"[按键]".
         """
 
         # 技能本体设计
         self.binding_key: int = ord(binding_key if binding_key.islower() else binding_key.lower()) # 绑定的按键 (统一小写)
-        self.invoke_func: Callable[["BaseSkill", ], None] = invoke_func # 调用的函数
+        self.invoke_func: Callable[["BaseSkill", CancellationToken], None] = invoke_func # 调用的函数
 
         # 技能状态
         self.thread: t.Thread | None = None # 运行的线程
+        self.token: CancellationToken | None = None # 本次调用的取消令牌
         self.enabled: bool = False # 技能是否启用
 
         # 技能标识
@@ -45,20 +48,33 @@ class BaseSkill:
         """
         调用技能
         """
-        self.thread = t.Thread(target=self.invoke_func, args=(self, ), daemon=True)
+        self.token = CancellationToken()
+        self.thread = t.Thread(target=self._run, args=(self.token, ), daemon=True)
         self.thread.start()
 
         self.enabled = True
         logger.debug(f"技能 {self.name} 已启用")
 
 
+    def _run(self, token: CancellationToken) -> None:
+        """
+        技能线程 执行 invoke_func
+        """
+        try:
+            self.invoke_func(self, token)
+        except OperationCancelled:
+            logger.debug(f"技能 {self.name} 已停止运行")
+        except Exception as e:
+            logger.error(f"技能 {self.name} 出现异常: {e}")
+
+
     def cancel(self) -> None:
         """
-        取消技能
+        取消技能 (立即返回)
+        技能线程在下一次检查取消令牌时结束
         """
-        if self.thread is not None and self.thread.is_alive():
-            logger.debug(f"技能 {self.name} 正在取消中...")
-            self.thread.join(timeout=5) # 等待线程结束 timeout参数效果=无
+        if self.token is not None:
+            self.token.cancel()
         self.enabled = False
         logger.debug(f"技能 {self.name} 已取消")
 
@@ -4,23 +4,22 @@
 # @author n1ghts4kura
 #
 
-import time
-
 from src.skill.base import BaseSkill
 from src import logger
-from src.uart.blaster import blaster_fire
+from src.cancellation import CancellationToken
+from src.aimbot.fire_control import FireControl
 
 
-def example_action(skill: BaseSkill, *args, **kwargs) -> None:
+def example_action(skill: BaseSkill, token: CancellationToken) -> None:
     """
     示例技能动作
-    当按下 w 键时执行
+    当按下 w 键时执行 等待期间再次按下 w 键会立即取消
     """
 
     logger.info("你好呀 我是example action.") 
-    time.sleep(3)
+    token.sleep(3) # 被取消时抛出 OperationCancelled，后续不再执行
     logger.info("SHOOT!!")
-    blaster_fire()
+    FireControl().fire(require_lock=False) # 经火控排队发射 受射速 / 热量限制
 
 skill = BaseSkill(
     binding_key="w", # **用小写字母注册！**
@@ -8,6 +8,7 @@
 
 
 from src.skill.base import BaseSkill
+from src.uart.events import Event, EventType
 from src import logger
 
 
@@ -84,4 +85,30 @@ class SkillManager:
                 return True
 
         logger.warning(f"无法取消绑定按键 {binding_key} 的技能")
-        return False
\ No newline at end of file
+        return False
+
+
+    def toggle_skill_by_key(self, binding_key: int) -> bool:
+        """
+        通过绑定键切换技能状态 启用中则取消，否则调用
+        """
+        if self.get_skill_enabled_state(binding_key):
+            return self.cancel_skill_by_key(binding_key)
+        return self.invoke_skill_by_key(binding_key)
+
+
+    def on_key_event(self, event: Event) -> None:
+        """
+        按键事件回调 每次按下只切换一次技能状态
+        用法: data_holder.events.subscribe(skill_manager.on_key_event, [EventType.KEY_DOWN])
+
+        Args:
+            event (Event): 按键事件
+        """
+
+        if event.type != EventType.KEY_DOWN:
+            return
+
+        key = event.payload.key
+        if any(skill.binding_key == key for skill in self.skills):
+            self.toggle_skill_by_key(key)
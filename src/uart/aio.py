@@ -0,0 +1,304 @@
+# aio.py
+# 基于 asyncio 的串口传输模块
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 与 conn.py 的线程实现相互独立：不使用收发线程和 queue.Queue，
+# 收发都在调用方的事件循环中完成，适合 REPL 以及基于协程的技能。
+#
+
+import os
+import time
+import asyncio
+from typing import AsyncIterator
+import serial as s
+
+from src import config
+from src import logger
+from .framing import LineAssembler, encode_command
+
+
+class _SerialReadProtocol(asyncio.Protocol):
+    """
+    读方向协议 把收到的字节交给 AsyncSerial 拼行
+    """
+
+    def __init__(self, owner: "AsyncSerial"):
+        self._owner = owner
+
+    def data_received(self, data: bytes) -> None:
+        self._owner._feed(data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._owner._on_lost(exc)
+
+
+class _SerialWriteProtocol(asyncio.BaseProtocol):
+    """
+    写方向协议 把传输层的流量控制转为 AsyncSerial 的可写事件
+    """
+
+    def __init__(self, owner: "AsyncSerial"):
+        self._owner = owner
+
+    def pause_writing(self) -> None:
+        self._owner._writable.clear()
+
+    def resume_writing(self) -> None:
+        self._owner._writable.set()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._owner._writable.set() # 唤醒等待中的 send()，由其发现连接已关闭
+
+
+class AsyncSerial:
+    """
+    asyncio 串口连接
+
+    用法:
+        >>> async with AsyncSerial() as port:
+        >>>     await port.send("command;")
+        >>>     async for line in port.lines():
+        >>>         ...
+    """
+
+    def __init__(
+        self,
+        port: str | None = None,
+        baudrate: int | None = None,
+        rx_high_water: int = 256,
+        tx_high_water: int = 1024
+    ):
+        """
+        Args:
+            port (str | None): 串口设备路径，None 表示使用 config.SERIAL_PORT
+            baudrate (int | None): 波特率，None 表示使用 config.SERIAL_BAUDRATE
+            rx_high_water (int): 未读行数达到该值时暂停从串口读取，降到一半时恢复
+            tx_high_water (int): 写缓冲字节数达到该值时 send() 开始等待
+        """
+
+        self.port: str = port if port is not None else config.SERIAL_PORT
+        self.baudrate: int = baudrate if baudrate is not None else config.SERIAL_BAUDRATE
+
+        self._rx_high_water: int = rx_high_water
+        self._tx_high_water: int = tx_high_water
+
+        self._serial: s.Serial | None = None
+        self._rx_transport: asyncio.ReadTransport | None = None
+        self._tx_transport: asyncio.WriteTransport | None = None
+
+        self._assembler = LineAssembler(
+            eol = config.SERIAL_EOL.encode("utf-8"),
+            max_buffer = config.SERIAL_RX_BUFFER_LIMIT
+        )
+        # 接收队列 元素为 (到达时间 time.monotonic(), 行数据)，None 表示连接已关闭
+        self._lines: asyncio.Queue[tuple[float, str] | None] = asyncio.Queue()
+        self._reading_paused: bool = False
+        self._writable: asyncio.Event = asyncio.Event()
+        self._writable.set()
+        self._closed: bool = True
+
+
+    async def open(self) -> bool:
+        """
+        打开串口 并挂到当前事件循环上
+
+        Returns:
+            bool: 是否成功打开
+        """
+
+        if self.port == config.SERIAL_PORT:
+            os.system(f"sudo chmod 777 {self.port}") # 修改串口权限
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            # 借用 pyserial 完成波特率等 termios 配置，实际读写交给事件循环
+            self._serial = s.Serial(
+                port = self.port,
+                baudrate = self.baudrate,
+                timeout = 0,
+                bytesize = config.SERIAL_BYTESIZE,
+                parity = config.SERIAL_PARITY,
+                stopbits = config.SERIAL_STOPBITS
+            )
+
+            fd = self._serial.fileno()
+            rx_file = os.fdopen(os.dup(fd), "rb", buffering=0)
+            tx_file = os.fdopen(os.dup(fd), "wb", buffering=0)
+
+            self._rx_transport, _ = await loop.connect_read_pipe(lambda: _SerialReadProtocol(self), rx_file)
+            self._tx_transport, _ = await loop.connect_write_pipe(lambda: _SerialWriteProtocol(self), tx_file)
+            self._tx_transport.set_write_buffer_limits(high=self._tx_high_water)
+
+            self._closed = False
+            return True
+
+        except Exception as e:
+            logger.error(f"打开异步串口 出现异常: {e}")
+            self.close()
+            return False
+
+
+    def close(self) -> None:
+        """
+        关闭串口
+        """
+
+        self._closed = True
+
+        for transport in (self._rx_transport, self._tx_transport):
+            if transport is not None:
+                transport.close()
+        self._rx_transport = None
+        self._tx_transport = None
+
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except Exception:
+                pass
+            self._serial = None
+
+        self._lines.put_nowait(None)
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        串口是否处于打开状态
+        """
+        return not self._closed
+
+
+    # === 发送 ===
+
+    async def send_raw(self, payload: bytes) -> bool:
+        """
+        原样写入字节 写缓冲超过上限时等待其回落 (背压)
+
+        Args:
+            payload (bytes): 要写入的字节
+        Returns:
+            bool: 是否写入成功
+        """
+
+        await self._writable.wait()
+
+        transport = self._tx_transport
+        if self._closed or transport is None or transport.is_closing():
+            return False
+
+        transport.write(payload)
+        return True
+
+
+    async def send(self, data: str) -> bool:
+        """
+        写入一条指令 (格式与 conn.writeline 相同)
+
+        Args:
+            data (str): 指令字符串
+        Returns:
+            bool: 是否写入成功
+        """
+        return await self.send_raw(encode_command(data))
+
+
+    # === 接收 ===
+
+    def _feed(self, data: bytes) -> None:
+        """
+        处理事件循环收到的字节
+        """
+
+        arrived = time.monotonic()
+        for line in self._assembler.feed(data):
+            self._lines.put_nowait((arrived, line))
+
+        # 消费者跟不上时暂停读取，数据留在内核缓冲中
+        if not self._reading_paused and self._lines.qsize() >= self._rx_high_water and self._rx_transport is not None:
+            self._rx_transport.pause_reading()
+            self._reading_paused = True
+
+
+    def _on_lost(self, exc: Exception | None) -> None:
+        """
+        读方向连接断开
+        """
+
+        if exc is not None:
+            logger.error(f"异步串口连接断开: {exc}")
+        if not self._closed:
+            self.close()
+
+
+    async def readline_timestamped(self, timeout: float | None = None) -> tuple[float, str] | None:
+        """
+        读取一行数据 并附带该行的到达时间
+
+        Args:
+            timeout (float | None): 超时时间，单位秒，None表示无限等待
+        Returns:
+            tuple[float, str]: (到达时间 time.monotonic(), 数据)
+            None: 超时或连接已关闭
+        """
+
+        try:
+            item = await asyncio.wait_for(self._lines.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if item is None:
+            self._lines.put_nowait(None) # 让其他等待者也能看到关闭
+            return None
+
+        if self._reading_paused and self._lines.qsize() <= self._rx_high_water // 2 and self._rx_transport is not None:
+            self._rx_transport.resume_reading()
+            self._reading_paused = False
+
+        return item
+
+
+    async def readline(self, timeout: float | None = None) -> str | None:
+        """
+        读取一行数据
+
+        Args:
+            timeout (float | None): 超时时间，单位秒，None表示无限等待
+        Returns:
+            str: 获取到的数据
+            None: 超时或连接已关闭
+        """
+
+        item = await self.readline_timestamped(timeout)
+        return None if item is None else item[1]
+
+
+    async def lines(self) -> AsyncIterator[str]:
+        """
+        逐行迭代接收到的数据 直到连接关闭
+        """
+
+        while True:
+            item = await self.readline_timestamped()
+            if item is None:
+                return
+            yield item[1]
+
+
+    # === 上下文管理 ===
+
+    async def __aenter__(self) -> "AsyncSerial":
+        if not await self.open():
+            raise s.SerialException(f"无法打开串口 {self.port}")
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+__all__ = [
+    "AsyncSerial",
+]
@@ -0,0 +1,312 @@
+# benchmark.py
+# 串口链路吞吐量 / 往返时延基准测试
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 在虚拟下位机 (simulator.py) 上跑通 open_serial / writeline / _rx_worker / readline
+# 整条链路，结果以 JSON 输出，便于对比不同收发策略以及发现性能回退。
+#
+# 用法:
+#   $ python -m src.uart.benchmark
+#   $ python -m src.uart.benchmark --baud 115200 --latency 0.002 --output bench.json
+#
+
+import sys
+import json
+import time
+import logging
+import argparse
+
+from src import config
+from src import logger
+from . import conn
+from .simulator import VirtualRobot
+
+
+def _percentiles(samples: list[float]) -> dict[str, float | int]:
+    """
+    计算样本的 p50 / p95 / p99 / 最大值 (单位与输入相同)
+
+    Args:
+        samples (list[float]): 样本
+    Returns:
+        dict[str, float | int]: 统计结果
+    """
+
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+    return {
+        "count": len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def bench_tx_throughput(robot: VirtualRobot, count: int) -> dict:
+    """
+    连续写入 count 条指令，统计下位机实际收到的速率
+
+    Args:
+        robot (VirtualRobot): 虚拟下位机
+        count (int): 指令条数
+    Returns:
+        dict: 指令/秒、字节/秒及链路占用率
+    """
+
+    command = "robot mode free;" # 不带合并键，每条都会真实写出
+    before_cmds = robot.stats["rx_commands"]
+    before_bytes = robot.stats["rx_bytes"]
+    before_tx = conn.get_tx_stats()
+
+    start = time.monotonic()
+    for _ in range(count):
+        conn.writeline(command)
+
+    # 等待下位机收完 (给足按波特率计算的时间)
+    deadline = start + 5.0 + count * 32 * 10 / robot.baudrate
+    while robot.stats["rx_commands"] - before_cmds < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    elapsed = time.monotonic() - start
+
+    received = robot.stats["rx_commands"] - before_cmds
+    nbytes = robot.stats["rx_bytes"] - before_bytes
+    after_tx = conn.get_tx_stats()
+    ceiling = robot.baudrate / 10
+
+    return {
+        "commands": received,
+        "seconds": round(elapsed, 4),
+        "commands_per_s": round(received / elapsed, 1),
+        "bytes_per_s": round(nbytes / elapsed, 1),
+        "link_ceiling_bytes_per_s": ceiling,
+        "link_utilization": round(nbytes / elapsed / ceiling, 3),
+        "writes": after_tx["writes"] - before_tx["writes"],
+    }
+
+
+def bench_round_trip(count: int) -> dict:
+    """
+    逐条查询，统计单次往返时延 (毫秒)
+
+    Args:
+        count (int): 查询次数
+    Returns:
+        dict: 时延分布
+    """
+
+    samples: list[float] = []
+    failures = 0
+    for _ in range(count):
+        start = time.monotonic()
+        reply = conn.query_blocking("gimbal attitude ?;")
+        if reply is None:
+            failures += 1
+            continue
+        samples.append((time.monotonic() - start) * 1000)
+
+    return {"rtt_ms": _percentiles(samples), "failures": failures}
+
+
+def bench_pipelined(batches: int, batch_size: int) -> dict:
+    """
+    批量查询，统计每批的耗时 (毫秒)
+
+    Args:
+        batches (int): 批数
+        batch_size (int): 每批的查询数
+    Returns:
+        dict: 每批耗时分布
+    """
+
+    samples: list[float] = []
+    failures = 0
+    commands = ["gimbal attitude ?;", "chassis position ?;"] * (batch_size // 2) + ["gimbal attitude ?;"] * (batch_size % 2)
+    for _ in range(batches):
+        start = time.monotonic()
+        replies = conn.query_many(commands)
+        failures += sum(1 for reply in replies if reply is None)
+        samples.append((time.monotonic() - start) * 1000)
+
+    return {"batch_size": batch_size, "batch_ms": _percentiles(samples), "failures": failures}
+
+
+def bench_rx_delivery(robot: VirtualRobot, duration: float, rate: float) -> dict:
+    """
+    让下位机高频推送 game msg，统计从数据到达 (接收线程时间戳) 到 readline 取出的延迟 (毫秒)
+
+    Args:
+        robot (VirtualRobot): 虚拟下位机
+        duration (float): 测试时长（秒）
+        rate (float): 推送频率（Hz）
+    Returns:
+        dict: 延迟分布
+    """
+
+    robot.game_msg_rate = rate
+    conn.writeline("game msg on;")
+    conn.clear_rx_queue()
+
+    samples: list[float] = []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        item = conn.readline_timestamped(timeout=0.5)
+        if item is None:
+            continue
+        arrived, line = item
+        if line.startswith("game msg push"):
+            samples.append((time.monotonic() - arrived) * 1000)
+
+    conn.writeline("game msg off;")
+    conn.flush_tx(1.0)
+    time.sleep(0.05)
+    conn.clear_rx_queue()
+
+    return {
+        "rate_hz": rate,
+        "lines_per_s": round(len(samples) / duration, 1),
+        "delivery_ms": _percentiles(samples),
+        "rx_queue": conn.get_rx_stats(),
+    }
+
+
+def bench_dataholder(ticks: int, lines_per_tick: int) -> dict:
+    """
+    每个周期注入固定数量的 game msg 数据后调用一次 DataHolder.fetch_and_process()，
+    比较最初与最后 10% 周期的单次耗时 (微秒)，验证单次开销不随累计数据量增长
+
+    Args:
+        ticks (int): 周期数
+        lines_per_tick (int): 每个周期注入的行数
+    Returns:
+        dict: 前后两段的耗时分布及比值
+    """
+
+    from .dataholder import DataHolder
+
+    holder = DataHolder()
+    holder.fetch_and_process() # 先取走遗留数据
+    processed_before = holder.lines_processed
+
+    # 关闭 DEBUG 日志 只测解析本身 (fetch_and_process 会为每一行输出 debug 日志)
+    framework = logger.get_logger().logger
+    level = framework.level
+    framework.setLevel(max(level, logging.INFO))
+
+    samples: list[float] = []
+    try:
+        for tick in range(ticks):
+            for i in range(lines_per_tick):
+                conn.inject_rx_line(f"game msg push [0, 6, 1, {i % 100}, {-i % 100}, {tick % 256}, 1, 119];")
+            start = time.perf_counter()
+            holder.fetch_and_process()
+            samples.append((time.perf_counter() - start) * 1e6)
+    finally:
+        framework.setLevel(level)
+
+    window = max(1, ticks // 10)
+    first = _percentiles(samples[:window])
+    last = _percentiles(samples[-window:])
+
+    return {
+        "ticks": ticks,
+        "lines_per_tick": lines_per_tick,
+        "lines_processed": holder.lines_processed - processed_before,
+        "first_tick_us": first,
+        "last_tick_us": last,
+        "last_to_first_p50": round(last["p50"] / first["p50"], 3) if first.get("p50") else None,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """
+    执行全部基准测试
+
+    Args:
+        args (argparse.Namespace): 命令行参数
+    Returns:
+        dict: 测试结果
+    """
+
+    robot = VirtualRobot(
+        baudrate = args.baud,
+        reply_latency = args.latency,
+        game_msg_rate = 0,
+        throttle = not args.no_throttle
+    )
+    port = robot.start()
+
+    try:
+        if not conn.open_serial(port, args.baud) or not conn.handshake_serial():
+            raise RuntimeError("无法连接虚拟下位机")
+        conn.writeline("command;")
+        conn.flush_tx(1.0)
+        time.sleep(0.05)
+        conn.clear_rx_queue()
+
+        return {
+            "config": {
+                "baudrate": args.baud,
+                "reply_latency_s": args.latency,
+                "throttle": not args.no_throttle,
+                "SERIAL_RX_READ_DELAY": config.SERIAL_RX_READ_DELAY,
+                "SERIAL_TX_BATCH_LIMIT": config.SERIAL_TX_BATCH_LIMIT,
+                "SERIAL_RX_QUEUE_SIZE": config.SERIAL_RX_QUEUE_SIZE,
+                "SERIAL_RX_QUEUE_POLICY": config.SERIAL_RX_QUEUE_POLICY,
+            },
+            "tx_throughput": bench_tx_throughput(robot, args.count),
+            "round_trip": bench_round_trip(args.rtt_count),
+            "pipelined": bench_pipelined(args.rtt_count // 10 or 1, 10),
+            "rx_delivery": bench_rx_delivery(robot, args.rx_seconds, args.rx_rate),
+            "dataholder": bench_dataholder(args.ticks, args.lines_per_tick),
+        }
+    finally:
+        conn.writeline("quit;")
+        conn.flush_tx(1.0)
+        conn.stop_rx_thread()
+        conn.stop_tx_thread()
+        if conn.serial_conn is not None:
+            conn.serial_conn.close()
+        robot.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="串口链路基准测试 (虚拟下位机)")
+    parser.add_argument("--baud", type=int, default=config.SERIAL_BAUDRATE, help="波特率")
+    parser.add_argument("--latency", type=float, default=0.0, help="下位机应答延迟（秒）")
+    parser.add_argument("--no-throttle", action="store_true", help="不按波特率限速 (测软件本身的上限)")
+    parser.add_argument("--count", type=int, default=2000, help="吞吐测试的指令条数")
+    parser.add_argument("--rtt-count", type=int, default=200, help="往返时延测试的查询次数")
+    parser.add_argument("--rx-seconds", type=float, default=3.0, help="接收延迟测试时长（秒）")
+    parser.add_argument("--rx-rate", type=float, default=100.0, help="接收延迟测试的推送频率（Hz）")
+    parser.add_argument("--ticks", type=int, default=2000, help="DataHolder 测试的周期数")
+    parser.add_argument("--lines-per-tick", type=int, default=5, help="DataHolder 测试每个周期注入的行数")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 的保存路径 (默认输出到标准输出，日志输出到标准错误)")
+    args = parser.parse_args()
+
+    # 日志改写到标准错误 标准输出只留给 JSON 结果，便于管道处理
+    for handler in logger.get_logger().logger.handlers:
+        if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+            handler.setStream(sys.stderr)
+
+    result = run(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"基准测试结果已保存到 {args.output}")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@
 # @date 25-12-6
 #
 
+from concurrent.futures import Future
+
 from . import conn
 
 def set_blaster_bead(num: int) -> None:
@@ -22,11 +24,13 @@ def set_blaster_bead(num: int) -> None:
     conn.writeline(f"blaster bead {num};")
 
 
-def blaster_fire() -> None:
+def blaster_fire() -> Future[bool]:
     """
     发射子弹
+    Returns:
+        Future[bool]: 写入完成后结果为是否写入成功 (串口未打开时为 False)
     """
-    conn.writeline("blaster fire;")
+    return conn.writeline_future("blaster fire;")
 
 
 __all__ = ["set_blaster_bead", "blaster_fire"]
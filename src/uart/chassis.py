@@ -5,9 +5,10 @@
 # @date 25-12-6
 #
 
-import time
-
+from src.cancellation import CancellationToken, OperationCancelled, sleep
 from . import conn
+from .framing import format_number as num
+from .reply import PUSH_FREQUENCIES, parse_numbers
 
 def set_chassis_speed_3d(
     speed_x: float,
@@ -31,7 +32,8 @@ def set_chassis_speed_3d(
     if not (speed_z >= -600 and speed_z <= 600):
         raise ValueError("speed_z must be between -600 and 600")
 
-    conn.writeline(f"chassis speed x {speed_x} y {speed_y} z {speed_z};")
+    # 速度设定值只保留最新一条 (latest-wins)
+    conn.writeline(f"chassis speed x {num(speed_x)} y {num(speed_y)} z {num(speed_z)};", coalesce_key="chassis speed")
 
 
 def set_chassis_wheel_speed(
@@ -54,7 +56,85 @@ def set_chassis_wheel_speed(
     if not all(-1000 <= w <= 1000 for w in [w1, w2, w3, w4]):
         raise ValueError("Wheel speeds must be between -1000 and 1000")
 
-    conn.writeline(f"chassis wheel w1 {w1} w2 {w2} w3 {w3} w4 {w4};")
+    conn.writeline(f"chassis wheel w1 {w1} w2 {w2} w3 {w3} w4 {w4};", coalesce_key="chassis wheel")
+
+
+def get_chassis_position(timeout: float | None = None) -> tuple[float, float, float] | None:
+    """
+    查询底盘相对上电位置的坐标
+    Args:
+        timeout (float | None): 超时时间，单位秒，None 表示使用 SERIAL_REPLY_TIMEOUT
+    Returns:
+        tuple[float, float, float] | None: (x (m), y (m), z (°))，超时或应答异常时返回 None
+    """
+
+    values = parse_numbers(conn.query_blocking("chassis position ?;", timeout), 3)
+    return None if values is None else (values[0], values[1], values[2])
+
+
+def get_chassis_attitude(timeout: float | None = None) -> tuple[float, float, float] | None:
+    """
+    查询底盘姿态
+    Args:
+        timeout (float | None): 超时时间，单位秒，None 表示使用 SERIAL_REPLY_TIMEOUT
+    Returns:
+        tuple[float, float, float] | None: (pitch, roll, yaw) 单位 °，超时或应答异常时返回 None
+    """
+
+    values = parse_numbers(conn.query_blocking("chassis attitude ?;", timeout), 3)
+    return None if values is None else (values[0], values[1], values[2])
+
+
+def chassis_push_on(
+    position_freq: int | None = None,
+    attitude_freq: int | None = None,
+    status_freq: int | None = None
+) -> None:
+    """
+    开启底盘推送 推送数据由 DataHolder 解析到 robot_state 的 chassis_* 字段
+    Args:
+        position_freq (int | None): 位置推送频率 (Hz)，None 表示不修改
+        attitude_freq (int | None): 姿态推送频率 (Hz)，None 表示不修改
+        status_freq   (int | None): 状态推送频率 (Hz)，None 表示不修改
+        频率可选 1, 5, 10, 20, 30, 50
+    Raises:
+        ValueError: 如果频率不是可选值或三者均为 None
+    """
+
+    parts = []
+    for name, key, freq in (
+        ("position", "pfreq", position_freq),
+        ("attitude", "afreq", attitude_freq),
+        ("status",   "sfreq", status_freq),
+    ):
+        if freq is None:
+            continue
+        if freq not in PUSH_FREQUENCIES:
+            raise ValueError(f"{name} frequency must be one of {PUSH_FREQUENCIES}")
+        parts.append(f"{name} on {key} {freq}")
+
+    if not parts:
+        raise ValueError("At least one of position_freq, attitude_freq or status_freq must be provided")
+
+    conn.writeline(f"chassis push {' '.join(parts)};")
+
+
+def chassis_push_off(
+    position: bool = True,
+    attitude: bool = True,
+    status: bool = True
+) -> None:
+    """
+    关闭底盘推送
+    Args:
+        position (bool): 是否关闭位置推送
+        attitude (bool): 是否关闭姿态推送
+        status   (bool): 是否关闭状态推送
+    """
+
+    parts = [f"{name} off" for name, off in (("position", position), ("attitude", attitude), ("status", status)) if off]
+    if parts:
+        conn.writeline(f"chassis push {' '.join(parts)};")
 
 
 def chassis_move(
@@ -63,7 +143,8 @@ def chassis_move(
     degree_z: int | None,
     speed_xy: float | None,
     speed_z: float | None,
-    delay: bool = False
+    delay: bool = False,
+    token: CancellationToken | None = None
 ) -> None:
     """
     控制底盘移动指定距离
@@ -74,8 +155,10 @@ def chassis_move(
         speed_xy   (float): XY平面移动速度，     范围(0, 3.5] (m/s)
         speed_z    (float): Z轴旋转速度，        范围(0, 600] (°/s)
         delay      (bool) : 是否等待移动完成，默认 False
+        token      (CancellationToken | None): 取消令牌，等待期间被取消时立即停车并抛出 OperationCancelled
     Raises:
         ValueError: 如果不在指定范围内
+        OperationCancelled: 等待期间被取消
     """
 
     if not (-5 <= distance_x <= 5):
@@ -89,13 +172,13 @@ def chassis_move(
     if speed_z and not (0 < speed_z <= 600):
         raise ValueError("speed_z must be between 0 and 600")
     
-    command = f"chassis move x {distance_x} y {distance_y}"
+    command = f"chassis move x {num(distance_x)} y {num(distance_y)}"
     if degree_z:
-        command += f" z {degree_z}"
+        command += f" z {num(degree_z)}"
     if speed_xy:
-        command += f" vxy {speed_xy}"
+        command += f" vxy {num(speed_xy)}"
     if speed_z:
-        command += f" vz {speed_z}"
+        command += f" vz {num(speed_z)}"
     command += ";"
 
     conn.writeline(command)
@@ -108,11 +191,19 @@ def chassis_move(
             wait_time = max(wait_time, dist / speed_xy)
         if speed_z and degree_z:
             wait_time = max(wait_time, abs(degree_z) / speed_z)
-        time.sleep(wait_time + 0.5)  # 多等0.5秒，确保完成
+        try:
+            sleep(wait_time + 0.5, token)  # 多等0.5秒，确保完成
+        except OperationCancelled:
+            set_chassis_speed_3d(0, 0, 0) # 速度指令会中止未完成的移动
+            raise
 
 
 __all__ = [
     "set_chassis_speed_3d",
     "set_chassis_wheel_speed",
+    "get_chassis_position",
+    "get_chassis_attitude",
+    "chassis_push_on",
+    "chassis_push_off",
     "chassis_move"
 ]
\ No newline at end of file
@@ -0,0 +1,325 @@
+# chassis_control.py
+# 底盘速度流式控制器
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# set_chassis_speed_3d() 发送的是一次性的速度指令: 技能线程在发出非零速度后崩溃 / 卡住，底盘就会一直跑下去。
+# 本模块以固定频率运行:
+#   - 任意线程都可以用 set_target() 更新目标速度
+#   - 输出速度受加速度 / 加加速度限制，平滑地逼近目标
+#   - 只有变化超过阈值时才发送，降低链路占用
+#   - 超过 CHASSIS_CTRL_TIMEOUT 没有新的目标速度则立即停车 (看门狗)
+#
+# 用法:
+#   controller = ChassisController()
+#   controller.start()
+#   while ...:
+#       controller.set_target(1.0, 0.0, 30.0)   # 需要持续刷新，否则会被看门狗停车
+#   controller.stop()
+#
+
+import math
+import time
+import threading
+from typing import Callable
+
+from src import config
+from src import logger
+from .chassis import set_chassis_speed_3d
+
+
+# 各轴的速度范围 (x, y: m/s, z: °/s)
+SPEED_LIMITS = (3.5, 3.5, 600.0)
+
+
+def _limit_axis(
+    velocity: float,
+    accel: float,
+    target: float,
+    dt: float,
+    max_accel: float,
+    max_jerk: float
+) -> tuple[float, float]:
+    """
+    单轴的加速度 / 加加速度限制
+
+    Returns:
+        tuple[float, float]: 新的 (速度, 加速度)
+    """
+
+    error = target - velocity
+    if error == 0:
+        return target, 0.0
+
+    # 按加加速度上限仍能在到达目标时把加速度降为 0 的最大加速度
+    desired = math.copysign(min(max_accel, math.sqrt(2 * max_jerk * abs(error))), error)
+    step = max_jerk * dt
+    accel += max(-step, min(step, desired - accel))
+
+    velocity += accel * dt
+    if (target - velocity) * error <= 0:
+        # 越过目标 直接停在目标上
+        return target, 0.0
+    return velocity, accel
+
+
+class ChassisController:
+    """
+    底盘速度控制器 单例类
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        send: Callable[[float, float, float], None] = set_chassis_speed_3d
+    ):
+        """
+        Args:
+            rate (float | None): 控制循环频率（Hz），None 表示使用 CHASSIS_CTRL_RATE
+            send (Callable[[float, float, float], None]): 发送 (x, y, z) 速度指令的函数
+        """
+
+        # 单例类 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
+        self.rate: float = rate or config.CHASSIS_CTRL_RATE
+        self._send = send
+
+        self._lock = threading.Lock()
+        self._target: tuple[float, float, float] = (0.0, 0.0, 0.0)
+        self._target_time: float = 0.0
+        self._stale: bool = True # 目标已过期 (已被看门狗停车)
+
+        self._velocity: list[float] = [0.0, 0.0, 0.0] # 当前输出速度
+        self._accel: list[float] = [0.0, 0.0, 0.0]    # 当前输出加速度
+        self._sent: tuple[float, float, float] = (0.0, 0.0, 0.0) # 最近一次发送的速度
+        self._sent_time: float = 0.0
+        self._confirmed: bool = True # 最近一次发送的速度已重发确认过
+
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        # 统计
+        self.ticks: int = 0
+        self.overruns: int = 0
+        self.commands: int = 0
+        self.timeouts: int = 0
+
+
+    # === 目标 ===
+
+    def set_target(self, x: float, y: float, z: float) -> None:
+        """
+        更新目标速度 需要在 CHASSIS_CTRL_TIMEOUT 内持续刷新
+
+        Args:
+            x (float): X轴速度，范围 -3.5 到 3.5 (m/s, x > 0 向前)
+            y (float): Y轴速度，范围 -3.5 到 3.5 (m/s, y < 0 向左)
+            z (float): Z轴速度，范围 -600 到 600 (°/s)
+        Raises:
+            ValueError: 如果速度不在指定范围内
+        """
+
+        for name, value, limit in zip("xyz", (x, y, z), SPEED_LIMITS):
+            if not (-limit <= value <= limit):
+                raise ValueError(f"speed_{name} must be between {-limit} and {limit}")
+
+        with self._lock:
+            self._target = (x, y, z)
+            self._target_time = time.monotonic()
+            self._stale = False
+
+
+    def halt(self) -> None:
+        """
+        把目标速度设为 0 (按加速度限制减速)
+        """
+        self.set_target(0.0, 0.0, 0.0)
+
+
+    @property
+    def target(self) -> tuple[float, float, float]:
+        """
+        当前的目标速度
+        """
+        return self._target
+
+
+    @property
+    def velocity(self) -> tuple[float, float, float]:
+        """
+        当前的输出速度
+        """
+        return (self._velocity[0], self._velocity[1], self._velocity[2])
+
+
+    # === 控制循环 ===
+
+    def _tick(self, now: float, dt: float) -> None:
+        """
+        执行一次控制
+        """
+
+        with self._lock:
+            target = self._target
+            expired = not self._stale and now - self._target_time > config.CHASSIS_CTRL_TIMEOUT
+            if expired:
+                self._target = target = (0.0, 0.0, 0.0)
+                self._stale = True
+
+        if expired:
+            # 看门狗 不经过加速度限制立即停车
+            self.timeouts += 1
+            logger.warning(f"底盘目标速度超过 {config.CHASSIS_CTRL_TIMEOUT} 秒未更新，已停车")
+            self._velocity = [0.0, 0.0, 0.0]
+            self._accel = [0.0, 0.0, 0.0]
+            self._output(now, force=True)
+            return
+
+        limits = (
+            (config.CHASSIS_CTRL_MAX_ACCEL_XY, config.CHASSIS_CTRL_MAX_JERK_XY),
+            (config.CHASSIS_CTRL_MAX_ACCEL_XY, config.CHASSIS_CTRL_MAX_JERK_XY),
+            (config.CHASSIS_CTRL_MAX_ACCEL_Z,  config.CHASSIS_CTRL_MAX_JERK_Z),
+        )
+        for i, (max_accel, max_jerk) in enumerate(limits):
+            self._velocity[i], self._accel[i] = _limit_axis(
+                self._velocity[i], self._accel[i], target[i], dt, max_accel, max_jerk
+            )
+
+        self._output(now)
+
+
+    def _output(self, now: float, force: bool = False) -> None:
+        """
+        按阈值决定是否发送当前输出速度
+        """
+
+        velocity = self.velocity
+        sent = self._sent
+        thresholds = (config.CHASSIS_CTRL_THRESHOLD_XY, config.CHASSIS_CTRL_THRESHOLD_XY, config.CHASSIS_CTRL_THRESHOLD_Z)
+
+        changed = any(abs(v - s) >= t for v, s, t in zip(velocity, sent, thresholds))
+        # 到达目标时即使变化小于阈值也要发送，保证最终速度 (尤其是 0) 准确
+        settled = velocity == self._target and velocity != sent
+        # 速度不变时定期重发 防止指令丢失；静止时只重发一次，以免打断 chassis_move 等指令
+        resend = now - self._sent_time >= config.CHASSIS_CTRL_RESEND and \
+                 (velocity != (0.0, 0.0, 0.0) or not self._confirmed)
+
+        if not (force or changed or settled or resend):
+            return
+
+        self._send(*velocity)
+        self.commands += 1
+        self._confirmed = velocity == sent
+        self._sent = velocity
+        self._sent_time = now
+
+
+    def _worker(self) -> None:
+        """
+        控制线程 按固定频率执行 _tick
+        """
+
+        period = 1.0 / self.rate
+        next_tick = time.monotonic()
+        last = next_tick
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            self.ticks += 1
+
+            try:
+                self._tick(now, now - last)
+            except Exception as e:
+                logger.error(f"底盘速度控制 出现异常: {e}")
+            last = now
+
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # 跟不上时不追赶 从当前时刻重新计时
+                self.overruns += 1
+                next_tick = time.monotonic()
+
+        # 退出时停车
+        self._velocity = [0.0, 0.0, 0.0]
+        self._accel = [0.0, 0.0, 0.0]
+        if self._sent != (0.0, 0.0, 0.0):
+            self._send(0.0, 0.0, 0.0)
+            self._sent = (0.0, 0.0, 0.0)
+
+
+    def start(self) -> None:
+        """
+        启动控制线程
+        """
+
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+
+    def stop(self, timeout: float | None = 1.0) -> None:
+        """
+        停止控制线程 并让底盘停车
+        """
+
+        if not self._thread:
+            return
+
+        with self._lock:
+            self._target = (0.0, 0.0, 0.0)
+            self._stale = True
+
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+    def get_stats(self) -> dict[str, int | tuple[float, float, float]]:
+        """
+        获取控制循环统计信息
+
+        Returns:
+            dict[str, int | tuple[float, float, float]]:
+                ticks: 已执行的周期数
+                overruns: 超时的周期数
+                commands: 发送的速度指令数
+                timeouts: 看门狗停车次数
+                target / velocity: 当前的目标速度 / 输出速度
+        """
+
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "commands": self.commands,
+            "timeouts": self.timeouts,
+            "target": self.target,
+            "velocity": self.velocity,
+        }
+
+
+    # === 单例类机制 ===
+    # 单例类设计
+    _instance: 'ChassisController | None' = None
+    _instance_lock = threading.Lock() # 线程锁 防止多个线程同时访问该类造成问题
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = super(ChassisController, cls).__new__(cls)
+        return cls._instance
+
+
+__all__ = [
+    "ChassisController",
+]
@@ -6,118 +6,645 @@
 #
 
 import os
+import math
 import time
 import queue
+import itertools
 import threading
+from concurrent.futures import Future
 import serial as s
 
 from src import config
 from src import logger
+from .framing import LineAssembler, encode_command, wire_time
+from .reply import ReplyTracker, is_push_line
+from .rxbuffer import RxBuffer
+from .recorder import DIRECTION_RX, DIRECTION_TX, TrafficRecorder
 
 # 串口连接对象
 serial_conn: s.Serial | None = None
 # 串口连接锁
-# serial_access_lock = threading.Lock()
+# serial_access_lock = threading.Lock() # 已由发送线程取代：只有发送线程会调用 serial_conn.write()
 
-# 接收队列
-rx_queue: queue.Queue[str] = queue.Queue() 
+# 发送优先级 (数值越小越先发送)
+TX_PRIORITY_SAFETY = 0 # 安全指令 (退出 / 停止)，会插队并作废尚未发送的运动指令 (归零指令只作废同一设备的)
+TX_PRIORITY_NORMAL = 1 # 普通指令
+TX_PRIORITY_MOTION = 2 # 运动指令 (云台 / 底盘的大量设定值)
+_TX_PRIORITY_FLUSH = 3 # 内部使用：flush_tx() 的标记
+
+# 安全指令前缀 (作废所有设备尚未发送的运动指令)
+_SAFETY_PREFIXES = ("quit", "gimbal suspend")
+# 运动指令前缀
+_MOTION_PREFIXES = ("chassis speed", "chassis wheel", "chassis move", "gimbal speed", "gimbal move")
+# 速度类指令前缀 (速度全为 0 时视为停止指令)
+_SPEED_PREFIXES = ("chassis speed", "chassis wheel", "gimbal speed")
+
+
+class _TxItem:
+    """
+    发送队列中的单条指令
+    """
+
+    __slots__ = ("payload", "priority", "future", "key", "reply", "cancelled")
+
+    def __init__(
+        self,
+        payload: bytes,
+        priority: int,
+        future: Future[bool] | None,
+        key: str | None,
+        reply: Future[str] | None = None
+    ):
+        self.payload: bytes = payload
+        self.priority: int = priority
+        self.future: Future[bool] | None = future
+        self.key: str | None = key # 合并键 同一合并键只保留最新一条待发送指令
+        self.reply: Future[str] | None = reply # 应答 Future (仅 query() 使用)
+        self.cancelled: bool = False
+
+
+# 发送队列 元素为 (优先级, 入队序号, 指令)
+_tx_queue: queue.PriorityQueue[tuple[int, int, _TxItem]] = queue.PriorityQueue()
+# 入队序号 保证同一优先级内先进先出
+_tx_seq = itertools.count()
+# 发送线程
+_tx_thread: threading.Thread | None = None
+# 发送线程运行标志
+_tx_stop: threading.Event = threading.Event()
+# 发送线程启动锁
+_tx_start_lock = threading.Lock()
+# 合并锁 保护下面两个表以及队列中指令的 payload / future / cancelled
+_tx_lock = threading.Lock()
+# 合并键 -> 尚未发送的指令
+_tx_pending_by_key: dict[str, _TxItem] = {}
+# 合并键 -> (最近一次写入的指令, 写入时间)
+_tx_last_sent: dict[str, tuple[bytes, float]] = {}
+# 应答关联器 由发送线程按写入顺序登记，由接收线程按到达顺序消费
+_replies = ReplyTracker(timeout=config.SERIAL_REPLY_TIMEOUT)
+# 发送统计
+_tx_stats: dict[str, int] = {
+    "commands": 0,  # 已写入的指令数
+    "bytes": 0,     # 已写入的字节数
+    "writes": 0,    # write() 调用次数 (批量合并后)
+    "cancelled": 0, # 被安全指令作废的运动指令数
+    "coalesced": 0, # 被同一合并键的新指令顶替掉的指令数
+    "suppressed": 0, # 去重时间窗内与上次写入完全相同而被省略的指令数
+    "throttled": 0, # 因链路预算不足而等待的次数
+}
+
+# 串口实际打开的波特率 (链路预算按此计算)
+_link_baudrate: int = config.SERIAL_BAUDRATE
+
+# 链路调度状态 (仅发送线程写入)
+# 已写出的字节预计在该时刻 (time.monotonic()) 之前传完
+_link_free_at: float = 0.0
+# 链路占用率的指数滑动平均 及其最后更新时间
+_link_occupancy: float = 0.0
+_link_occupancy_at: float = 0.0
+# 占用率滑动平均的时间常数（秒）
+_LINK_OCCUPANCY_TAU = 1.0
+
+
+# 接收队列 元素为 (到达时间 time.monotonic(), 行数据)
+# 有界环形缓冲，消费者应使用 drain_rx() 取走数据，否则缓冲满后按溢出策略丢弃
+rx_queue: RxBuffer = RxBuffer(config.SERIAL_RX_QUEUE_SIZE, config.SERIAL_RX_QUEUE_POLICY)
 # 接收线程
 _rx_thread: threading.Thread | None = None
 # 接收线程运行标志
 _rx_stop: threading.Event = threading.Event()
 
+# 流量录制器 (None 表示不录制)
+_recorder: TrafficRecorder | None = None
 
-def open_serial() -> bool:
+
+def open_serial(port: str | None = None, baudrate: int | None = None) -> bool:
     """
     打开串口对象
 
+    Args:
+        port (str | None): 串口设备路径，None 表示使用 config.SERIAL_PORT
+        baudrate (int | None): 波特率，None 表示使用 config.SERIAL_BAUDRATE
     Returns:
         bool: 是否成功打开
     """
 
-    os.system(f"sudo chmod 777 {config.SERIAL_PORT}") # 修改串口权限
+    if port is None:
+        port = config.SERIAL_PORT
+    if baudrate is None:
+        baudrate = config.SERIAL_BAUDRATE
 
-    global serial_conn
+    if port == config.SERIAL_PORT:
+        os.system(f"sudo chmod 777 {port}") # 修改串口权限
+
+    global serial_conn, _link_baudrate
     try:
 
+        # 指定 port 时构造函数会直接打开串口，无需再调用 open()
         serial_conn = s.Serial(
-            port = config.SERIAL_PORT,
-            baudrate = config.SERIAL_BAUDRATE,
+            port = port,
+            baudrate = baudrate,
             timeout = config.SERIAL_TIMEOUT,
             bytesize = config.SERIAL_BYTESIZE,
             parity = config.SERIAL_PARITY,
             stopbits = config.SERIAL_STOPBITS
         )
 
-        serial_conn.open()
-
-        if serial_conn.is_open:
-            return True
+        _link_baudrate = baudrate
+        return serial_conn.is_open
 
     except Exception as e:
         serial_conn = None
         logger.error(f"打开串口 出现异常: {e}")
-
-    finally:
         return False
 
 
-def writeline(data: str) -> bool:
+def _classify_priority(data: str) -> int:
+    """
+    根据指令内容推断发送优先级
+
+    Args:
+        data (str): 指令字符串
+    Returns:
+        int: 发送优先级
+    """
+
+    command = data.strip()
+
+    if command.startswith(_SAFETY_PREFIXES):
+        return TX_PRIORITY_SAFETY
+
+    if command.startswith(_MOTION_PREFIXES):
+        # 速度全部归零 = 停车，按安全指令处理
+        if command.startswith(_SPEED_PREFIXES):
+            try:
+                if all(float(v) == 0 for v in command.rstrip(";").split()[3::2]):
+                    return TX_PRIORITY_SAFETY
+            except ValueError:
+                pass
+        return TX_PRIORITY_MOTION
+
+    return TX_PRIORITY_NORMAL
+
+
+def _safety_scope(payload: bytes) -> bytes | None:
+    """
+    安全指令作废运动指令的范围
+
+    Args:
+        payload (bytes): 已编码的安全指令
+    Returns:
+        bytes | None: 只作废该设备 (指令的第一个词，如 b"gimbal") 的运动指令；None 表示作废所有设备的
+    """
+
+    if payload.startswith(tuple(prefix.encode("utf-8") for prefix in _SAFETY_PREFIXES)):
+        return None
+    # 归零指令只代表该设备停止，不影响其他设备的运动
+    return payload.split(b" ", 1)[0]
+
+
+def _enqueue(
+    payload: bytes,
+    priority: int,
+    future: Future[bool] | None,
+    key: str | None = None,
+    reply: Future[str] | None = None
+) -> None:
+    """
+    将已编码的指令放入发送队列
+
+    Args:
+        payload (bytes): 已编码的指令
+        priority (int): 发送优先级
+        future (Future[bool] | None): 写入完成后回填结果的 Future
+        key (str | None): 合并键 同一合并键下只保留最新的一条待发送指令
+        reply (Future[str] | None): 收到应答后回填应答内容的 Future
+    """
+
+    start_tx_thread()
+
+    with _tx_lock:
+        if key is not None:
+            pending = _tx_pending_by_key.get(key)
+            if pending is not None and not pending.cancelled:
+                if pending.priority == priority:
+                    # 新值直接顶替旧值 并沿用旧值在队列中的位置
+                    pending.payload, old_future, pending.future = payload, pending.future, future
+                    _tx_stats["coalesced"] += 1
+                    if old_future is not None:
+                        old_future.cancel()
+                    return
+
+                # 优先级不同 (例如归零指令) 时作废旧值 重新入队
+                pending.cancelled = True
+                _tx_stats["coalesced"] += 1
+                if pending.future is not None:
+                    pending.future.cancel()
+
+            last = _tx_last_sent.get(key)
+            if last is not None and last[0] == payload and \
+               time.monotonic() - last[1] < config.SERIAL_TX_DEDUP_WINDOW:
+                # 与上次写入完全相同 省略
+                _tx_stats["suppressed"] += 1
+                if future is not None:
+                    future.set_result(True)
+                return
+
+        if priority == TX_PRIORITY_SAFETY:
+            # 安全指令插队后，排在它后面的 (同一设备的) 运动指令已经过时，直接作废
+            scope = _safety_scope(payload)
+            with _tx_queue.mutex:
+                for _, _, item in _tx_queue.queue:
+                    if item.priority == TX_PRIORITY_MOTION and not item.cancelled and \
+                       (scope is None or item.payload.split(b" ", 1)[0] == scope):
+                        item.cancelled = True
+                        _tx_stats["cancelled"] += 1
+                        if item.future is not None:
+                            item.future.cancel()
+                        if item.reply is not None:
+                            item.reply.cancel()
+
+        item = _TxItem(payload, priority, future, key, reply)
+        if key is not None:
+            _tx_pending_by_key[key] = item
+        _tx_queue.put((priority, next(_tx_seq), item))
+
+
+def writeline(
+    data: str,
+    priority: int | None = None,
+    coalesce_key: str | None = None
+) -> bool:
     """
-    向串口写入字符串
+    向串口写入字符串 (非阻塞，由发送线程实际写入)
 
     Args:
         data (str): 要写入的字符串
+        priority (int | None): 发送优先级 (TX_PRIORITY_*)，None 表示根据指令内容自动推断
+        coalesce_key (str | None): 合并键 同一合并键下只保留最新的一条待发送指令，
+            并在 SERIAL_TX_DEDUP_WINDOW 内省略与上次写入完全相同的指令。None 表示不合并
     Returns:
-        bool: 是否写入成功
+        bool: 是否成功放入发送队列 (串口未打开时返回 False)
     """
 
     global serial_conn
     if serial_conn is None or not serial_conn.is_open:
         return False
-    
+
+    if priority is None:
+        priority = _classify_priority(data)
+
+    _enqueue(encode_command(data), priority, None, coalesce_key)
+    return True
+
+
+def writeline_future(
+    data: str,
+    priority: int | None = None,
+    coalesce_key: str | None = None
+) -> Future[bool]:
+    """
+    向串口写入字符串 (非阻塞)，并返回写入完成时回填结果的 Future
+
+    Args:
+        data (str): 要写入的字符串
+        priority (int | None): 发送优先级 (TX_PRIORITY_*)，None 表示根据指令内容自动推断
+        coalesce_key (str | None): 合并键，见 writeline()
+    Returns:
+        Future[bool]: 写入完成后结果为是否写入成功；被安全指令作废或被新值顶替时为 cancelled 状态
+    """
+
+    future: Future[bool] = Future()
+
+    global serial_conn
+    if serial_conn is None or not serial_conn.is_open:
+        future.set_result(False)
+        return future
+
+    if priority is None:
+        priority = _classify_priority(data)
+
+    _enqueue(encode_command(data), priority, future, coalesce_key)
+    return future
+
+
+def flush_tx(timeout: float | None = None) -> bool:
+    """
+    等待发送队列中已有的指令全部写入串口
+
+    Args:
+        timeout (float | None): 超时时间，单位秒，None表示无限等待
+    Returns:
+        bool: 是否在超时前全部写入
+    """
+
+    if _tx_thread is None or not _tx_thread.is_alive():
+        return _tx_queue.empty()
+
+    marker: Future[bool] = Future()
+    _enqueue(b"", _TX_PRIORITY_FLUSH, marker)
+
     try:
-        serial_conn.write(f"{data};{config.SERIAL_EOL}".encode("utf-8"))
-        serial_conn.flush() # 刷新缓冲区确保写入
+        marker.result(timeout=timeout)
         return True
-    except Exception as e:
-        logger.error(f"写入串口 出现异常: {e}")
+    except Exception:
         return False
 
 
+def query(data: str, priority: int | None = None) -> Future[str]:
+    """
+    发送一条指令 并返回由其应答回填的 Future (非阻塞)
+
+    多次调用可以同时在途，应答按写入顺序依次对应，
+    因此一批查询只需要一次往返时间。
+
+    Args:
+        data (str): 指令字符串，如 "gimbal attitude ?;"
+        priority (int | None): 发送优先级 (TX_PRIORITY_*)，None 表示根据指令内容自动推断
+    Returns:
+        Future[str]: 结果为应答内容 (如 "ok;" / "fail;" / "-0.5 12.3;")；
+            串口未打开或写入失败时为 ConnectionError，超过 SERIAL_REPLY_TIMEOUT 未应答时为 TimeoutError
+    """
+
+    reply: Future[str] = Future()
+
+    global serial_conn
+    if serial_conn is None or not serial_conn.is_open:
+        reply.set_exception(ConnectionError("串口未打开"))
+        return reply
+
+    if priority is None:
+        priority = _classify_priority(data)
+
+    _enqueue(encode_command(data), priority, None, None, reply)
+    return reply
+
+
+def query_blocking(data: str, timeout: float | None = None) -> str | None:
+    """
+    发送一条指令 并等待其应答
+
+    Args:
+        data (str): 指令字符串
+        timeout (float | None): 超时时间，单位秒，None 表示使用 SERIAL_REPLY_TIMEOUT
+    Returns:
+        str: 应答内容
+        None: 超时或发送失败
+    """
+    return query_many([data], timeout)[0]
+
+
+def query_many(commands: list[str], timeout: float | None = None) -> list[str | None]:
+    """
+    一次性发出多条指令 再统一等待应答 (流水线)
+
+    Args:
+        commands (list[str]): 指令字符串列表
+        timeout (float | None): 整批的超时时间，单位秒，None 表示使用 SERIAL_REPLY_TIMEOUT
+    Returns:
+        list[str | None]: 与 commands 一一对应的应答内容，超时或发送失败的位置为 None
+    """
+
+    if timeout is None:
+        timeout = config.SERIAL_REPLY_TIMEOUT
+
+    futures = [query(command) for command in commands]
+    deadline = time.monotonic() + timeout
+
+    replies: list[str | None] = []
+    for future in futures:
+        try:
+            replies.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+        except Exception:
+            future.cancel() # 迟到的应答仍会被这条记录消费，保持后续对齐
+            replies.append(None)
+    return replies
+
+
+def _link_budget_wait() -> float:
+    """
+    计算按链路预算还需等待多久才能继续写入
+
+    USB 转串口芯片自带缓冲，flush() 返回时数据往往还没传完。
+    这里按波特率估算已写出字节的传输进度，只允许少量积压，
+    其余指令留在发送队列中，才能被合并 (latest-wins) 或被安全指令作废。
+
+    Returns:
+        float: 需等待的时间（秒），0 表示可以立即写入
+    """
+
+    backlog = _link_free_at - time.monotonic()
+    return max(0.0, backlog - config.SERIAL_TX_MAX_BACKLOG)
+
+
+def _account_link(nbytes: int) -> None:
+    """
+    记录一次写入对链路的占用 (仅发送线程调用)
+
+    Args:
+        nbytes (int): 写入的字节数
+    """
+
+    global _link_free_at, _link_occupancy, _link_occupancy_at
+
+    now = time.monotonic()
+    # 按预算比例折算：只用 SERIAL_TX_LINK_BUDGET 的带宽，给下位机应答留出余量
+    wire = wire_time(nbytes, _link_baudrate)
+    busy = wire / config.SERIAL_TX_LINK_BUDGET
+    _link_free_at = max(now, _link_free_at) + busy
+
+    decay = math.exp(-(now - _link_occupancy_at) / _LINK_OCCUPANCY_TAU)
+    _link_occupancy = _link_occupancy * decay + wire / _LINK_OCCUPANCY_TAU
+    _link_occupancy_at = now
+
+
+def _tx_worker() -> None:
+    """
+    发送线程 循环函数
+    按优先级取出指令，按链路预算节流，把同时待发送的多条指令合并为一次 write()
+    """
+
+    global serial_conn
+
+    while not _tx_stop.is_set():
+        # 链路预算用完时先等待，期间新指令仍可在队列中合并
+        wait = _link_budget_wait()
+        if wait > 0:
+            _tx_stats["throttled"] += 1
+            _tx_stop.wait(wait)
+            continue
+
+        try:
+            _, _, item = _tx_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        # 合并当前所有待发送的指令
+        batch = [item]
+        size = len(item.payload)
+        while size < config.SERIAL_TX_BATCH_LIMIT:
+            try:
+                _, _, item = _tx_queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item.payload)
+
+        # 取出的指令不再接受合并 在锁内读取最终的 payload / future
+        with _tx_lock:
+            batch = [item for item in batch if not item.cancelled]
+            for item in batch:
+                if item.key is not None and _tx_pending_by_key.get(item.key) is item:
+                    del _tx_pending_by_key[item.key]
+            sending = [(item.payload, item.future, item.key) for item in batch]
+
+        payload = b"".join(p for p, _, _ in sending)
+
+        # 写入前按顺序登记应答 (应答可能在 write() 返回前就已到达)
+        registered = 0
+        for item in batch:
+            if item.payload and _replies.on_sent(item.payload, item.reply):
+                registered += 1
+
+        ok = True
+        if payload:
+            port = serial_conn
+            try:
+                if port is None or not port.is_open:
+                    raise s.SerialException("串口未打开")
+                port.write(payload)
+                port.flush() # 刷新缓冲区确保写入
+                _account_link(len(payload))
+                _tx_stats["writes"] += 1
+                _tx_stats["bytes"] += len(payload)
+                _tx_stats["commands"] += sum(1 for p, _, _ in sending if p)
+            except Exception as e:
+                logger.error(f"写入串口 出现异常: {e}")
+                _replies.forget_last(registered)
+                ok = False
+
+        if ok and payload:
+            now = time.monotonic()
+
+            recorder = _recorder
+            if recorder is not None:
+                for p, _, _ in sending:
+                    if p:
+                        recorder.record(DIRECTION_TX, now, p.decode("utf-8", errors="replace").rstrip())
+
+            with _tx_lock:
+                for p, _, key in sending:
+                    if key is not None:
+                        _tx_last_sent[key] = (p, now)
+                    elif p:
+                        # 同一设备的其他指令 (如 chassis move) 会改变设备状态，去重记录作废
+                        device = p.split(b" ", 1)[0].decode("utf-8", errors="replace")
+                        for k in [k for k in _tx_last_sent if k.split(" ", 1)[0] == device]:
+                            del _tx_last_sent[k]
+
+        for _, future, _ in sending:
+            if future is not None and not future.done():
+                future.set_result(ok)
+
+
+def start_tx_thread() -> None:
+    """
+    启动串口发送线程 (writeline 会自动调用)
+    """
+
+    global _tx_thread, _tx_stop
+
+    if _tx_thread and _tx_thread.is_alive():
+        return
+
+    with _tx_start_lock:
+        if _tx_thread and _tx_thread.is_alive():
+            return
+
+        _tx_stop.clear()
+        _tx_thread = threading.Thread(target=_tx_worker, daemon=True)
+        _tx_thread.start()
+
+
+def stop_tx_thread(timeout: float | None = 1.0) -> None:
+    """
+    停止串口发送线程 (会先尝试发送完队列中已有的指令)
+
+    Args:
+        timeout (float | None): 等待队列发送完毕的超时时间，单位秒
+    """
+
+    global _tx_thread, _tx_stop
+
+    if not _tx_thread:
+        return
+
+    flush_tx(timeout)
+    _tx_stop.set()
+    _tx_thread.join()
+    _tx_thread = None
+
+
+def get_tx_stats() -> dict[str, int | float]:
+    """
+    获取发送统计信息
+
+    Returns:
+        dict[str, int | float]: 统计信息副本，另含
+            queued: 发送队列中的指令数
+            link_occupancy: 最近约 1 秒内链路被占用的比例 [0, 1]
+            link_backlog_ms: 已写出但预计尚未传完的数据量 (毫秒)
+    """
+
+    now = time.monotonic()
+    stats: dict[str, int | float] = dict(_tx_stats)
+    stats["queued"] = _tx_queue.qsize()
+    stats["link_occupancy"] = round(_link_occupancy * math.exp(-(now - _link_occupancy_at) / _LINK_OCCUPANCY_TAU), 3)
+    stats["link_backlog_ms"] = round(max(0.0, _link_free_at - now) * 1000, 2)
+    return stats
+
+
 def _rx_worker() -> None:
     """
     接收线程 循环函数
+    阻塞在串口上等待数据，由 LineAssembler 拼出完整行后连同到达时间放入队列
     """
 
     global serial_conn, rx_queue
 
     # 等待连接成功
-    while not serial_conn or not serial_conn.is_open:
+    while not _rx_stop.is_set() and (not serial_conn or not serial_conn.is_open):
         time.sleep(0.5)
-    
+
+    assembler = LineAssembler(
+        eol = config.SERIAL_EOL.encode("utf-8"),
+        max_buffer = config.SERIAL_RX_BUFFER_LIMIT
+    )
+
     while not _rx_stop.is_set():
+        port = serial_conn
+        if port is None:
+            break
+
         try:
-            # 获取当前缓冲区有多少字节
-            n = serial_conn.in_waiting
-            if n <= 0:
+            # 阻塞直到至少有 1 字节到达 (最长 SERIAL_TIMEOUT 秒)，同时取走缓冲区中已有的全部字节
+            chunk = port.read(max(1, port.in_waiting))
+            if not chunk:
                 continue
-        
-            # 读取出来
-            data = serial_conn.read(n).decode("utf-8")
-            # 按行分割
-            lines = data.split(config.SERIAL_EOL)
-            # 将处理后的有效数据放入队列
-            for line in lines:
-                line = line.strip()
-                if line:
-                    rx_queue.put(line)
+
+            arrived = time.monotonic()
+            recorder = _recorder
+            for line in assembler.feed(chunk):
+                if recorder is not None:
+                    recorder.record(DIRECTION_RX, arrived, line)
+                # 属于某个 query() 的应答直接交给请求方，其余数据照常入队
+                if is_push_line(line) or not _replies.on_line(line):
+                    rx_queue.put((arrived, line))
 
         except Exception as e:
+            if _rx_stop.is_set():
+                break
             logger.error(f"接收串口数据 出现异常: {e}")
-
-        finally:
-            time.sleep(config.SERIAL_RX_READ_DELAY)
+            time.sleep(config.SERIAL_RX_READ_DELAY) # 避免异常时空转
 
 
 def start_rx_thread() -> None:
@@ -146,6 +673,14 @@ def stop_rx_thread() -> None:
         return
     
     _rx_stop.set()
+
+    # 打断正在阻塞的 read()，否则最多要等 SERIAL_TIMEOUT 秒
+    if serial_conn is not None:
+        try:
+            serial_conn.cancel_read()
+        except Exception:
+            pass
+
     _rx_thread.join()
     _rx_thread = None
 
@@ -161,11 +696,8 @@ def readline() -> str | None:
 
     global rx_queue
 
-    try:
-        data = rx_queue.get_nowait()
-        return data
-    except queue.Empty:
-        return None
+    item = rx_queue.get(timeout=0)
+    return None if item is None else item[1]
 
 
 def readline_blocking(timeout: float | None = None) -> str | None:
@@ -182,16 +714,72 @@ def readline_blocking(timeout: float | None = None) -> str | None:
 
     global rx_queue
 
-    try:
-        data = rx_queue.get(timeout=timeout)
-        return data
-    except queue.Empty:
-        return None
+    item = rx_queue.get(timeout=timeout)
+    return None if item is None else item[1]
+
+
+def readline_timestamped(timeout: float | None = 0) -> tuple[float, str] | None:
+    """
+    从串口读取数据 并附带该行的到达时间
+
+    Args:
+        timeout (float | None): 超时时间，单位秒，0 表示不等待，None 表示无限等待
+
+    Returns:
+        tuple[float, str]: (到达时间 time.monotonic(), 数据)
+        None: 无数据可读
+    """
+
+    global rx_queue
+
+    return rx_queue.get(timeout=timeout)
+
+
+def inject_rx_line(
+    line: str,
+    arrived: float | None = None,
+    block: bool = False,
+    timeout: float | None = None
+) -> bool:
+    """
+    把一行数据当作刚从串口收到的数据放入接收队列 (回放 / 测试用)
+
+    Args:
+        line (str): 单行数据
+        arrived (float | None): 到达时间 time.monotonic()，None 表示当前时间
+        block (bool): 队列满时是否等待消费者腾出空间，False 表示按 SERIAL_RX_QUEUE_POLICY 处理
+        timeout (float | None): block 为 True 时的最长等待时间，单位秒，None 表示无限等待
+    Returns:
+        bool: 该行是否已放入队列
+    """
+
+    global rx_queue
+
+    item = (time.monotonic() if arrived is None else arrived, line)
+    if block:
+        return rx_queue.put_wait(item, timeout)
+    return rx_queue.put(item)
+
+
+def drain_rx(timeout: float | None = 0) -> list[tuple[float, str]]:
+    """
+    取走串口接收队列中所有数据 (每行只会被取到一次)
+
+    Args:
+        timeout (float | None): 队列为空时最长等待时间，单位秒，0 表示不等待，None 表示无限等待
+
+    Returns:
+        list[tuple[float, str]]: (到达时间 time.monotonic(), 数据) 列表，按到达顺序排列
+    """
+
+    global rx_queue
+
+    return rx_queue.drain(timeout)
 
 
 def readall() -> list[str]:
     """
-    读取串口接收队列中所有数据
+    读取串口接收队列中所有数据 (不取走)
 
     Returns:
         list[str]: 获取到的数据列表
@@ -199,7 +787,7 @@ def readall() -> list[str]:
 
     global rx_queue
 
-    return list(rx_queue.queue) # 直接访问队列底层
+    return [line for _, line in rx_queue.snapshot()]
 
 
 def readall_blocking(delay: float) -> list[str]:
@@ -215,7 +803,7 @@ def readall_blocking(delay: float) -> list[str]:
     global rx_queue
 
     time.sleep(delay)
-    return list(rx_queue.queue) # 直接访问队列底层
+    return [line for _, line in rx_queue.snapshot()]
 
 
 def clear_rx_queue() -> None:
@@ -225,14 +813,70 @@ def clear_rx_queue() -> None:
 
     global rx_queue
 
-    with rx_queue.mutex:
-        rx_queue.queue.clear()
+    rx_queue.clear()
 
 
-def handshake_serial() -> bool:
+def get_rx_stats() -> dict[str, int | str]:
     """
-    检测串口连接是否可用
+    获取接收队列统计信息
 
+    Returns:
+        dict[str, int | str]:
+            depth: 当前缓存的行数
+            capacity: 容量
+            high_water: 历史最大深度
+            dropped: 因溢出丢弃的行数
+            total: 累计收到的行数
+            policy: 溢出策略
+    """
+
+    global rx_queue
+
+    return rx_queue.stats()
+
+
+def start_recording(path: str) -> bool:
+    """
+    开始把收发的每一行数据录制到文件 (追加写入)
+
+    Args:
+        path (str): 录制文件路径，支持 time.strftime 格式，如 "serial_%y%m%d_%H%M%S.bin"
+    Returns:
+        bool: 是否成功开始录制
+    """
+
+    global _recorder
+
+    stop_recording()
+
+    recorder = TrafficRecorder(time.strftime(path))
+    if not recorder.start():
+        return False
+
+    _recorder = recorder
+    logger.info(f"串口流量录制中: {recorder.path}")
+    return True
+
+
+def stop_recording() -> None:
+    """
+    停止录制并写完剩余数据
+    """
+
+    global _recorder
+
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.stop()
+        logger.info(f"串口流量录制结束: {recorder.records} 条记录")
+
+
+def handshake_serial(timeout: float = 5.0) -> bool:
+    """
+    检测串口连接是否可用 (会自动启动接收线程)
+
+    Args:
+        timeout (float): 等待应答的超时时间，单位秒
     Returns:
         bool: 是否连接成功
     """
@@ -240,21 +884,29 @@ def handshake_serial() -> bool:
     global serial_conn
     if serial_conn is None or not serial_conn.is_open:
         return False
-    
+
+    start_rx_thread()
+
+    _replies.reset() # 丢弃旧会话遗留的应答记录
     writeline("quit;") # 先退出当前可能的会话
     time.sleep(0.1)
     writeline("command;") # 启动会话
 
-    result = readall_blocking(5.0)
-    if len(result) == 0:
-        logger.error("启动会话5秒内无应答")
+    # 检查应答内容 找到 "ok;" 或 "Already in SDK mode;" 则表示成功
+    result: list[str] = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = readall()
+        if any(line.startswith(("ok;", "Already in SDK mode;")) for line in result):
+            break
+        time.sleep(0.05)
+    else:
+        if len(result) == 0:
+            logger.error(f"启动会话{timeout}秒内无应答")
+        else:
+            logger.error(f"启动会话应答异常 应答内容[{result}]")
         return False
 
-    # 检查应答内容 如果找不到"ok;"则表示失败
-    if "ok;" in result:
-        logger.error(f"启动会话应答异常 应答内容[{result}]")
-        return False
-    
     writeline("quit;") # 退出会话 **消除副作用**
     time.sleep(0.1)
     
@@ -264,13 +916,32 @@ def handshake_serial() -> bool:
 __all__ = [
     "open_serial",
     "writeline",
+    "writeline_future",
+    "flush_tx",
+    "start_tx_thread",
+    "stop_tx_thread",
+    "get_tx_stats",
+    "query",
+    "query_blocking",
+    "query_many",
     "readline",
     "readline_blocking",
+    "readline_timestamped",
+    "inject_rx_line",
+    "drain_rx",
     "readall",
     "readall_blocking",
+    "clear_rx_queue",
+    "get_rx_stats",
     "handshake_serial",
+    "start_recording",
+    "stop_recording",
     "start_rx_thread",
     "stop_rx_thread",
 
     "rx_queue",
+
+    "TX_PRIORITY_SAFETY",
+    "TX_PRIORITY_NORMAL",
+    "TX_PRIORITY_MOTION",
 ]
\ No newline at end of file
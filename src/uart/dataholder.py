@@ -5,11 +5,24 @@
 # @date 25-12-6
 #
 
+import time
 import threading
 from queue import Queue
 from dataclasses import dataclass
+from typing import Callable
 
 from . import conn
+from .events import EventBus, EventType, KeyEvent
+from .history import GameDataHistory
+from .state_history import StateHistory
+from .state import (
+    StateStore,
+    RobotState,
+    GimbalAttitude,
+    ChassisPosition,
+    ChassisAttitude,
+    ChassisStatus,
+)
 from src import logger
 
 
@@ -28,6 +41,66 @@ class GameData:
     key_num:     int       # 识别到的 键盘按下的按键数量 [0, 3]
     keys:        list[int] # 识别到的 键盘按下的按键 ord 值列表
 
+
+def parse_game_msg(line: str) -> GameData | None:
+    """
+    解析赛事数据
+    eg: game msg push [0, 6, 1, 0, 0, 255, 1, 199];
+
+    Args:
+        line (str): 单行数据
+    Returns:
+        GameData | None: 解析结果，格式不符时返回 None
+    """
+
+    try:
+        # 只切一次方括号之间的内容，int() 本身会忽略两侧空白
+        data = list(map(int, line[line.index("[") + 1 : line.rindex("]")].split(",")))
+        return GameData(data[0], data[1], data[2], data[3], data[4], data[5], data[6], data[7:7+data[6]])
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_push_attributes(line: str) -> dict[str, list[float]]:
+    """
+    解析推送数据中的属性
+    eg: chassis push position 0.1 0.2 attitude 0.0 0.0 12.5 ; -> {"position": [0.1, 0.2], "attitude": [0.0, 0.0, 12.5]}
+
+    Args:
+        line (str): 单行数据
+    Returns:
+        dict[str, list[float]]: 属性名 -> 数值列表，格式不符的部分会被忽略
+    """
+
+    attributes: dict[str, list[float]] = {}
+    values: list[float] | None = None
+
+    for token in line.rstrip("; ").split()[2:]:
+        try:
+            value = float(token)
+        except ValueError:
+            values = attributes.setdefault(token, [])
+            continue
+        if values is not None:
+            values.append(value)
+
+    return attributes
+
+
+# 行处理函数
+LineHandler = Callable[[str], None]
+
+
+def _line_key(line: str) -> str:
+    """
+    取一行数据的首个单词作为分派键，如 "game msg push [...]" -> "game"
+    """
+
+    end = line.find(" ")
+    head = line if end < 0 else line[:end]
+    return head.rstrip(";")
+
+
 class DataHolder:
     """
     串口数据管理类 单例类
@@ -35,15 +108,84 @@ class DataHolder:
 
     def __init__(self):
 
+        # 单例类 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
         # 总数据队列
         self.data: Queue[str] = Queue()
 
         # 赛事数据
-        self._game_data_list: list[GameData] = []
+        self._game_data: GameData | None = None             # 最新的一条
+        self.game_history: GameDataHistory = GameDataHistory() # 带到达时间的历史记录
+
+        # 事件总线
+        self.events: EventBus = EventBus()
+        # 正在处理的数据的到达时间 time.monotonic()
+        self._arrived: float = 0.0
+        # 当前按下的按键 -> 按下时刻 time.monotonic()
+        self._key_down_at: dict[int, float] = {}
+        # 上一条赛事数据 (用于去重)
+        self._last_game_data: GameData | None = None
+        self._game_seq_advances: bool = False # 是否观察到序列号变化 (序列号不变的下位机不能按内容去重)
+
+        # 机器人状态 (推送数据)
+        self.state: StateStore = StateStore()
+        # 带时间戳的反馈历史 用于对齐摄像头帧 (pitch, yaw) / (x, y, yaw)
+        self.gimbal_history: StateHistory = StateHistory(2, angular=(False, True))
+        self.chassis_history: StateHistory = StateHistory(3, angular=(False, False, True))
+
+        # 行处理函数注册表 首个单词 -> [(前缀, 处理函数), ...]
+        # 每行只做一次字典查找，再在同一首单词下的少数几个前缀中匹配
+        self._handlers: dict[str, list[tuple[str, LineHandler]]] = {}
+
+        self.register_handler("game msg push", self._handle_game_msg)
+        self.register_handler("gimbal push", self._handle_gimbal_push)
+        self.register_handler("chassis push", self._handle_chassis_push)
+        self.register_handler("ok;", self._handle_sdk_reply)
+        self.register_handler("Already in SDK mode;", self._handle_sdk_reply)
+
+        # 统计
+        self.lines_processed: int = 0 # 已处理的行数
+        self._rx_dropped: int = 0     # 上次检查时接收队列的溢出丢弃数
+        self.game_data_duplicates: int = 0 # 丢弃的重复赛事数据包数
 
     
     # === 数据处理机制 ===
 
+    def register_handler(self, prefix: str, handler: LineHandler) -> None:
+        """
+        注册行处理函数 以 prefix 开头的数据交给 handler 处理
+        同一首单词下按前缀从长到短匹配，重复注册同一前缀会替换原处理函数
+
+        Args:
+            prefix (str): 数据前缀，如 "gimbal push attitude"
+            handler (LineHandler): 处理函数，参数为单行数据
+        """
+
+        entries = [(p, h) for p, h in self._handlers.get(_line_key(prefix), []) if p != prefix]
+        entries.append((prefix, handler))
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self._handlers[_line_key(prefix)] = entries
+
+
+    def unregister_handler(self, prefix: str) -> None:
+        """
+        注销行处理函数
+
+        Args:
+            prefix (str): 注册时使用的数据前缀
+        """
+
+        key = _line_key(prefix)
+        entries = [(p, h) for p, h in self._handlers.get(key, []) if p != prefix]
+        if entries:
+            self._handlers[key] = entries
+        else:
+            self._handlers.pop(key, None)
+
+
     def process_line(self, line: str) -> None:
         """
         处理单行数据
@@ -52,47 +194,165 @@ class DataHolder:
             line (str): 单行数据
         """
 
-        # === 赛事数据 ===
-        # eg: game msg push [0, 6, 1, 0, 0, 255, 1, 199]
-        if line.startswith("game msg push"):
-            data = line.strip().split("[")[-1].strip("]").split(",") # 提取数据
-            data = [int(i.strip()) for i in data]                    # 转为整数
-
-            self._game_data_list.append(
-                GameData(
-                    cmd_id      = data[0],
-                    length      = data[1],
-                    mouse_press = data[2],
-                    mouse_x     = data[3],
-                    mouse_y     = data[4],
-                    seq         = data[5],
-                    key_num     = data[6],
-                    keys        = data[7:7+data[6]]
-                )
-            )
+        for prefix, handler in self._handlers.get(_line_key(line), ()):
+            if line.startswith(prefix):
+                handler(line)
+                return
 
-            # 处理掉一部分*旧的*数据，避免内存占用过高
-            if len(self._game_data_list) > 30:
-                self._game_data_list = self._game_data_list[-10:] # 保留最新的 10 条数据 (虽然除了最新的 1 条数据，其他的都没什么用处)
-        # === 过滤 "ok;" "Already in SDK mode;" 数据 ===
-        elif line.startswith("ok;") or line.startswith("Already in SDK mode;"):
-            pass
-        # === ... ===
         # === 其他数据 ===
-        else:
-            self.data.put(line) # 放入总数据队列
+        self.data.put(line) # 放入总数据队列
+        self.events.publish(EventType.UNKNOWN_LINE, line, self._arrived)
+
+
+    def _handle_game_msg(self, line: str) -> None:
+        """
+        处理赛事数据
+        """
+
+        game_data = parse_game_msg(line)
+        if game_data is None:
+            logger.debug(f"赛事数据格式异常: {line}")
+            return
+
+        # 只有序列号确实在递增时，序列号与内容都和上一包相同才视为重复发送的数据包；
+        # 否则鼠标匀速移动 / 按住按键时的相同数据包都是有效输入
+        last = self._last_game_data
+        if last is not None and game_data.seq != last.seq:
+            self._game_seq_advances = True
+        if self._game_seq_advances and game_data == last:
+            self.game_data_duplicates += 1
+            return
+        self._last_game_data = game_data
+
+        self._game_data = game_data
+        self.game_history.append(self._arrived, game_data)
+        self.events.publish(EventType.GAME_DATA, game_data, self._arrived)
+        self._update_keys(game_data.keys)
+
+
+    def _update_keys(self, keys: list[int]) -> None:
+        """
+        对比按键集合的变化 发布按下 / 保持 / 松开事件
+
+        Args:
+            keys (list[int]): 最新数据包中按下的按键
+        """
+
+        now = self._arrived
+        down_at = self._key_down_at
+
+        for key in list(down_at):
+            if key not in keys:
+                pressed = down_at.pop(key)
+                self.events.publish(EventType.KEY_UP, KeyEvent(key, now - pressed), now)
+
+        for key in keys:
+            pressed = down_at.get(key)
+            if pressed is None:
+                down_at[key] = now
+                self.events.publish(EventType.KEY_DOWN, KeyEvent(key, 0.0), now)
+            else:
+                self.events.publish(EventType.KEY_HELD, KeyEvent(key, now - pressed), now)
+
+
+    def _handle_gimbal_push(self, line: str) -> None:
+        """
+        处理云台推送数据
+        eg: gimbal push attitude 10.5 -30.2 ;
+        """
+
+        attitude = parse_push_attributes(line).get("attitude")
+        if attitude is None or len(attitude) < 2:
+            logger.debug(f"云台推送数据格式异常: {line}")
+            return
+
+        self.gimbal_history.append(self._arrived, attitude[0], attitude[1])
+        self._publish_state(gimbal_attitude=GimbalAttitude(attitude[0], attitude[1], self._arrived))
+
+
+    def _handle_chassis_push(self, line: str) -> None:
+        """
+        处理底盘推送数据
+        eg: chassis push position 0.5 0.1 ;
+            chassis push attitude 0.1 0.2 90.0 ;
+            chassis push status 1 0 0 0 0 0 0 0 0 0 0 ;
+        """
+
+        attributes = parse_push_attributes(line)
+        fields: dict[str, object] = {}
+
+        position = attributes.get("position")
+        if position is not None and len(position) >= 2:
+            fields["chassis_position"] = ChassisPosition(position[0], position[1], self._arrived)
+
+        attitude = attributes.get("attitude")
+        if attitude is not None and len(attitude) >= 3:
+            fields["chassis_attitude"] = ChassisAttitude(attitude[0], attitude[1], attitude[2], self._arrived)
+
+        status = attributes.get("status")
+        if status is not None and len(status) >= 11:
+            fields["chassis_status"] = ChassisStatus(*(int(v) for v in status[:11]), self._arrived)
+
+        if not fields:
+            logger.debug(f"底盘推送数据格式异常: {line}")
+            return
+
+        state = self._publish_state(**fields)
+
+        # 位置与姿态分别推送 两者都有之后才记录历史
+        if state.chassis_position is not None and state.chassis_attitude is not None:
+            self.chassis_history.append(
+                self._arrived,
+                state.chassis_position.x,
+                state.chassis_position.y,
+                state.chassis_attitude.yaw
+            )
+
+
+    def _publish_state(self, **fields) -> RobotState:
+        """
+        更新机器人状态快照并发布事件
+        """
+
+        state = self.state.update(**fields)
+        self.events.publish(EventType.ROBOT_STATE, state, self._arrived)
+        return state
+
+
+    def _handle_sdk_reply(self, line: str) -> None:
+        """
+        处理 "ok;" "Already in SDK mode;" 等未被 query() 消费的指令应答
+        """
+        self.events.publish(EventType.SDK_REPLY, line, self._arrived)
 
     
-    def fetch_and_process(self) -> None:
+    def fetch_and_process(self, timeout: float | None = 0) -> int:
         """
         从串口处获取数据 并进行处理
+        每行数据从接收队列中取走后只处理一次，单次调用的开销只与新到的数据量有关
+        解析出的数据以事件形式发布到 self.events，回调函数在调用本方法的线程中执行
+
+        Args:
+            timeout (float | None): 接收队列为空时最长等待时间，单位秒，0 表示不等待，None 表示无限等待
+        Returns:
+            int: 本次处理的行数
         """
 
-        lines = conn.readall()
-        
-        for line in lines:
-            logger.info(f"分析了一条串口数据: {line}")
+        items = conn.drain_rx(timeout)
+
+        for arrived, line in items:
+            logger.debug(f"分析了一条串口数据: {line}")
+            self._arrived = arrived
             self.process_line(line)
+        self.lines_processed += len(items)
+
+        # 消费太慢时接收队列会丢弃数据，提示一下
+        dropped = conn.rx_queue.dropped
+        if dropped != self._rx_dropped:
+            logger.warning(f"串口接收队列溢出 丢弃了 {dropped - self._rx_dropped} 行数据")
+            self._rx_dropped = dropped
+
+        return len(items)
 
     
     # === 数据管理机制 ===
@@ -106,11 +366,31 @@ class DataHolder:
             GameData | None: 最新的赛事数据，若无数据则返回 None
         """
 
-        if len(self._game_data_list) == 0:
-            return None
-        else:
-            return self._game_data_list[-1]
+        return self._game_data
     
+    @property
+    def robot_state(self) -> RobotState:
+        """
+        获取最新的机器人状态快照 (无锁，任意线程可读)
+
+        Returns:
+            RobotState: 状态快照，未开启对应推送的部分为 None
+        """
+        return self.state.snapshot
+
+    def gimbal_attitude_at(self, timestamp: float) -> tuple[float, float] | None:
+        """
+        获取某一时刻 (如摄像头帧的曝光时刻) 的云台姿态 需先开启云台姿态推送
+
+        Args:
+            timestamp (float): 查询时刻 time.monotonic()
+        Returns:
+            tuple[float, float] | None: (pitch, yaw) 单位 °，无法插值 / 外推时返回 None
+        """
+
+        values = self.gimbal_history.lookup(timestamp)
+        return None if values is None else (float(values[0]), float(values[1]))
+
     @property
     def pressed_keys(self) -> list[int]:
         """
@@ -128,6 +408,20 @@ class DataHolder:
             return game_data.keys
 
 
+    def key_hold_time(self, key: int) -> float:
+        """
+        获取按键已按住的时间
+
+        Args:
+            key (int): 按键 ord 值
+        Returns:
+            float: 已按住的时间（秒），未按下时返回 0
+        """
+
+        pressed = self._key_down_at.get(key)
+        return 0.0 if pressed is None else time.monotonic() - pressed
+
+
     # === 单例类机制 ===
     # 单例类设计
     _instance: 'DataHolder | None' = None
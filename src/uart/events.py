@@ -0,0 +1,250 @@
+# events.py
+# 串口数据事件总线
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# DataHolder 解析出数据后发布事件，订阅方式有三种:
+#   1. 回调函数     在发布事件的线程 (调用 fetch_and_process 的线程) 中同步执行，应尽快返回
+#   2. wait()       任意线程阻塞等待下一个事件
+#   3. asyncio 队列 事件经 loop.call_soon_threadsafe 送入协程的 asyncio.Queue
+#
+
+import asyncio
+import threading
+from enum import Enum
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from src import logger
+
+
+class EventType(Enum):
+    """
+    事件类型
+    """
+
+    GAME_DATA    = "game_data"    # 新的赛事数据 payload: GameData
+    KEY_DOWN     = "key_down"     # 按键按下 (每次按下只发布一次) payload: KeyEvent
+    KEY_HELD     = "key_held"     # 按键保持按下 (之后每个新数据包发布一次) payload: KeyEvent
+    KEY_UP       = "key_up"       # 按键松开 payload: KeyEvent
+    ROBOT_STATE  = "robot_state"  # 推送数据更新了机器人状态 payload: RobotState
+    SDK_REPLY    = "sdk_reply"    # 未被 query() 消费的指令应答 payload: 应答内容
+    UNKNOWN_LINE = "unknown_line" # 无处理函数的数据 payload: 单行数据
+
+
+@dataclass
+class Event:
+    """
+    单个事件
+    """
+
+    type:      EventType # 事件类型
+    payload:   Any       # 事件内容
+    timestamp: float     # 对应数据的到达时间 time.monotonic()
+    seq:       int       # 事件序号 (总线内递增)
+
+
+@dataclass
+class KeyEvent:
+    """
+    按键事件内容
+    """
+
+    key:      int   # 按键 ord 值
+    duration: float # 已按住的时间（秒），KEY_DOWN 时为 0，KEY_UP 时为总按住时间
+
+
+# 事件回调函数
+EventCallback = Callable[[Event], None]
+
+
+class EventBus:
+    """
+    事件总线
+    """
+
+    def __init__(self, history: int = 64):
+        """
+        Args:
+            history (int): 为 wait() 保留的最近事件数
+        """
+
+        self._cond = threading.Condition()
+        self._seq: int = 0
+        self._recent: deque[Event] = deque(maxlen=history)
+        self._latest: dict[EventType, Event] = {}
+
+        self._callbacks: list[tuple[EventCallback, frozenset[EventType] | None]] = []
+        self._queues: list[tuple[asyncio.AbstractEventLoop, asyncio.Queue[Event], frozenset[EventType] | None]] = []
+
+
+    # === 发布 ===
+
+    def publish(self, type: EventType, payload: Any, timestamp: float) -> Event:
+        """
+        发布事件
+
+        Args:
+            type (EventType): 事件类型
+            payload (Any): 事件内容
+            timestamp (float): 对应数据的到达时间 time.monotonic()
+        Returns:
+            Event: 发布的事件
+        """
+
+        with self._cond:
+            self._seq += 1
+            event = Event(type, payload, timestamp, self._seq)
+            self._recent.append(event)
+            self._latest[type] = event
+            self._cond.notify_all()
+            callbacks = list(self._callbacks)
+            queues = list(self._queues)
+
+        for callback, types in callbacks:
+            if types is not None and type not in types:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"事件回调 {callback} 处理 {type.name} 出现异常: {e}")
+
+        for loop, queue, types in queues:
+            if types is not None and type not in types:
+                continue
+            try:
+                loop.call_soon_threadsafe(_put_nowait, queue, event)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.unsubscribe_queue(queue)
+
+        return event
+
+
+    # === 订阅 ===
+
+    def subscribe(self, callback: EventCallback, types: Iterable[EventType] | None = None) -> None:
+        """
+        订阅事件 (回调函数)
+
+        Args:
+            callback (EventCallback): 回调函数，在发布事件的线程中执行
+            types (Iterable[EventType] | None): 关心的事件类型，None 表示全部
+        """
+
+        with self._cond:
+            self._callbacks.append((callback, None if types is None else frozenset(types)))
+
+
+    def unsubscribe(self, callback: EventCallback) -> None:
+        """
+        取消订阅 (回调函数)
+
+        Args:
+            callback (EventCallback): 订阅时使用的回调函数
+        """
+
+        with self._cond:
+            self._callbacks = [entry for entry in self._callbacks if entry[0] != callback]
+
+
+    def subscribe_queue(
+        self,
+        types: Iterable[EventType] | None = None,
+        maxsize: int = 256,
+        loop: asyncio.AbstractEventLoop | None = None
+    ) -> asyncio.Queue[Event]:
+        """
+        订阅事件 (asyncio 队列) 队列满时丢弃新事件
+
+        Args:
+            types (Iterable[EventType] | None): 关心的事件类型，None 表示全部
+            maxsize (int): 队列容量
+            loop (asyncio.AbstractEventLoop | None): 队列所属的事件循环，None 表示当前正在运行的事件循环
+        Returns:
+            asyncio.Queue[Event]: 事件队列
+        """
+
+        loop = loop or asyncio.get_running_loop()
+        queue: asyncio.Queue[Event] = asyncio.Queue(maxsize)
+
+        with self._cond:
+            self._queues.append((loop, queue, None if types is None else frozenset(types)))
+        return queue
+
+
+    def unsubscribe_queue(self, queue: asyncio.Queue[Event]) -> None:
+        """
+        取消订阅 (asyncio 队列)
+
+        Args:
+            queue (asyncio.Queue[Event]): subscribe_queue() 返回的队列
+        """
+
+        with self._cond:
+            self._queues = [entry for entry in self._queues if entry[1] is not queue]
+
+
+    # === 等待 ===
+
+    def wait(self, types: Iterable[EventType] | None = None, timeout: float | None = None) -> Event | None:
+        """
+        阻塞等待调用之后发布的下一个事件
+
+        Args:
+            types (Iterable[EventType] | None): 关心的事件类型，None 表示全部
+            timeout (float | None): 超时时间，单位秒，None 表示无限等待
+        Returns:
+            Event | None: 等到的事件，超时返回 None
+        """
+
+        wanted = None if types is None else frozenset(types)
+        found: list[Event] = []
+
+        with self._cond:
+            since = self._seq
+
+            def _arrived() -> bool:
+                for event in self._recent:
+                    if event.seq > since and (wanted is None or event.type in wanted):
+                        found.append(event)
+                        return True
+                return False
+
+            self._cond.wait_for(_arrived, timeout)
+
+        return found[0] if found else None
+
+
+    def latest(self, type: EventType) -> Event | None:
+        """
+        获取某类型最近一次发布的事件
+
+        Args:
+            type (EventType): 事件类型
+        Returns:
+            Event | None: 最近的事件，从未发布过则返回 None
+        """
+        return self._latest.get(type)
+
+
+def _put_nowait(queue: asyncio.Queue[Event], event: Event) -> None:
+    """
+    在事件循环线程中放入事件 队列满时丢弃
+    """
+
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+__all__ = [
+    "EventType",
+    "Event",
+    "KeyEvent",
+    "EventCallback",
+    "EventBus",
+]
@@ -0,0 +1,132 @@
+# framing.py
+# 串口数据分帧模块
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+from src import config
+from src import logger
+
+
+def format_number(value: float, digits: int = 2) -> str:
+    """
+    把数值编码为紧凑的定点小数字符串 (去掉多余的 0 和小数点)
+    例: 12.345678901 -> "12.35", 3.0 -> "3", -0.001 -> "0"
+
+    Args:
+        value (float): 数值
+        digits (int): 保留的小数位数
+    Returns:
+        str: 编码结果
+    """
+
+    if isinstance(value, int):
+        return str(value)
+
+    text = f"{value:.{digits}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def encode_command(data: str) -> bytes:
+    """
+    将一条指令编码为写入串口的字节
+    去掉末尾多余的空格和分号，保证只以一个 ';' 加结束符结尾
+
+    Args:
+        data (str): 指令字符串 (结尾带不带 ';' 均可)
+    Returns:
+        bytes: 编码后的字节
+    """
+    return f"{data.rstrip().rstrip(';').rstrip()};{config.SERIAL_EOL}".encode("utf-8")
+
+
+def wire_time(nbytes: int, baudrate: int | None = None) -> float:
+    """
+    计算 nbytes 字节在串口线路上的传输时间 (8N1，每字节 10 bit)
+
+    Args:
+        nbytes (int): 字节数
+        baudrate (int | None): 波特率，None 表示使用 config.SERIAL_BAUDRATE
+    Returns:
+        float: 传输时间（秒）
+    """
+    return nbytes * 10 / (baudrate or config.SERIAL_BAUDRATE)
+
+
+class LineAssembler:
+    """
+    串口行重组器
+    持久保存未收完的半行字节，只输出完整的行。
+    """
+
+    def __init__(self, eol: bytes = b"\n", max_buffer: int = 4096):
+        """
+        Args:
+            eol (bytes): 行结束符
+            max_buffer (int): 半行缓冲上限（字节），超过仍未收到结束符则丢弃
+        """
+
+        self._buf: bytearray = bytearray()
+        self._eol: bytes = eol
+        self._max_buffer: int = max_buffer
+
+        # 因缓冲溢出而丢弃的字节数
+        self.dropped_bytes: int = 0
+
+
+    def feed(self, chunk: bytes) -> list[str]:
+        """
+        送入一段新读到的字节
+
+        Args:
+            chunk (bytes): 新读到的字节
+        Returns:
+            list[str]: 本次拼出的完整行（已去除首尾空白，空行会被忽略）
+        """
+
+        # 只在新数据（及其与旧数据的接缝处）查找结束符
+        start = max(0, len(self._buf) - len(self._eol) + 1)
+        self._buf += chunk
+
+        if self._buf.find(self._eol, start) < 0:
+            if len(self._buf) > self._max_buffer:
+                logger.warning(f"串口半行数据超过 {self._max_buffer} 字节仍无结束符，已丢弃")
+                self.dropped_bytes += len(self._buf)
+                self._buf.clear()
+            return []
+
+        *complete, rest = self._buf.split(self._eol)
+        self._buf = bytearray(rest)
+
+        lines: list[str] = []
+        for raw in complete:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if line:
+                lines.append(line)
+        return lines
+
+
+    def reset(self) -> None:
+        """
+        清空半行缓冲
+        """
+        self._buf.clear()
+
+
+    @property
+    def pending(self) -> int:
+        """
+        当前缓冲中未完成的字节数
+        """
+        return len(self._buf)
+
+
+__all__ = [
+    "format_number",
+    "encode_command",
+    "wire_time",
+    "LineAssembler",
+]
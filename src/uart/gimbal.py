@@ -6,15 +6,21 @@
 #
 
 
-import time
+from concurrent.futures import Future
+from typing import Callable
 
+from src.cancellation import CancellationToken, OperationCancelled, sleep
 from . import conn
+from .framing import format_number as num
+from .reply import PUSH_FREQUENCIES, parse_numbers
+from .yaw import YawTracker
 
 
 def set_gimbal_speed(
     pitch: float,
     yaw: float,
-    delay: bool = True
+    delay: bool = True,
+    token: CancellationToken | None = None
 ) -> None:
     """
     设置云台的速度。
@@ -23,15 +29,59 @@ def set_gimbal_speed(
     Args:
         pitch (float): 云台俯仰速度，范围[-450, 450] (°/s) 
         yaw (float):   云台偏航速度，范围[-450, 450] (°/s)
+        token (CancellationToken | None): 取消令牌，等待期间被取消时立即停止云台并抛出 OperationCancelled
     """
 
-    conn.writeline(f"gimbal speed p {pitch} y {yaw};")
+    conn.writeline(f"gimbal speed p {num(pitch)} y {num(yaw)};", coalesce_key="gimbal speed")
     if delay:
         # 速度为 0 时不需要延时（停止云台运动）
         if pitch == 0 and yaw == 0:
             return
-        time.sleep( 360 / max(abs(pitch), abs(yaw), 2) )  # 等待一圈巡航完成，至少等待1秒
-    set_gimbal_recenter()  # 巡航完成后回中
+        _wait( 360 / max(abs(pitch), abs(yaw), 2), token )  # 等待一圈巡航完成，至少等待1秒
+    set_gimbal_recenter(token=token)  # 巡航完成后回中
+
+
+def send_gimbal_speed(pitch: float, yaw: float) -> Future[bool]:
+    """
+    发送云台速度指令。非阻塞，不回中。
+    适用于闭环控制等以固定频率持续更新速度的场景，未发送的旧速度会被新速度替换。
+
+    Args:
+        pitch (float): 云台俯仰速度，范围[-450, 450] (°/s)，超出范围会被裁剪
+        yaw (float):   云台偏航速度，范围[-450, 450] (°/s)，超出范围会被裁剪
+    Returns:
+        Future[bool]: 写入串口后完成，可用于统计指令延迟；被新速度替换时为 cancelled 状态
+    """
+
+    pitch = max(-450.0, min(450.0, pitch))
+    yaw = max(-450.0, min(450.0, yaw))
+    return conn.writeline_future(f"gimbal speed p {num(pitch)} y {num(yaw)};", coalesce_key="gimbal speed")
+
+
+def _wait(seconds: float, token: CancellationToken | None) -> None:
+    """
+    【内部函数】等待云台运动完成 被取消时立即停止云台并抛出 OperationCancelled
+    """
+
+    try:
+        sleep(seconds, token)
+    except OperationCancelled:
+        send_gimbal_speed(0, 0)
+        raise
+
+
+def _record_yaw(record: Callable[[float], None], yaw: float) -> Callable[[Future[bool]], None]:
+    """
+    【内部函数】生成写入完成回调 只有指令真正写入串口时才记入 YawTracker
+    被新值顶替 / 被安全指令作废 / 写入失败的指令云台不会执行，不能计入偏航角估计
+    """
+
+    def callback(future: Future[bool]) -> None:
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        record(yaw)
+
+    return callback
 
 
 def _move_gimbal(
@@ -39,6 +89,7 @@ def _move_gimbal(
     yaw: float | None,
     vpitch: float | None,
     vyaw: float | None,
+    coalesce: bool = False,
 ) -> None:
     """
     【内部函数】控制云台移动（相对角度，受 UART 下位机 ±55° 限制）。非阻塞。
@@ -51,6 +102,8 @@ def _move_gimbal(
         yaw (float):    云台偏航角度，范围[-55, 55] (°)
         vpitch (float): 云台俯仰速度，范围[0, 540] (°/s)
         vyaw (float):   云台偏航速度，范围[0, 540] (°/s)
+        coalesce (bool): 是否只保留最新一条尚未发送的移动指令。
+            适用于每次都根据最新误差重新计算的瞄准循环；分步旋转等需要累加的场景请保持 False
     Raises:
         ValueError: 如果所有角度和速度参数都为 None 或 参数不在范围内。
     """
@@ -62,26 +115,28 @@ def _move_gimbal(
         raise ValueError("参数不在范围内。")
 
     all_none: bool = True
-    command = "gimbal move "
+    command = "gimbal move"
 
     if pitch is not None:
         all_none = False
-        command += f"p {pitch} "
+        command += f" p {num(pitch)}"
     if yaw is not None:
         all_none = False
-        command += f"y {yaw} "
+        command += f" y {num(yaw)}"
     if vpitch is not None:
         all_none = False
-        command += f"vp {vpitch} "
+        command += f" vp {num(vpitch)}"
     if vyaw is not None:
         all_none = False
-        command += f"vy {vyaw} "
+        command += f" vy {num(vyaw)}"
 
     if all_none:
         raise ValueError("At least one of pitch, yaw, vpitch, or vyaw must be provided.")
 
     command += ";"
-    conn.writeline(command)
+    future = conn.writeline_future(command, coalesce_key="gimbal move" if coalesce else None)
+    if yaw is not None:
+        future.add_done_callback(_record_yaw(YawTracker().on_relative_move, yaw))
 
 
 def _move_gimbal_absolute(
@@ -112,26 +167,65 @@ def _move_gimbal_absolute(
         raise ValueError("参数不在范围内。")
 
     all_none = True
-    command = "gimbal moveto "
+    command = "gimbal moveto"
 
     if pitch is not None:
         all_none = False
-        command += f"p {pitch} "
+        command += f" p {num(pitch)}"
     if yaw is not None:
         all_none = False
-        command += f"y {yaw} "
+        command += f" y {num(yaw)}"
     if vpitch is not None:
         all_none = False
-        command += f"vp {vpitch} "
+        command += f" vp {num(vpitch)}"
     if vyaw is not None:
         all_none = False
-        command += f"vy {vyaw} "
+        command += f" vy {num(vyaw)}"
 
     if all_none:
         raise ValueError("At least one of pitch, yaw, vpitch, or vyaw must be provided.")
 
     command += ";"
-    conn.writeline(command)    
+    future = conn.writeline_future(command)
+    if yaw is not None:
+        future.add_done_callback(_record_yaw(YawTracker().on_absolute_move, yaw))
+
+
+def get_gimbal_attitude(timeout: float | None = None) -> tuple[float, float] | None:
+    """
+    查询云台当前姿态（相对于回中位置）。
+
+    Args:
+        timeout (float | None): 超时时间，单位秒，None 表示使用 SERIAL_REPLY_TIMEOUT
+    Returns:
+        tuple[float, float] | None: (pitch, yaw) 单位 °，超时或应答异常时返回 None
+    """
+
+    values = parse_numbers(conn.query_blocking("gimbal attitude ?;", timeout), 2)
+    return None if values is None else (values[0], values[1])
+
+
+def gimbal_push_on(attitude_freq: int = 50) -> None:
+    """
+    开启云台姿态推送 推送数据由 DataHolder 解析到 robot_state.gimbal_attitude
+
+    Args:
+        attitude_freq (int): 推送频率 (Hz)，可选 1, 5, 10, 20, 30, 50
+    Raises:
+        ValueError: 如果频率不是可选值
+    """
+
+    if attitude_freq not in PUSH_FREQUENCIES:
+        raise ValueError(f"attitude_freq must be one of {PUSH_FREQUENCIES}")
+
+    conn.writeline(f"gimbal push attitude on afreq {attitude_freq};")
+
+
+def gimbal_push_off() -> None:
+    """
+    关闭云台姿态推送
+    """
+    conn.writeline("gimbal push attitude off;")
 
 
 def set_gimbal_suspend() -> None:
@@ -148,18 +242,22 @@ def set_gimbal_resume() -> None:
     conn.writeline("gimbal resume;")
 
 
-def set_gimbal_recenter(delay: bool = True) -> None:
+def set_gimbal_recenter(delay: bool = True, token: CancellationToken | None = None) -> None:
     """
     云台回中（pitch=0°, yaw=0°）。
     
     注意：官方 'gimbal recenter;' 指令在竖直方向上无法正常工作，
     因此使用内部 _move_gimbal_absolute(0, 0, 180, 180) 实现。
+
+    Args:
+        delay (bool): 是否等待回中完成
+        token (CancellationToken | None): 取消令牌，等待期间被取消时立即停止云台并抛出 OperationCancelled
     """
     # conn.writeline("gimbal recenter;")  # 官方指令不可靠
     _move_gimbal_absolute(0, 0, 180, 180)
     if delay:
         # 计算回中所需时间：假设最大偏移 55°，速度 180°/s
-        time.sleep(55 / 180 + 0.5)  # 约 0.8 秒
+        _wait(55 / 180 + 0.5, token)  # 约 0.8 秒
 
 
 def rotate_gimbal(
@@ -167,7 +265,8 @@ def rotate_gimbal(
     yaw: float | None = None,
     vpitch: float | None = None,
     vyaw: float | None = None,
-    delay: bool = True
+    delay: bool = True,
+    token: CancellationToken | None = None
 ) -> None:
     """
     【主操作函数】控制云台旋转（相对角度模式，支持滑环 360° 无限旋转）。
@@ -178,8 +277,10 @@ def rotate_gimbal(
         vpitch (float): 云台俯仰速度，范围[0, 540] (°/s)
         vyaw (float):   云台偏航速度，范围[0, 540] (°/s)
         delay (bool):   是否在函数内等待旋转完成（大角度旋转会阻塞较长时间）
+        token (CancellationToken | None): 取消令牌，每一步之间检查，被取消时立即停止云台
     Raises:
         ValueError: 如果所有角度和速度参数都为 None 或速度参数不在范围内。
+        OperationCancelled: 等待期间被取消
     Example:
         >>> # 云台向右旋转 180°（需要滑环支持）
         >>> move_gimbal_360(yaw=180, vyaw=90)
@@ -208,6 +309,9 @@ def rotate_gimbal(
     
     if pitch is None and yaw is None:
         raise ValueError("至少需要提供 pitch 或 yaw 参数")
+
+    if token is not None:
+        token.raise_if_cancelled()
     
     # 下位机单次可接受的最大角度（留有安全余量）
     MAX_STEP_ANGLE = 50.0
@@ -259,9 +363,9 @@ def rotate_gimbal(
             # 等待第一步完成
             if vyaw is not None and vyaw > 0:
                 wait_time = abs(first_yaw_step) / vyaw + 0.1
-                time.sleep(wait_time)
+                _wait(wait_time, token)
             else:
-                time.sleep(0.5)
+                _wait(0.5, token)
             
             remaining_yaw -= first_yaw_step
             
@@ -278,9 +382,9 @@ def rotate_gimbal(
                 
                 if vyaw is not None and vyaw > 0:
                     wait_time = abs(step) / vyaw + 0.1
-                    time.sleep(wait_time)
+                    _wait(wait_time, token)
                 else:
-                    time.sleep(0.5)
+                    _wait(0.5, token)
                 
                 remaining_yaw -= step
             
@@ -293,9 +397,9 @@ def rotate_gimbal(
                     vyaw=vyaw
                 )
                 if vyaw is not None and vyaw > 0:
-                    time.sleep(abs(remaining_yaw) / vyaw + 0.1)
+                    _wait(abs(remaining_yaw) / vyaw + 0.1, token)
                 else:
-                    time.sleep(0.3)
+                    _wait(0.3, token)
     else:
         # 只有 pitch，没有 yaw
         if final_pitch is not None:
@@ -318,7 +422,7 @@ def rotate_gimbal(
                         vyaw if vyaw is not None else 0,
                         1)  # 避免除零
         wait_time = max_angle / max_speed
-        time.sleep(wait_time)
+        _wait(wait_time, token)
 
 
 def rotate_gimbal_absolute(
@@ -326,7 +430,8 @@ def rotate_gimbal_absolute(
     yaw: float | None = None,
     vpitch: float | None = None,
     vyaw: float | None = None,
-    delay: bool = True
+    delay: bool = True,
+    token: CancellationToken | None = None
 ) -> None:
     """
     【主操作函数】控制云台旋转（绝对角度模式，支持滑环 360° 无限旋转）。
@@ -337,8 +442,10 @@ def rotate_gimbal_absolute(
         vpitch (float): 云台俯仰速度，范围[0, 540] (°/s)
         vyaw (float):   云台偏航速度，范围[0, 540] (°/s)
         delay (bool):   是否在函数内等待旋转完成（大角度旋转会阻塞较长时间）
+        token (CancellationToken | None): 取消令牌，每一步之间检查，被取消时立即停止云台
     Raises:
         ValueError: 如果所有角度和速度参数都为 None 或速度参数不在范围内。
+        OperationCancelled: 等待期间被取消
     Example:
         >>> # 云台转到绝对角度 yaw=300°（需要滑环支持）
         >>> move_gimbal_360_absolute(yaw=300, vyaw=90)
@@ -352,13 +459,15 @@ def rotate_gimbal_absolute(
         - 适用于需要精确到达指定绝对位置的场景
     工作原理：
         1. 对于 yaw 角度，如果在 [-250, 250]° 范围内，直接调用 move_gimbal_absolute()
-        2. 如果超出范围，计算相对偏移量，调用 move_gimbal_360() 分步执行
+        2. 如果超出范围，由 YawTracker 估计当前的连续偏航角，只发送 "目标 - 当前" 的残差 (按多圈角度，不取最短路径)，
+           交给 GimbalMotionExecutor.rotate_to_yaw() 分步执行
         3. 对于 pitch 同理（范围 [-25, 30]°）
     注意事项：
-        - 本函数会阻塞执行，直到运动完成
+        - delay=True 时本函数会阻塞执行，直到运动完成
         - 超出下位机绝对角度范围时，会转换为相对角度分步执行
         - 确保机器人已安装滑环
-        - ⚠️ 警告：由于使用相对角度逼近，**可能存在累积误差**。
+        - 开启云台姿态推送 (gimbal_push_on) 后按反馈闭环修正，不会累积误差；
+          未开启时按已发出的指令推算，速度模式的转动会使推算失准
     """
 
     # 参数验证
@@ -368,11 +477,13 @@ def rotate_gimbal_absolute(
     
     if pitch is None and yaw is None:
         raise ValueError("至少需要提供 pitch 或 yaw 参数")
+
+    if token is not None:
+        token.raise_if_cancelled()
     
     # 下位机绝对角度限制
     PITCH_MIN, PITCH_MAX = -25.0, 30.0
     YAW_MIN, YAW_MAX = -250.0, 250.0
-    MAX_STEP_ANGLE = 50.0  # 相对角度的最大步进
     
     # 1️⃣ 验证并处理 pitch
     final_pitch = None
@@ -413,83 +524,20 @@ def rotate_gimbal_absolute(
                     vyaw=int(vyaw) if vyaw is not None else None
                 )
         else:
-            # 超出绝对角度范围，需要转换为相对角度分步执行
-            # ⚠️ 警告：这会导致阻塞，且可能存在累积误差
-            # 计算需要旋转的相对角度（简化处理，假设当前位置为 0）
-            relative_yaw = yaw
-            
-            # 归一化到 [-180, 180)
-            remaining_yaw = ((relative_yaw + 180) % 360) - 180
-            
-            # 分步执行（与 rotate_gimbal 类似的逻辑）
-            if abs(remaining_yaw) <= MAX_STEP_ANGLE:
-                # 小角度，使用相对角度控制（pitch 用绝对角度）
-                if use_absolute_pitch:
-                    # 先发送 pitch（绝对角度）
-                    _move_gimbal_absolute(
-                        pitch=final_pitch,
-                        yaw=None,
-                        vpitch=int(vpitch) if vpitch is not None else None,
-                        vyaw=None
-                    )
-                    # 再发送 yaw（相对角度）
-                    _move_gimbal(
-                        pitch=None,
-                        yaw=remaining_yaw,
-                        vpitch=None,
-                        vyaw=vyaw
-                    )
-                else:
-                    _move_gimbal(
-                        pitch=None,
-                        yaw=remaining_yaw,
-                        vpitch=None,
-                        vyaw=vyaw
-                    )
-            else:
-                # 大角度分步
-                if use_absolute_pitch:
-                    # 第一步：发送 pitch（绝对） + yaw 第一步（相对）
-                    first_yaw_step = MAX_STEP_ANGLE if remaining_yaw > 0 else -MAX_STEP_ANGLE
-                    _move_gimbal_absolute(
-                        pitch=final_pitch,
-                        yaw=None,
-                        vpitch=int(vpitch) if vpitch is not None else None,
-                        vyaw=None
-                    )
-                    _move_gimbal(
-                        pitch=None,
-                        yaw=first_yaw_step,
-                        vpitch=None,
-                        vyaw=vyaw
-                    )
-                    
-                    if vyaw is not None and vyaw > 0:
-                        time.sleep(abs(first_yaw_step) / vyaw + 0.1)
-                    else:
-                        time.sleep(0.5)
-                    
-                    remaining_yaw -= first_yaw_step
-                
-                # 后续步骤：只发送 yaw
-                while abs(remaining_yaw) > MAX_STEP_ANGLE:
-                    step = MAX_STEP_ANGLE if remaining_yaw > 0 else -MAX_STEP_ANGLE
-                    _move_gimbal(pitch=None, yaw=step, vpitch=None, vyaw=vyaw)
-                    
-                    if vyaw is not None and vyaw > 0:
-                        time.sleep(abs(step) / vyaw + 0.1)
-                    else:
-                        time.sleep(0.5)
-                    
-                    remaining_yaw -= step
-                
-                # 最后的余数
-                if abs(remaining_yaw) > 0.1:
-                    _move_gimbal(pitch=None, yaw=remaining_yaw, vpitch=None, vyaw=vyaw)
-                    if vyaw is not None and vyaw > 0:
-                        time.sleep(abs(remaining_yaw) / vyaw + 0.1)
-                    else:
-                        time.sleep(0.3)
+            # 超出绝对角度范围: 以 YawTracker 的连续偏航角估计为起点，只发送残差
+            # 开启云台姿态推送 (gimbal_push_on) 时每一步都按反馈修正，无需回中即可消除累积误差
+            from .motion import GimbalMotionExecutor  # 避免循环导入
+            handle = GimbalMotionExecutor().rotate_to_yaw(
+                yaw,
+                vyaw=vyaw,
+                pitch=final_pitch if use_absolute_pitch else None,
+                vpitch=vpitch
+            )
+            if delay:
+                handle.result(token=token) # 取消时执行器会立即停止云台
+            if pitch_error:
+                raise pitch_error
+            return
     else:
         # 只有 pitch，没有 yaw
         if use_absolute_pitch:
@@ -512,11 +560,15 @@ def rotate_gimbal_absolute(
                         vyaw if vyaw is not None else 0,
                         1)  # 避免除零
         wait_time = max_angle / max_speed
-        time.sleep(wait_time)
+        _wait(wait_time, token)
 
 
 __all__ = [
     "set_gimbal_speed",
+    "send_gimbal_speed",
+    "get_gimbal_attitude",
+    "gimbal_push_on",
+    "gimbal_push_off",
     "set_gimbal_suspend",
     "set_gimbal_resume",
     "set_gimbal_recenter",
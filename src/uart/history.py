@@ -0,0 +1,170 @@
+# history.py
+# 赛事数据历史记录
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 固定容量的环形缓冲，底层为 NumPy 结构化数组:
+# 追加与取最新记录都是 O(1)，按时间窗查询时对整段数据做向量化计算。
+#
+
+import time
+import threading
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .dataholder import GameData
+
+
+# 单条记录的布局
+GAME_DATA_DTYPE = np.dtype([
+    ("t",           np.float64),     # 到达时间 time.monotonic()
+    ("seq",         np.int16),       # 序列号
+    ("mouse_press", np.uint8),       # 鼠标按键 1:左键 2:右键 4:中键
+    ("mouse_x",     np.int16),       # 鼠标移动距离
+    ("mouse_y",     np.int16),       # 鼠标移动距离
+    ("key_num",     np.uint8),       # 按下的按键数量
+    ("keys",        np.uint8, (3,)), # 按下的按键 ord 值 (不足 3 个时补 0)
+])
+
+
+class GameDataHistory:
+    """
+    赛事数据环形缓冲 (线程安全)
+    """
+
+    def __init__(self, capacity: int = 512):
+        """
+        Args:
+            capacity (int): 最多保存的记录数
+        """
+
+        self.capacity: int = capacity
+        self._data: np.ndarray = np.zeros(capacity, dtype=GAME_DATA_DTYPE)
+        self._next: int = 0  # 下一条记录写入的位置
+        self._count: int = 0 # 已保存的记录数
+        self._lock = threading.Lock()
+
+
+    def append(self, t: float, game_data: "GameData") -> None:
+        """
+        追加一条记录 超出容量时覆盖最旧的记录
+
+        Args:
+            t (float): 到达时间 time.monotonic()
+            game_data (GameData): 赛事数据
+        """
+
+        keys = (list(game_data.keys[:3]) + [0, 0, 0])[:3]
+
+        with self._lock:
+            self._data[self._next] = (
+                t,
+                game_data.seq,
+                game_data.mouse_press,
+                game_data.mouse_x,
+                game_data.mouse_y,
+                game_data.key_num,
+                keys,
+            )
+            self._next = (self._next + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    def latest(self) -> np.void | None:
+        """
+        获取最新的一条记录
+
+        Returns:
+            np.void | None: 记录 (按字段名访问，如 record["mouse_x"])，无数据时返回 None
+        """
+
+        with self._lock:
+            if self._count == 0:
+                return None
+            return self._data[self._next - 1].copy()
+
+
+    def _ordered(self) -> np.ndarray:
+        """
+        按时间先后排列的全部记录 (调用方需持有锁，返回副本)
+        """
+
+        if self._count < self.capacity:
+            return self._data[:self._count].copy()
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+
+    def window(self, seconds: float, now: float | None = None) -> np.ndarray:
+        """
+        获取最近一段时间内的记录
+
+        Args:
+            seconds (float): 时间窗长度（秒）
+            now (float | None): 时间窗的结束时刻 time.monotonic()，None 表示当前时刻
+        Returns:
+            np.ndarray: 按时间先后排列的记录 (副本)
+        """
+
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            ordered = self._ordered()
+
+        start = np.searchsorted(ordered["t"], now - seconds, side="left")
+        end = np.searchsorted(ordered["t"], now, side="right")
+        return ordered[start:end]
+
+
+    def mouse_velocity(self, seconds: float, now: float | None = None) -> tuple[float, float]:
+        """
+        计算最近一段时间内鼠标的平均移动速度
+
+        Args:
+            seconds (float): 时间窗长度（秒）
+            now (float | None): 时间窗的结束时刻 time.monotonic()，None 表示当前时刻
+        Returns:
+            tuple[float, float]: (x 速度, y 速度)，单位为鼠标移动距离 / 秒
+        """
+
+        records = self.window(seconds, now)
+        if len(records) == 0 or seconds <= 0:
+            return 0.0, 0.0
+
+        return (
+            float(records["mouse_x"].sum(dtype=np.int64)) / seconds,
+            float(records["mouse_y"].sum(dtype=np.int64)) / seconds,
+        )
+
+
+    def key_pressed_ratio(self, key: int, seconds: float, now: float | None = None) -> float:
+        """
+        计算最近一段时间内某按键处于按下状态的数据包比例
+
+        Args:
+            key (int): 按键 ord 值
+            seconds (float): 时间窗长度（秒）
+            now (float | None): 时间窗的结束时刻 time.monotonic()，None 表示当前时刻
+        Returns:
+            float: [0, 1]，时间窗内无数据时返回 0
+        """
+
+        records = self.window(seconds, now)
+        if len(records) == 0:
+            return 0.0
+
+        return float((records["keys"] == key).any(axis=1).mean())
+
+
+__all__ = [
+    "GAME_DATA_DTYPE",
+    "GameDataHistory",
+]
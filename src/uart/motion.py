@@ -0,0 +1,556 @@
+# motion.py
+# 云台运动执行器 (非阻塞)
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# gimbal.py 中的 rotate_gimbal() 等函数用 time.sleep 串起分步指令，调用方会被阻塞且无法中途打断。
+# 本模块在后台线程中按各自的时间线执行运动目标:
+#   - submit 时即完成参数检查与分步规划，立即返回 MotionHandle
+#   - 每一步之间的等待都可以被打断，新的目标会立即抢占当前目标
+#   - handle.cancel() 取消后云台立即停止
+#
+# 用法:
+#   executor = GimbalMotionExecutor()
+#   handle = executor.rotate(yaw=180, vyaw=180)
+#   ...
+#   executor.rotate(yaw=-30, vyaw=360)   # 发现新目标 直接抢占
+#   handle.result()                      # -> False (被抢占)
+#   executor.rotate_to_yaw(720)          # 按连续偏航角估计转到绝对朝向 (见 yaw.py)
+#
+
+import math
+import time
+import threading
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator
+
+from src import logger
+from src.cancellation import CancellationToken
+from .gimbal import _move_gimbal, _move_gimbal_absolute, send_gimbal_speed
+from .yaw import YawTracker
+
+
+# 下位机单次可接受的最大相对角度（留有安全余量）
+MAX_STEP_ANGLE = 50.0
+# 未指定速度时每一步的等待时间（秒）
+DEFAULT_STEP_TIME = 0.5
+# 每一步额外等待的时间（秒），确保云台跟上指令
+STEP_MARGIN = 0.1
+# rotate_to_yaw() 认为已到达目标的偏航角误差 (°)
+YAW_TOLERANCE = 0.5
+# rotate_to_yaw() 在规划步数之外最多追加的修正步数
+MAX_YAW_CORRECTIONS = 3
+
+
+@dataclass
+class _Step:
+    """
+    运动目标中的一步
+    """
+
+    send:     Callable[[], None] # 发送该步的指令
+    duration: float | None       # 发送后等待的时间（秒），None 表示一直保持到被取消 / 抢占
+
+
+class MotionHandle:
+    """
+    运动目标句柄
+    """
+
+    def __init__(self, executor: "GimbalMotionExecutor", name: str):
+        self.name: str = name
+        self.future: Future[bool] = Future() # 完成时为 True，被取消 / 抢占时为 False
+        self.preempted: bool = False         # 是否被新的目标抢占
+        self._cancel = threading.Event()
+        self._executor = executor
+
+
+    def cancel(self) -> bool:
+        """
+        取消该运动目标 (立即返回) 正在执行时云台会立即停止
+
+        Returns:
+            bool: 是否成功取消 (已结束的目标返回 False)
+        """
+
+        if self.future.done():
+            return False
+        self._cancel.set()
+        self._executor._wake()
+        return True
+
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        是否已被取消
+        """
+        return self._cancel.is_set()
+
+
+    def done(self) -> bool:
+        """
+        是否已结束 (完成 / 取消 / 抢占 / 出错)
+        """
+        return self.future.done()
+
+
+    def result(self, timeout: float | None = None, token: CancellationToken | None = None) -> bool:
+        """
+        等待运动目标结束
+
+        Args:
+            timeout (float | None): 超时时间，单位秒，None 表示无限等待
+            token (CancellationToken | None): 取消令牌，等待期间被取消时同时取消该运动目标 (云台立即停止)
+        Returns:
+            bool: True 表示运动完成，False 表示被取消或抢占
+        Raises:
+            TimeoutError: 超时仍未结束
+            OperationCancelled: 等待期间 token 被取消
+            Exception: 发送指令时出现的异常
+        """
+
+        if token is None:
+            return self.future.result(timeout)
+
+        token.add_callback(self.cancel)
+        try:
+            return token.wait_for(self.future, timeout)
+        finally:
+            token.remove_callback(self.cancel)
+
+
+    def __repr__(self) -> str:
+        state = "done" if self.done() else "running"
+        return f"MotionHandle({self.name}, {state})"
+
+
+class GimbalMotionExecutor:
+    """
+    云台运动执行器 单例类
+    同一时刻只执行一个运动目标，新目标会抢占旧目标
+    """
+
+    def __init__(self):
+
+        # 单例类 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
+        self._cond = threading.Condition()
+        self._pending: tuple[MotionHandle, Iterable[_Step]] | None = None # 等待执行的目标 (只保留最新的一个)
+        self._current: MotionHandle | None = None
+        self._thread: threading.Thread | None = None
+        self._stop: bool = False
+
+
+    # === 运动目标 ===
+
+    def rotate(
+        self,
+        pitch: float | None = None,
+        yaw: float | None = None,
+        vpitch: float | None = None,
+        vyaw: float | None = None
+    ) -> MotionHandle:
+        """
+        相对角度旋转 (支持滑环 360°) 语义同 rotate_gimbal()
+        yaw 按最短路径归一化到 [-180, 180)，超过 ±50° 时自动分步
+
+        Args:
+            pitch (float | None):  俯仰角度（相对），范围 [-55, 55] (°)
+            yaw (float | None):    偏航角度（相对），无范围限制 (°)
+            vpitch (float | None): 俯仰速度，范围 [0, 540] (°/s)
+            vyaw (float | None):   偏航速度，范围 [0, 540] (°/s)
+        Returns:
+            MotionHandle: 运动目标句柄
+        Raises:
+            ValueError: 参数不在范围内或 pitch / yaw 均为 None
+        """
+
+        _check_speed(vpitch, vyaw)
+        if pitch is None and yaw is None:
+            raise ValueError("至少需要提供 pitch 或 yaw 参数")
+        if pitch is not None and not (-55 <= pitch <= 55):
+            raise ValueError(f"Pitch 超出硬件限制 [-55, 55]°: {pitch}°")
+
+        steps = _plan_relative(pitch, None if yaw is None else ((yaw + 180) % 360) - 180, vpitch, vyaw)
+        return self._submit(f"rotate p={pitch} y={yaw}", steps)
+
+
+    def rotate_absolute(
+        self,
+        pitch: float | None = None,
+        yaw: float | None = None,
+        vpitch: float | None = None,
+        vyaw: float | None = None
+    ) -> MotionHandle:
+        """
+        绝对角度旋转 语义同 rotate_gimbal_absolute()
+        yaw 超出 [-250, 250]° 时交给 rotate_to_yaw()，按连续偏航角估计只发送残差
+
+        Args:
+            pitch (float | None):  俯仰角度（绝对），范围 [-25, 30] (°)
+            yaw (float | None):    偏航角度（绝对） (°)
+            vpitch (float | None): 俯仰速度，范围 [0, 540] (°/s)
+            vyaw (float | None):   偏航速度，范围 [0, 540] (°/s)
+        Returns:
+            MotionHandle: 运动目标句柄
+        Raises:
+            ValueError: 参数不在范围内或 pitch / yaw 均为 None
+        """
+
+        _check_speed(vpitch, vyaw)
+        if pitch is None and yaw is None:
+            raise ValueError("至少需要提供 pitch 或 yaw 参数")
+        if pitch is not None and not (-25 <= pitch <= 30):
+            raise ValueError(f"Pitch 绝对角度超出硬件限制 [-25, 30]°: {pitch}°")
+
+        ivp = int(vpitch) if vpitch is not None else None
+        ivy = int(vyaw) if vyaw is not None else None
+
+        if yaw is not None and not (-250 <= yaw <= 250):
+            # 超出绝对角度范围 按连续偏航角估计只发送残差
+            return self.rotate_to_yaw(yaw, vyaw, pitch, vpitch)
+
+        duration = _step_time(max(abs(pitch or 0), abs(yaw or 0)), max(vpitch or 0, vyaw or 0) or None)
+        steps = [_Step(lambda: _move_gimbal_absolute(pitch, yaw, ivp, ivy), duration)]
+        return self._submit(f"rotate_absolute p={pitch} y={yaw}", steps)
+
+
+    def rotate_to_yaw(
+        self,
+        yaw: float,
+        vyaw: float | None = None,
+        pitch: float | None = None,
+        vpitch: float | None = None,
+        shortest: bool = False,
+        tolerance: float = YAW_TOLERANCE
+    ) -> MotionHandle:
+        """
+        转到指定的绝对偏航角 (不受 [-250, 250]° 限制)
+        每一步发送前都重新读取 YawTracker 的估计，只发送 "目标 - 当前" 的残差 (不超过 ±50°)，
+        开启云台姿态推送时可在几步之内消除上一步的误差，无需回中
+
+        Args:
+            yaw (float):   目标偏航角（绝对，连续多圈） (°)
+            vyaw (float | None):   偏航速度，范围 [0, 540] (°/s)
+            pitch (float | None):  俯仰角度（绝对），范围 [-25, 30] (°)，在第一步发送
+            vpitch (float | None): 俯仰速度，范围 [0, 540] (°/s)
+            shortest (bool): 是否按最短路径转到同一朝向 (忽略圈数)。默认 False: 720° 会真的多转两圈
+            tolerance (float): 认为已到达的误差 (°)
+        Returns:
+            MotionHandle: 运动目标句柄
+        Raises:
+            ValueError: 参数不在范围内
+        """
+
+        _check_speed(vpitch, vyaw)
+        if pitch is not None and not (-25 <= pitch <= 30):
+            raise ValueError(f"Pitch 绝对角度超出硬件限制 [-25, 30]°: {pitch}°")
+
+        steps = _plan_to_yaw(yaw, vyaw, pitch, vpitch, shortest, tolerance)
+        return self._submit(f"rotate_to_yaw p={pitch} y={yaw}", steps)
+
+
+    def speed(self, pitch: float, yaw: float, duration: float | None = None) -> MotionHandle:
+        """
+        以指定速度转动云台 到时间后停止 (不回中)
+
+        Args:
+            pitch (float): 俯仰速度，范围 [-450, 450] (°/s)
+            yaw (float):   偏航速度，范围 [-450, 450] (°/s)
+            duration (float | None): 持续时间（秒），None 表示一直转动直到被取消 / 抢占
+        Returns:
+            MotionHandle: 运动目标句柄
+        Raises:
+            ValueError: 速度不在范围内
+        """
+
+        if not (-450 <= pitch <= 450 and -450 <= yaw <= 450):
+            raise ValueError("速度参数不在范围内: pitch, yaw 必须在 [-450, 450] (°/s)")
+
+        steps = [_Step(lambda: send_gimbal_speed(pitch, yaw), duration)]
+        if duration is not None:
+            steps.append(_Step(lambda: send_gimbal_speed(0, 0), 0.0))
+        return self._submit(f"speed p={pitch} y={yaw}", steps)
+
+
+    def recenter(self, vpitch: int = 180, vyaw: int = 180) -> MotionHandle:
+        """
+        云台回中 (pitch=0°, yaw=0°) 同 set_gimbal_recenter()
+
+        Args:
+            vpitch (int): 俯仰速度，范围 [0, 540] (°/s)
+            vyaw (int):   偏航速度，范围 [0, 540] (°/s)
+        Returns:
+            MotionHandle: 运动目标句柄
+        """
+
+        _check_speed(vpitch, vyaw)
+        duration = 55 / max(vpitch, vyaw, 1) + 0.5
+        return self._submit("recenter", [_Step(lambda: _move_gimbal_absolute(0, 0, vpitch, vyaw), duration)])
+
+
+    def cancel(self) -> None:
+        """
+        取消当前及等待中的运动目标
+        """
+
+        with self._cond:
+            pending, self._pending = self._pending, None
+            current = self._current
+        if pending is not None:
+            _finish(pending[0], False)
+        if current is not None:
+            current.cancel()
+
+
+    @property
+    def current(self) -> MotionHandle | None:
+        """
+        正在执行的运动目标
+        """
+        return self._current
+
+
+    # === 执行 ===
+
+    def _submit(self, name: str, steps: Iterable[_Step]) -> MotionHandle:
+        """
+        提交运动目标 抢占当前目标
+        """
+
+        handle = MotionHandle(self, name)
+
+        with self._cond:
+            replaced = self._pending
+            self._pending = (handle, steps)
+            self._cond.notify_all()
+
+            if self._thread is None or not self._thread.is_alive():
+                self._stop = False
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+
+        # 尚未开始执行就被替换的目标
+        if replaced is not None:
+            replaced[0].preempted = True
+            _finish(replaced[0], False)
+
+        return handle
+
+
+    def _wake(self) -> None:
+        """
+        打断正在进行的等待
+        """
+
+        with self._cond:
+            self._cond.notify_all()
+
+
+    def _interrupted(self, handle: MotionHandle) -> bool:
+        """
+        当前目标是否需要中止 (调用方需持有锁)
+        """
+        return self._stop or self._pending is not None or handle.cancelled
+
+
+    def _worker(self) -> None:
+        """
+        执行线程 循环函数
+        """
+
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                handle, steps = self._pending # type: ignore[misc]
+                self._pending = None
+                self._current = handle
+
+            try:
+                completed = self._run(handle, steps)
+            except Exception as e:
+                logger.error(f"云台运动 {handle.name} 出现异常: {e}")
+                _finish(handle, exception=e)
+            else:
+                if not completed:
+                    with self._cond:
+                        handle.preempted = self._pending is not None and not handle.cancelled
+                    if not handle.preempted:
+                        send_gimbal_speed(0, 0) # 取消后立即停止云台
+                _finish(handle, completed)
+            finally:
+                with self._cond:
+                    if self._current is handle:
+                        self._current = None
+
+
+    def _run(self, handle: MotionHandle, steps: Iterable[_Step]) -> bool:
+        """
+        按时间线执行运动目标的每一步
+        steps 可以是生成器，下一步在上一步的等待结束后才生成
+
+        Returns:
+            bool: 是否全部完成 (False 表示被取消 / 抢占)
+        """
+
+        for step in steps:
+            with self._cond:
+                if self._interrupted(handle):
+                    return False
+
+            step.send()
+
+            deadline = math.inf if step.duration is None else time.monotonic() + step.duration
+            with self._cond:
+                while not self._interrupted(handle):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(None if remaining == math.inf else remaining)
+                else:
+                    return False
+
+        return True
+
+
+    def shutdown(self, timeout: float | None = 1.0) -> None:
+        """
+        取消全部目标并停止执行线程
+        """
+
+        self.cancel()
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+
+    # === 单例类机制 ===
+    # 单例类设计
+    _instance: 'GimbalMotionExecutor | None' = None
+    _instance_lock = threading.Lock() # 线程锁 防止多个线程同时访问该类造成问题
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = super(GimbalMotionExecutor, cls).__new__(cls)
+        return cls._instance
+
+
+def _check_speed(vpitch: float | None, vyaw: float | None) -> None:
+    """
+    检查速度参数
+    """
+
+    if (vpitch is not None and not (0 <= vpitch <= 540)) or \
+       (vyaw is not None and not (0 <= vyaw <= 540)):
+        raise ValueError("速度参数不在范围内: vpitch, vyaw 必须在 [0, 540] (°/s)")
+
+
+def _step_time(angle: float, speed: float | None) -> float:
+    """
+    以 speed 转过 angle 所需的等待时间
+    """
+
+    if speed is None or speed <= 0:
+        return DEFAULT_STEP_TIME
+    return abs(angle) / speed + STEP_MARGIN
+
+
+def _plan_relative(
+    pitch: float | None,
+    yaw: float | None,
+    vpitch: float | None,
+    vyaw: float | None
+) -> list[_Step]:
+    """
+    把相对旋转拆分为不超过 ±MAX_STEP_ANGLE 的若干步 pitch 只在第一步发送
+    """
+
+    steps: list[_Step] = []
+
+    if yaw is None:
+        return [_Step(lambda: _move_gimbal(pitch, None, vpitch, None), _step_time(pitch or 0, vpitch))]
+
+    remaining = yaw
+    first = True
+    while first or abs(remaining) > 0.1:
+        step = max(-MAX_STEP_ANGLE, min(MAX_STEP_ANGLE, remaining))
+        remaining -= step
+
+        if first:
+            p, vp = pitch, vpitch
+            duration = max(_step_time(step, vyaw), _step_time(pitch, vpitch) if pitch is not None else 0)
+        else:
+            p, vp = None, None
+            duration = _step_time(step, vyaw)
+
+        steps.append(_Step(lambda p=p, y=step, vp=vp: _move_gimbal(p, y, vp, vyaw), duration))
+        first = False
+
+    return steps
+
+
+def _plan_to_yaw(
+    target: float,
+    vyaw: float | None,
+    pitch: float | None,
+    vpitch: float | None,
+    shortest: bool,
+    tolerance: float
+) -> Iterator[_Step]:
+    """
+    按连续偏航角估计逐步生成残差指令 每一步都在上一步等待结束后才计算
+    步数不超过初始残差所需的步数 + MAX_YAW_CORRECTIONS，避免反馈异常时无限修正
+    """
+
+    tracker = YawTracker()
+
+    if pitch is not None:
+        ivp = int(vpitch) if vpitch is not None else None
+        yield _Step(lambda: _move_gimbal_absolute(pitch, None, ivp, None), 0.0)
+
+    residual = tracker.residual(target, shortest)
+    max_steps = math.ceil(abs(residual) / MAX_STEP_ANGLE) + MAX_YAW_CORRECTIONS
+
+    for _ in range(max_steps):
+        if abs(residual) <= tolerance:
+            return
+        step = max(-MAX_STEP_ANGLE, min(MAX_STEP_ANGLE, residual))
+        yield _Step(lambda y=step: _move_gimbal(None, y, None, vyaw), _step_time(step, vyaw))
+        residual = tracker.residual(target, shortest)
+
+    if abs(residual) > tolerance:
+        logger.warning(f"云台偏航角未能收敛到目标 {target}°，剩余误差 {residual:.2f}°")
+
+
+def _finish(handle: MotionHandle, completed: bool = False, exception: BaseException | None = None) -> None:
+    """
+    结束运动目标的 Future
+    """
+
+    if handle.future.done():
+        return
+    if exception is not None:
+        handle.future.set_exception(exception)
+    else:
+        handle.future.set_result(completed)
+
+
+__all__ = [
+    "MotionHandle",
+    "GimbalMotionExecutor",
+]
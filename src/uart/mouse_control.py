@@ -0,0 +1,285 @@
+# mouse_control.py
+# 鼠标操控云台
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 比赛数据 (game msg push) 中的鼠标位移到达时，立即在 DataHolder 的处理线程中
+# 换算为云台速度指令发出，不经过任何轮询:
+#   鼠标位移 -> 死区 / 灵敏度曲线 -> 平滑 -> gimbal speed
+# 数据包中断超过 MOUSE_CTRL_TIMEOUT 时由看门狗线程停止云台。
+#
+# 同时统计 数据包到达 -> 指令入队 / 指令写入串口 的延迟，见 get_stats()。
+#
+# 用法:
+#   control = MouseGimbalControl()
+#   control.start()
+#   control.enabled = False   # 自瞄等技能接管云台时暂停
+#
+
+import math
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable
+
+from src import config
+from src import logger
+from .dataholder import DataHolder, GameData
+from .events import Event, EventBus, EventType
+from .gimbal import send_gimbal_speed
+
+
+# 鼠标位移的满量程
+MOUSE_RANGE = 100
+
+
+def mouse_curve(delta: float, max_speed: float) -> float:
+    """
+    灵敏度曲线 把一个数据包内的鼠标位移换算为云台速度
+
+    Args:
+        delta (float): 鼠标位移 [-100, 100]
+        max_speed (float): 满量程对应的速度 (°/s)
+    Returns:
+        float: 云台速度 (°/s)
+    """
+
+    deadzone = config.MOUSE_CTRL_DEADZONE
+    magnitude = abs(delta) - deadzone
+    if magnitude <= 0:
+        return 0.0
+
+    normalized = min(1.0, magnitude / (MOUSE_RANGE - deadzone))
+    return math.copysign(max_speed * normalized ** config.MOUSE_CTRL_EXPONENT, delta)
+
+
+class MouseGimbalControl:
+    """
+    鼠标操控云台 单例类
+    """
+
+    def __init__(self, send: Callable[[float, float], Future[bool] | None] = send_gimbal_speed):
+        """
+        Args:
+            send (Callable[[float, float], Future[bool] | None]): 发送 (pitch, yaw) 速度指令的函数，
+                返回写入完成的 Future 时统计写入延迟
+        """
+
+        # 单例类 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
+        self._send = send
+        self._events: EventBus | None = None
+        self._enabled: bool = True
+
+        self._lock = threading.Lock()
+        self._output: tuple[float, float] = (0.0, 0.0) # 平滑后的速度
+        self._command: tuple[float, float] = (0.0, 0.0) # 最近一次发送的速度
+        self._last_packet: float = 0.0
+
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        # 统计
+        self.packets: int = 0
+        self.commands: int = 0
+        self.timeouts: int = 0
+        self._enqueue_latency: deque[float] = deque(maxlen=1000) # 数据包到达 -> 指令入队
+        self._write_latency: deque[float] = deque(maxlen=1000)   # 数据包到达 -> 指令写入串口
+
+
+    # === 启停 ===
+
+    def start(self, events: EventBus | None = None) -> None:
+        """
+        订阅比赛数据并启动看门狗线程
+
+        Args:
+            events (EventBus | None): 事件总线，None 表示使用 DataHolder 的事件总线
+        """
+
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._events = events or DataHolder().events
+        self._events.subscribe(self.on_game_data, [EventType.GAME_DATA])
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watchdog, daemon=True)
+        self._thread.start()
+
+
+    def stop(self, timeout: float | None = 1.0) -> None:
+        """
+        取消订阅并停止云台
+        """
+
+        if self._events is not None:
+            self._events.unsubscribe(self.on_game_data)
+            self._events = None
+
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+        self._reset()
+
+
+    @property
+    def enabled(self) -> bool:
+        """
+        是否响应鼠标输入
+        """
+        return self._enabled
+
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._enabled = value
+        if not value:
+            self._reset()
+
+
+    def _reset(self) -> None:
+        """
+        清除平滑状态 云台在转动时让它停止
+        """
+
+        with self._lock:
+            self._output = (0.0, 0.0)
+            if self._command != (0.0, 0.0):
+                self._command = (0.0, 0.0)
+                self._send(0.0, 0.0)
+                self.commands += 1
+
+
+    # === 输入 ===
+
+    def on_game_data(self, event: Event) -> None:
+        """
+        比赛数据事件回调 (在 DataHolder 的处理线程中执行)
+        """
+
+        if not self._enabled:
+            return
+
+        game_data: GameData = event.payload
+        arrived = event.timestamp
+
+        yaw = mouse_curve(game_data.mouse_x, config.MOUSE_CTRL_MAX_SPEED_YAW)
+        pitch = -mouse_curve(game_data.mouse_y, config.MOUSE_CTRL_MAX_SPEED_PITCH)
+        if config.MOUSE_CTRL_INVERT_Y:
+            pitch = -pitch
+
+        with self._lock:
+            self.packets += 1
+            self._last_packet = arrived
+
+            # 一阶低通平滑 输入归零且输出已很小时直接归零，避免拖尾
+            alpha = config.MOUSE_CTRL_SMOOTHING
+            output = (
+                alpha * self._output[0] + (1 - alpha) * pitch,
+                alpha * self._output[1] + (1 - alpha) * yaw,
+            )
+            if pitch == 0 and abs(output[0]) < 1.0:
+                output = (0.0, output[1])
+            if yaw == 0 and abs(output[1]) < 1.0:
+                output = (output[0], 0.0)
+            self._output = output
+
+            # 只在速度变化时发送 降低链路占用
+            if abs(output[0] - self._command[0]) < 0.5 and abs(output[1] - self._command[1]) < 0.5 and \
+               (output != (0.0, 0.0) or self._command == (0.0, 0.0)):
+                return
+
+            future = self._send(output[0], output[1])
+            self._enqueue_latency.append(time.monotonic() - arrived)
+            self._command = output
+            self.commands += 1
+
+        if future is not None:
+            future.add_done_callback(lambda f: self._on_written(f, arrived))
+
+
+    def _on_written(self, future: Future[bool], arrived: float) -> None:
+        """
+        指令写入串口 (或被新速度替换) 时的回调
+        """
+
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        self._write_latency.append(time.monotonic() - arrived)
+
+
+    def _watchdog(self) -> None:
+        """
+        看门狗线程 数据包中断时停止云台
+        """
+
+        timeout = config.MOUSE_CTRL_TIMEOUT
+        while not self._stop.wait(timeout / 2):
+            with self._lock:
+                expired = self._command != (0.0, 0.0) and time.monotonic() - self._last_packet > timeout
+            if expired:
+                self.timeouts += 1
+                logger.debug(f"鼠标数据包超过 {timeout} 秒未到达，停止云台")
+                self._reset()
+
+
+    # === 统计 ===
+
+    def get_stats(self) -> dict[str, float | int | None]:
+        """
+        获取统计信息
+
+        Returns:
+            dict[str, float | int | None]:
+                packets: 处理的数据包数
+                commands: 发送的速度指令数
+                timeouts: 看门狗停止云台的次数
+                enqueue_p50_ms / enqueue_p99_ms: 数据包到达 -> 指令入队 的延迟
+                write_p50_ms / write_p99_ms / write_max_ms: 数据包到达 -> 指令写入串口 的延迟
+        """
+
+        enqueue = sorted(self._enqueue_latency)
+        write = sorted(self._write_latency)
+
+        def pick(values: list[float], q: float) -> float | None:
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 3)
+
+        return {
+            "packets": self.packets,
+            "commands": self.commands,
+            "timeouts": self.timeouts,
+            "enqueue_p50_ms": pick(enqueue, 0.50),
+            "enqueue_p99_ms": pick(enqueue, 0.99),
+            "write_p50_ms": pick(write, 0.50),
+            "write_p99_ms": pick(write, 0.99),
+            "write_max_ms": round(write[-1] * 1000, 3) if write else None,
+        }
+
+
+    # === 单例类机制 ===
+    # 单例类设计
+    _instance: 'MouseGimbalControl | None' = None
+    _instance_lock = threading.Lock() # 线程锁 防止多个线程同时访问该类造成问题
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = super(MouseGimbalControl, cls).__new__(cls)
+        return cls._instance
+
+
+__all__ = [
+    "mouse_curve",
+    "MouseGimbalControl",
+]
@@ -0,0 +1,302 @@
+# recorder.py
+# 串口流量录制与回放模块
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 录制文件格式 (小端):
+#   文件头: b"RMYCSER1" + <d 录制开始的 time.time()> + <d 同一时刻的 time.monotonic()>
+#   记录:   <d time.monotonic()> + <B 方向 0=RX 1=TX> + <H 数据长度> + UTF-8 数据
+#
+# 用法:
+#   $ python -m src.uart.recorder dump   match.bin
+#   $ python -m src.uart.recorder replay match.bin --speed 0   # 0 表示尽快回放
+#
+
+import sys
+import time
+import struct
+import argparse
+import threading
+from collections import deque
+from typing import BinaryIO, Iterator, NamedTuple
+
+from src import logger
+
+
+MAGIC = b"RMYCSER1"
+HEADER = struct.Struct("<dd")
+RECORD = struct.Struct("<dBH")
+
+DIRECTION_RX = 0
+DIRECTION_TX = 1
+
+
+class TrafficRecord(NamedTuple):
+    """
+    单条录制记录
+    """
+
+    timestamp: float # 录制时的 time.monotonic()
+    direction: int   # DIRECTION_RX / DIRECTION_TX
+    line:      str   # 数据 (不含结束符)
+
+
+class TrafficRecorder:
+    """
+    串口流量录制器
+    record() 只做一次 deque.append，编码与写文件都在后台线程中批量完成
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        """
+        Args:
+            path (str): 录制文件路径 (追加写入)
+            flush_interval (float): 后台线程写文件的间隔（秒）
+        """
+
+        self.path: str = path
+        self.flush_interval: float = flush_interval
+
+        self._file: BinaryIO | None = None
+        self._pending: deque[tuple[float, int, str]] = deque()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        # 统计
+        self.records: int = 0
+        self.bytes: int = 0
+
+
+    def start(self) -> bool:
+        """
+        打开文件并启动后台写入线程
+
+        Returns:
+            bool: 是否成功启动
+        """
+
+        try:
+            self._file = open(self.path, "ab", buffering=64 * 1024)
+            if self._file.tell() == 0:
+                self._file.write(MAGIC + HEADER.pack(time.time(), time.monotonic()))
+        except OSError as e:
+            logger.error(f"打开串口录制文件 出现异常: {e}")
+            return False
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+        return True
+
+
+    def record(self, direction: int, timestamp: float, line: str) -> None:
+        """
+        记录一行数据 (线程安全，不阻塞)
+
+        Args:
+            direction (int): DIRECTION_RX / DIRECTION_TX
+            timestamp (float): time.monotonic() 时间戳
+            line (str): 数据
+        """
+        self._pending.append((timestamp, direction, line))
+
+
+    def _drain(self) -> None:
+        """
+        把已记录的数据编码写入文件
+        """
+
+        chunks: list[bytes] = []
+        pending = self._pending
+        while pending:
+            timestamp, direction, line = pending.popleft()
+            data = line.encode("utf-8")[:0xFFFF]
+            chunks.append(RECORD.pack(timestamp, direction, len(data)))
+            chunks.append(data)
+            self.records += 1
+            self.bytes += RECORD.size + len(data)
+
+        if chunks and self._file is not None:
+            self._file.write(b"".join(chunks))
+            self._file.flush()
+
+
+    def _worker(self) -> None:
+        """
+        后台写入线程
+        """
+
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"写入串口录制文件 出现异常: {e}")
+
+
+    def stop(self) -> None:
+        """
+        写完剩余数据并关闭文件
+        """
+
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+        try:
+            self._drain()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_log(path: str) -> Iterator[TrafficRecord]:
+    """
+    逐条读取录制文件
+
+    Args:
+        path (str): 录制文件路径
+    Yields:
+        TrafficRecord: 录制记录
+    Raises:
+        ValueError: 文件头不正确
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} 不是串口录制文件")
+        f.read(HEADER.size)
+
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            timestamp, direction, length = RECORD.unpack(head)
+            data = f.read(length)
+            if len(data) < length:
+                return # 录制中断留下的半条记录
+            yield TrafficRecord(timestamp, direction, data.decode("utf-8", errors="replace"))
+
+
+def replay(path: str, speed: float | None = 1.0, stop: threading.Event | None = None) -> int:
+    """
+    把录制文件中的 RX 数据重新送入 conn 的接收队列，供 DataHolder 等照常处理
+    接收队列满时等待消费者取走数据，回放不会丢行 (需要有消费者在运行)
+
+    Args:
+        path (str): 录制文件路径
+        speed (float | None): 回放倍速，1.0 为原速，None 或 0 表示尽快回放
+        stop (threading.Event | None): 置位后提前结束回放
+    Returns:
+        int: 回放的行数
+    """
+
+    from . import conn
+
+    count = 0
+    origin: float | None = None
+    start = time.monotonic()
+
+    for record in read_log(path):
+        if stop is not None and stop.is_set():
+            break
+        if record.direction != DIRECTION_RX:
+            continue
+
+        if speed:
+            if origin is None:
+                origin = record.timestamp
+            delay = (record.timestamp - origin) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+        # 回放不能丢数据 队列满时等待消费者
+        while not conn.inject_rx_line(record.line, block=True, timeout=0.1):
+            if stop is not None and stop.is_set():
+                return count
+        count += 1
+
+    return count
+
+
+def _dump(path: str) -> None:
+    """
+    以文本形式打印录制文件
+    """
+
+    origin: float | None = None
+    for record in read_log(path):
+        if origin is None:
+            origin = record.timestamp
+        label = "RX" if record.direction == DIRECTION_RX else "TX"
+        sys.stdout.write(f"{record.timestamp - origin:10.4f} {label} {record.line}\n")
+
+
+def _replay_into_dataholder(path: str, speed: float) -> None:
+    """
+    回放录制文件并交给 DataHolder 处理，统计解析耗时
+    """
+
+    from . import conn
+    from .dataholder import DataHolder
+
+    holder = DataHolder()
+    dropped = conn.get_rx_stats()["dropped"]
+    done = threading.Event()
+    total = [0]
+
+    def _feed() -> None:
+        total[0] = replay(path, speed)
+        done.set()
+
+    threading.Thread(target=_feed, daemon=True).start()
+
+    busy = 0.0
+    while not done.is_set():
+        t0 = time.perf_counter()
+        holder.fetch_and_process()
+        busy += time.perf_counter() - t0
+        time.sleep(0.001)
+
+    t0 = time.perf_counter()
+    holder.fetch_and_process()
+    busy += time.perf_counter() - t0
+
+    dropped = int(conn.get_rx_stats()["dropped"]) - int(dropped)
+    logger.info(f"回放完成: {total[0] - dropped} 行 (接收队列溢出丢弃 {dropped} 行), DataHolder 处理总耗时 {busy * 1000:.1f} ms")
+
+
+__all__ = [
+    "DIRECTION_RX",
+    "DIRECTION_TX",
+    "TrafficRecord",
+    "TrafficRecorder",
+    "read_log",
+    "replay",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="串口流量录制文件工具")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    dump_parser = sub.add_parser("dump", help="以文本形式打印录制文件")
+    dump_parser.add_argument("path")
+
+    replay_parser = sub.add_parser("replay", help="回放录制文件并交给 DataHolder 处理")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示尽快回放")
+
+    args = parser.parse_args()
+    if args.action == "dump":
+        _dump(args.path)
+    else:
+        _replay_into_dataholder(args.path, args.speed)
+
+
+if __name__ == "__main__":
+    main()
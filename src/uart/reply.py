@@ -0,0 +1,213 @@
+# reply.py
+# 指令应答关联模块
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# SDK 明文协议的应答不带任何编号，但下位机严格按指令到达顺序逐条应答。
+# 因此只要按 *实际写入串口的顺序* 记录每条指令，收到的每条非推送数据
+# 就对应队首的那条指令。
+# 不在 SDK 模式时下位机只响应 "command;"，其余指令不登记；
+# 多出来的应答只会当作普通数据处理，而缺失的应答会造成错位，所以拿不准时宁可不登记。
+#
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+
+# 推送 / 事件数据前缀 这些数据不是对某条指令的应答
+PUSH_PREFIXES = (
+    "game msg push",
+    "gimbal push",
+    "chassis push",
+    "armor event",
+    "sound event",
+    "AI push",
+)
+
+
+# 推送频率可选值 (Hz)
+PUSH_FREQUENCIES = (1, 5, 10, 20, 30, 50)
+
+
+def is_push_line(line: str) -> bool:
+    """
+    判断一行数据是否为下位机主动推送的数据
+
+    Args:
+        line (str): 单行数据
+    Returns:
+        bool: 是否为推送数据
+    """
+    return line.startswith(PUSH_PREFIXES)
+
+
+def parse_numbers(reply: str | None, count: int) -> list[float] | None:
+    """
+    解析数值型应答，如 "-0.5 12.3;"
+
+    Args:
+        reply (str | None): 应答内容
+        count (int): 期望的数值个数
+    Returns:
+        list[float] | None: 解析结果，应答为空或格式不符时返回 None
+    """
+
+    if reply is None:
+        return None
+
+    try:
+        values = [float(v) for v in reply.rstrip(";").split()]
+    except ValueError:
+        return None
+
+    return values if len(values) == count else None
+
+
+class ReplyTracker:
+    """
+    应答关联器
+    按写入顺序记录等待应答的指令，并把收到的应答交给对应的 Future
+    """
+
+    def __init__(self, timeout: float, max_pending: int = 256):
+        """
+        Args:
+            timeout (float): 应答超时时间（秒），超时的记录会被丢弃，防止丢失一条应答后永久错位
+            max_pending (int): 最多同时记录的指令数
+        """
+
+        self._timeout: float = timeout
+        self._max_pending: int = max_pending
+
+        # 元素为 (应答 Future 或 None, 过期时间)
+        self._pending: deque[tuple[Future[str] | None, float]] = deque()
+        self._lock = threading.Lock()
+
+        # 按已写入的指令推断的下位机 SDK 模式状态
+        self.sdk_mode: bool = False
+
+        # 统计
+        self.matched: int = 0 # 交给请求 Future 的应答数
+        self.expired: int = 0 # 超时未收到应答的指令数
+
+
+    def _expire(self, now: float) -> None:
+        """
+        丢弃已过期的记录 (调用方需持有锁)
+        """
+
+        while self._pending and (self._pending[0][1] <= now or len(self._pending) > self._max_pending):
+            future, _ = self._pending.popleft()
+            self.expired += 1
+            if future is not None:
+                try:
+                    future.set_exception(TimeoutError("等待指令应答超时"))
+                except InvalidStateError:
+                    pass # 请求方已取消
+
+
+    def on_sent(self, payload: bytes, future: Future[str] | None) -> bool:
+        """
+        记录一条即将写入串口的指令 (只能由发送线程按写入顺序调用)
+
+        Args:
+            payload (bytes): 已编码的指令
+            future (Future[str] | None): 应答 Future，None 表示不关心应答内容
+        Returns:
+            bool: 是否登记为等待应答
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            if payload.startswith(b"command"):
+                self.sdk_mode = True
+            elif not self.sdk_mode:
+                # 下位机不会应答
+                if future is not None:
+                    try:
+                        future.set_exception(ConnectionError("未进入 SDK 模式，指令不会有应答"))
+                    except InvalidStateError:
+                        pass
+                return False
+            elif payload.startswith(b"quit"):
+                self.sdk_mode = False
+
+            self._pending.append((future, now + self._timeout))
+            self._expire(now)
+            return True
+
+
+    def forget_last(self, count: int) -> None:
+        """
+        撤销最近记录的若干条指令 (写入失败时调用)
+
+        Args:
+            count (int): 撤销的条数
+        """
+
+        with self._lock:
+            for _ in range(min(count, len(self._pending))):
+                future, _ = self._pending.pop()
+                if future is not None and not future.done():
+                    future.set_exception(ConnectionError("指令写入串口失败"))
+
+
+    def on_line(self, line: str) -> bool:
+        """
+        处理一条收到的非推送数据
+
+        Args:
+            line (str): 单行数据
+        Returns:
+            bool: 该数据是否已被某个请求消费 (False 时应按普通数据处理)
+        """
+
+        with self._lock:
+            self._expire(time.monotonic())
+            if not self._pending:
+                return False
+            future, _ = self._pending.popleft()
+
+        if future is None:
+            return False
+
+        # 请求方已超时取消时 这条应答同样属于它，直接丢弃以保持对齐
+        try:
+            future.set_result(line)
+            self.matched += 1
+        except InvalidStateError:
+            pass
+        return True
+
+
+    def reset(self) -> None:
+        """
+        清空全部记录 (重新握手等场景)
+        """
+
+        with self._lock:
+            self.sdk_mode = False
+            while self._pending:
+                future, _ = self._pending.popleft()
+                if future is not None and not future.done():
+                    future.cancel()
+
+
+    @property
+    def in_flight(self) -> int:
+        """
+        等待应答的指令数
+        """
+        return len(self._pending)
+
+
+__all__ = [
+    "PUSH_PREFIXES",
+    "PUSH_FREQUENCIES",
+    "is_push_line",
+    "parse_numbers",
+    "ReplyTracker",
+]
@@ -0,0 +1,206 @@
+# rxbuffer.py
+# 有界串口接收缓冲
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+import threading
+from collections import deque
+
+
+# 缓冲满时的处理策略
+OVERFLOW_DROP_OLDEST = "drop_oldest" # 丢弃最旧的一行 (默认，保证拿到的总是最新数据)
+OVERFLOW_DROP_NEWEST = "drop_newest" # 丢弃新到的一行
+OVERFLOW_BLOCK       = "block"       # 接收线程等待消费者腾出空间 (超时后丢弃新到的一行)
+
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+
+
+class RxBuffer:
+    """
+    有界接收缓冲 (环形队列)
+    元素为 (到达时间 time.monotonic(), 行数据)
+    """
+
+    def __init__(self, capacity: int, policy: str = OVERFLOW_DROP_OLDEST, block_timeout: float = 0.5):
+        """
+        Args:
+            capacity (int): 最多缓存的行数
+            policy (str): 缓冲满时的处理策略 OVERFLOW_*
+            block_timeout (float): OVERFLOW_BLOCK 策略下接收线程最长等待时间（秒）
+        Raises:
+            ValueError: 如果 capacity 不为正数或 policy 未知
+        """
+
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"policy must be one of {OVERFLOW_POLICIES}")
+
+        self.capacity: int = capacity
+        self.policy: str = policy
+        self.block_timeout: float = block_timeout
+
+        self._items: deque[tuple[float, str]] = deque()
+        self._cond = threading.Condition()
+
+        # 统计
+        self.total: int = 0      # 累计放入的行数 (含被丢弃的)
+        self.dropped: int = 0    # 因溢出丢弃的行数
+        self.high_water: int = 0 # 历史最大深度
+
+
+    # === 生产者 ===
+
+    def put(self, item: tuple[float, str]) -> bool:
+        """
+        放入一行数据
+
+        Args:
+            item (tuple[float, str]): (到达时间, 行数据)
+        Returns:
+            bool: 该行是否被保留 (False 表示按策略丢弃了该行)
+        """
+
+        with self._cond:
+            self.total += 1
+
+            if len(self._items) >= self.capacity:
+                if self.policy == OVERFLOW_DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                elif self.policy == OVERFLOW_BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._items) >= self.capacity:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._cond.wait(remaining)
+                else:
+                    self.dropped += 1
+                    return False
+
+            self._items.append(item)
+            if len(self._items) > self.high_water:
+                self.high_water = len(self._items)
+            self._cond.notify_all()
+            return True
+
+
+    def put_wait(self, item: tuple[float, str], timeout: float | None = None) -> bool:
+        """
+        放入一行数据 缓冲满时不论溢出策略都等待消费者腾出空间 (回放等不允许丢数据的生产者使用)
+
+        Args:
+            item (tuple[float, str]): (到达时间, 行数据)
+            timeout (float | None): 最长等待时间，单位秒，None 表示无限等待
+        Returns:
+            bool: 是否已放入 (False 表示超时，该行未放入也不计入统计)
+        """
+
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._items) < self.capacity, timeout):
+                return False
+
+            self.total += 1
+            self._items.append(item)
+            if len(self._items) > self.high_water:
+                self.high_water = len(self._items)
+            self._cond.notify_all()
+            return True
+
+
+    # === 消费者 ===
+
+    def get(self, timeout: float | None = 0) -> tuple[float, str] | None:
+        """
+        取出最旧的一行
+
+        Args:
+            timeout (float | None): 超时时间，单位秒，0 表示不等待，None 表示无限等待
+        Returns:
+            tuple[float, str] | None: (到达时间, 行数据)，超时无数据时返回 None
+        """
+
+        with self._cond:
+            if not self._items and timeout != 0:
+                self._cond.wait_for(lambda: len(self._items) > 0, timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+
+    def drain(self, timeout: float | None = 0) -> list[tuple[float, str]]:
+        """
+        一次取出全部数据
+
+        Args:
+            timeout (float | None): 缓冲为空时最长等待时间，单位秒，0 表示不等待，None 表示无限等待
+        Returns:
+            list[tuple[float, str]]: 按到达顺序排列的数据，可能为空
+        """
+
+        with self._cond:
+            if not self._items and timeout != 0:
+                self._cond.wait_for(lambda: len(self._items) > 0, timeout)
+            items = list(self._items)
+            self._items.clear()
+            self._cond.notify_all()
+            return items
+
+
+    def snapshot(self) -> list[tuple[float, str]]:
+        """
+        复制当前全部数据 (不取出)
+
+        Returns:
+            list[tuple[float, str]]: 按到达顺序排列的数据
+        """
+
+        with self._cond:
+            return list(self._items)
+
+
+    def clear(self) -> None:
+        """
+        清空缓冲
+        """
+
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+    def stats(self) -> dict[str, int | str]:
+        """
+        获取缓冲统计信息
+
+        Returns:
+            dict[str, int | str]: depth / capacity / high_water / dropped / total / policy
+        """
+
+        return {
+            "depth": len(self._items),
+            "capacity": self.capacity,
+            "high_water": self.high_water,
+            "dropped": self.dropped,
+            "total": self.total,
+            "policy": self.policy,
+        }
+
+
+__all__ = [
+    "OVERFLOW_DROP_OLDEST",
+    "OVERFLOW_DROP_NEWEST",
+    "OVERFLOW_BLOCK",
+    "RxBuffer",
+]
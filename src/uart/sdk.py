@@ -20,6 +20,7 @@ def exit_sdk_mode() -> None:
     退出SDK模式。
     """
     conn.writeline("quit;")
+    conn.flush_tx(1.0) # 发送线程是守护线程，退出前确保指令已写出
 
 
 __all__ = [
@@ -0,0 +1,645 @@
+# simulator.py
+# 虚拟 RoboMaster S1 下位机
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 打开一个伪终端 (pty)，在从设备一端模拟 S1 的明文 SDK 协议，
+# 用于在没有实体机器人的 Linux 机器上调试 / 测试 / 压测 src/uart。
+#
+# 用法:
+#   $ python -m src.uart.simulator --baud 115200 --latency 0.002 --game-msg-rate 10
+#   把打印出的设备路径传给 conn.open_serial(port=...) 即可。
+#
+
+import os
+import sys
+import pty
+import tty
+import math
+import time
+import heapq
+import select
+import argparse
+import itertools
+import threading
+from dataclasses import dataclass, field
+
+from src import logger
+
+
+@dataclass
+class GimbalModel:
+    """
+    云台运动学模型
+    """
+
+    pitch:   float = 0.0 # 当前俯仰角 (°)
+    yaw:     float = 0.0 # 当前偏航角 (°) 滑环无限位
+    speed_p: float = 0.0 # 速度模式下的俯仰速度 (°/s)
+    speed_y: float = 0.0 # 速度模式下的偏航速度 (°/s)
+    target_p: float | None = None # 位置模式下的俯仰目标 (°)
+    target_y: float | None = None # 位置模式下的偏航目标 (°)
+    move_vp: float = 90.0 # 位置模式下的俯仰速度 (°/s)
+    move_vy: float = 90.0 # 位置模式下的偏航速度 (°/s)
+    suspended: bool = False
+
+    PITCH_MIN = -25.0
+    PITCH_MAX = 30.0
+
+    def step(self, dt: float) -> None:
+        if self.suspended:
+            return
+
+        if self.target_p is not None:
+            self.pitch = _approach(self.pitch, self.target_p, self.move_vp * dt)
+            if self.pitch == self.target_p:
+                self.target_p = None
+        else:
+            self.pitch += self.speed_p * dt
+
+        if self.target_y is not None:
+            self.yaw = _approach(self.yaw, self.target_y, self.move_vy * dt)
+            if self.yaw == self.target_y:
+                self.target_y = None
+        else:
+            self.yaw += self.speed_y * dt
+
+        self.pitch = max(self.PITCH_MIN, min(self.PITCH_MAX, self.pitch))
+
+
+@dataclass
+class ChassisModel:
+    """
+    底盘运动学模型 (世界坐标系，x 向前)
+    """
+
+    x:   float = 0.0 # 位置 (m)
+    y:   float = 0.0 # 位置 (m)
+    yaw: float = 0.0 # 朝向 (°)
+    vx:  float = 0.0 # 车体系速度 (m/s)
+    vy:  float = 0.0 # 车体系速度 (m/s)
+    vz:  float = 0.0 # 旋转速度 (°/s)
+    # chassis move 的剩余行程 (车体系 m, m, °) 与速度
+    move_left: list[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
+    move_vxy: float = 0.5
+    move_vz:  float = 30.0
+
+    def step(self, dt: float) -> None:
+        vx, vy, vz = self.vx, self.vy, self.vz
+
+        # chassis move 优先于速度模式
+        dx, dy, dz = self.move_left
+        dist = math.hypot(dx, dy)
+        if dist > 1e-6 or abs(dz) > 1e-6:
+            vx = vy = vz = 0.0
+            if dist > 1e-6:
+                travel = min(dist, self.move_vxy * dt)
+                vx, vy = dx / dist * travel / dt, dy / dist * travel / dt
+                self.move_left[0] -= dx / dist * travel
+                self.move_left[1] -= dy / dist * travel
+            if abs(dz) > 1e-6:
+                turn = min(abs(dz), self.move_vz * dt)
+                vz = math.copysign(turn, dz) / dt
+                self.move_left[2] -= math.copysign(turn, dz)
+
+        rad = math.radians(self.yaw)
+        self.x += (vx * math.cos(rad) - vy * math.sin(rad)) * dt
+        self.y += (vx * math.sin(rad) + vy * math.cos(rad)) * dt
+        self.yaw += vz * dt
+
+
+def _approach(value: float, target: float, max_step: float) -> float:
+    """
+    value 以不超过 max_step 的步长向 target 靠近
+    """
+
+    if abs(target - value) <= max_step:
+        return target
+    return value + math.copysign(max_step, target - value)
+
+
+def _fmt(value: float) -> str:
+    """
+    应答中的数值格式 (保留 3 位小数)
+    """
+    return f"{value:.3f}"
+
+
+class VirtualRobot:
+    """
+    虚拟 S1 下位机
+    """
+
+    def __init__(
+        self,
+        baudrate: int = 115200,
+        reply_latency: float = 0.0,
+        game_msg_rate: float = 10.0,
+        throttle: bool = True,
+        tick_rate: float = 200.0
+    ):
+        """
+        Args:
+            baudrate (int): 模拟的波特率 (8N1，每字节 10 bit)
+            reply_latency (float): 下位机处理一条指令到开始应答的延迟（秒）
+            game_msg_rate (float): 开启 game msg 后的推送频率（Hz）
+            throttle (bool): 是否按波特率限制收发速度 (关闭后 pty 以内存速度收发)
+            tick_rate (float): 运动学模型的更新频率（Hz）
+        """
+
+        self.baudrate: int = baudrate
+        self.reply_latency: float = reply_latency
+        self.game_msg_rate: float = game_msg_rate
+        self.throttle: bool = throttle
+        self.tick_rate: float = tick_rate
+
+        self.gimbal = GimbalModel()
+        self.chassis = ChassisModel()
+
+        # 协议状态
+        self.sdk_mode: bool = False
+        self.game_msg_on: bool = False
+        # 已开启的推送 "gimbal attitude" / "chassis position" / "chassis attitude" / "chassis status" -> 频率 (Hz)
+        self.push_rates: dict[str, float] = {}
+        self.robot_mode: str = "free"
+        self.blaster_bead: int = 1
+
+        # 模拟的遥控输入 (写入 game msg push)
+        self.mouse_press: int = 0
+        self.mouse_x: int = 0
+        self.mouse_y: int = 0
+        self.keys: list[int] = []
+        self._seq = itertools.count()
+
+        # 统计
+        self.stats: dict[str, int] = {
+            "rx_bytes": 0,
+            "rx_commands": 0,
+            "tx_bytes": 0,
+            "tx_lines": 0,
+            "shots": 0,
+        }
+
+        self._master: int | None = None
+        self._slave: int | None = None
+        self._port: str | None = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+        # 待发送数据 元素为 (发送时间, 序号, 数据)
+        self._tx_heap: list[tuple[float, int, bytes]] = []
+        self._tx_seq = itertools.count()
+        self._tx_cond = threading.Condition()
+
+
+    # === 生命周期 ===
+
+    def start(self) -> str:
+        """
+        创建伪终端并启动模拟
+
+        Returns:
+            str: 从设备路径 (供 conn.open_serial 使用)
+        """
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave) # 关闭回显与行规程，行为与真实串口一致
+        self._port = os.ttyname(self._slave)
+
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._rx_loop, daemon=True),
+            threading.Thread(target=self._tx_loop, daemon=True),
+            threading.Thread(target=self._tick_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        logger.info(f"虚拟下位机已启动: {self._port} ({self.baudrate} baud)")
+        return self._port
+
+
+    def stop(self) -> None:
+        """
+        停止模拟并关闭伪终端
+        """
+
+        self._stop.set()
+        with self._tx_cond:
+            self._tx_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+
+    @property
+    def port(self) -> str | None:
+        """
+        从设备路径
+        """
+        return self._port
+
+
+    def __enter__(self) -> "VirtualRobot":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+    # === 遥控输入 ===
+
+    def set_input(
+        self,
+        keys: list[int] | None = None,
+        mouse_x: int = 0,
+        mouse_y: int = 0,
+        mouse_press: int = 0
+    ) -> None:
+        """
+        设置之后 game msg push 中携带的遥控输入
+
+        Args:
+            keys (list[int] | None): 按下的按键 ord 值 (最多 3 个)
+            mouse_x (int): 鼠标 x 位移 [-100, 100]
+            mouse_y (int): 鼠标 y 位移 [-100, 100]
+            mouse_press (int): 鼠标按键 1:左键 2:右键 4:中键
+        """
+
+        with self._lock:
+            self.keys = list(keys or [])[:3]
+            self.mouse_x = mouse_x
+            self.mouse_y = mouse_y
+            self.mouse_press = mouse_press
+
+
+    # === 收发 ===
+
+    def _wire_time(self, nbytes: int) -> float:
+        """
+        nbytes 字节在线路上的传输时间
+        """
+        return nbytes * 10 / self.baudrate if self.throttle else 0.0
+
+
+    def _send(self, line: str, delay: float = 0.0) -> None:
+        """
+        安排发送一行数据
+
+        Args:
+            line (str): 数据 (不含结束符)
+            delay (float): 延迟（秒）
+        """
+
+        with self._tx_cond:
+            heapq.heappush(self._tx_heap, (time.monotonic() + delay, next(self._tx_seq), f"{line}\n".encode("utf-8")))
+            self._tx_cond.notify()
+
+
+    def _tx_loop(self) -> None:
+        """
+        发送线程 按计划时间和波特率写出数据
+        """
+
+        wire_free_at = 0.0
+        while not self._stop.is_set():
+            with self._tx_cond:
+                while not self._stop.is_set():
+                    if self._tx_heap:
+                        wait = self._tx_heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._tx_cond.wait(wait)
+                    else:
+                        self._tx_cond.wait(0.5)
+                if self._stop.is_set():
+                    return
+                _, _, payload = heapq.heappop(self._tx_heap)
+
+            # 线路空闲后才能开始发送下一字节
+            now = time.monotonic()
+            wire_free_at = max(now, wire_free_at) + self._wire_time(len(payload))
+            if wire_free_at > now:
+                time.sleep(wire_free_at - now)
+
+            try:
+                os.write(self._master, payload) # type: ignore[arg-type]
+            except OSError:
+                return
+            self.stats["tx_bytes"] += len(payload)
+            self.stats["tx_lines"] += 1
+
+
+    def _rx_loop(self) -> None:
+        """
+        接收线程 按波特率节流读取指令并执行
+        """
+
+        buf = b""
+        wire_free_at = 0.0
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._master], [], [], 0.2)
+                if not ready:
+                    continue
+                chunk = os.read(self._master, 256) # type: ignore[arg-type]
+            except (OSError, ValueError, TypeError):
+                return
+            if not chunk:
+                continue
+
+            # 模拟线路速率：这些字节要等线路传完才算"到达"
+            now = time.monotonic()
+            wire_free_at = max(now, wire_free_at) + self._wire_time(len(chunk))
+            if wire_free_at > now:
+                time.sleep(wire_free_at - now)
+
+            self.stats["rx_bytes"] += len(chunk)
+            buf += chunk
+
+            # 指令以 ';' 结尾，兼容额外的换行 / 重复分号
+            *commands, buf = buf.replace(b"\r", b"").replace(b"\n", b";").split(b";")
+            for raw in commands:
+                command = raw.decode("utf-8", errors="replace").strip()
+                if command:
+                    self.stats["rx_commands"] += 1
+                    self._handle(command)
+
+
+    # === 指令处理 ===
+
+    def _handle(self, command: str) -> None:
+        """
+        执行一条指令并安排应答
+
+        Args:
+            command (str): 不含 ';' 的指令
+        """
+
+        if command == "command":
+            reply = "Already in SDK mode" if self.sdk_mode else "ok"
+            self.sdk_mode = True
+            self._send(f"{reply};", self.reply_latency)
+            return
+
+        # SDK 模式之外不响应其他指令
+        if not self.sdk_mode:
+            return
+
+        if command == "quit":
+            self.sdk_mode = False
+            self.game_msg_on = False
+            self.push_rates.clear()
+            self._send("ok;", self.reply_latency)
+            return
+
+        tokens = command.split()
+        try:
+            with self._lock:
+                reply = self._dispatch(tokens)
+        except (ValueError, IndexError):
+            reply = "fail"
+
+        self._send(f"{reply};", self.reply_latency)
+
+
+    def _dispatch(self, tokens: list[str]) -> str:
+        """
+        根据指令更新模型 (调用方需持有锁)
+
+        Args:
+            tokens (list[str]): 按空格拆分的指令
+        Returns:
+            str: 应答内容 (不含 ';')
+        """
+
+        head = " ".join(tokens[:2])
+        args = dict(zip(tokens[2::2], tokens[3::2]))
+        gimbal, chassis = self.gimbal, self.chassis
+
+        # === 查询 ===
+        if tokens[-1] == "?":
+            if head == "gimbal attitude":
+                return f"{_fmt(gimbal.pitch)} {_fmt(gimbal.yaw)}"
+            if head == "chassis position":
+                return f"{_fmt(chassis.x)} {_fmt(chassis.y)} {_fmt(chassis.yaw)}"
+            if head == "chassis attitude":
+                return f"0.000 0.000 {_fmt(chassis.yaw)}"
+            if head == "chassis speed":
+                return f"{_fmt(chassis.vx)} {_fmt(chassis.vy)} {_fmt(chassis.vz)} 0 0 0 0"
+            if head == "robot mode":
+                return self.robot_mode
+            if head == "blaster bead":
+                return str(self.blaster_bead)
+            return "fail"
+
+        # === 设置 ===
+        if head in ("gimbal push", "chassis push"):
+            self._set_push(tokens[0], tokens[2:])
+        elif head == "game msg":
+            self.game_msg_on = tokens[2] == "on"
+        elif head == "robot mode":
+            self.robot_mode = tokens[2]
+        elif head == "chassis speed":
+            chassis.move_left = [0.0, 0.0, 0.0]
+            chassis.vx = float(args.get("x", 0))
+            chassis.vy = float(args.get("y", 0))
+            chassis.vz = float(args.get("z", 0))
+        elif head == "chassis wheel":
+            chassis.move_left = [0.0, 0.0, 0.0]
+            chassis.vx = chassis.vy = chassis.vz = 0.0
+        elif head == "chassis move":
+            chassis.vx = chassis.vy = chassis.vz = 0.0
+            chassis.move_left = [float(args.get("x", 0)), float(args.get("y", 0)), float(args.get("z", 0))]
+            chassis.move_vxy = float(args.get("vxy", 0.5))
+            chassis.move_vz = float(args.get("vz", 30))
+        elif head == "gimbal speed":
+            gimbal.target_p = gimbal.target_y = None
+            gimbal.speed_p = float(args.get("p", 0))
+            gimbal.speed_y = float(args.get("y", 0))
+        elif head == "gimbal move":
+            gimbal.speed_p = gimbal.speed_y = 0.0
+            if "p" in args:
+                gimbal.target_p = gimbal.pitch + float(args["p"])
+            if "y" in args:
+                gimbal.target_y = gimbal.yaw + float(args["y"])
+            gimbal.move_vp = float(args.get("vp", gimbal.move_vp))
+            gimbal.move_vy = float(args.get("vy", gimbal.move_vy))
+        elif head == "gimbal moveto":
+            gimbal.speed_p = gimbal.speed_y = 0.0
+            if "p" in args:
+                gimbal.target_p = float(args["p"])
+            if "y" in args:
+                gimbal.target_y = float(args["y"])
+            gimbal.move_vp = float(args.get("vp", gimbal.move_vp))
+            gimbal.move_vy = float(args.get("vy", gimbal.move_vy))
+        elif head == "gimbal recenter":
+            gimbal.speed_p = gimbal.speed_y = 0.0
+            gimbal.target_p = gimbal.target_y = 0.0
+        elif head == "gimbal suspend":
+            gimbal.suspended = True
+        elif head == "gimbal resume":
+            gimbal.suspended = False
+        elif head == "blaster bead":
+            self.blaster_bead = int(tokens[2])
+        elif head == "blaster fire":
+            self.stats["shots"] += self.blaster_bead
+        else:
+            return "fail"
+
+        return "ok"
+
+
+    # === 运动学与推送 ===
+
+    def _set_push(self, module: str, tokens: list[str]) -> None:
+        """
+        处理推送开关指令 (调用方需持有锁)
+        eg: chassis push position on pfreq 10 attitude off
+
+        Args:
+            module (str): "gimbal" / "chassis"
+            tokens (list[str]): 模块名之后的部分
+        Raises:
+            ValueError: 指令格式错误
+        """
+
+        attributes = {"gimbal": ("attitude",), "chassis": ("position", "attitude", "status")}[module]
+        i = 0
+        while i < len(tokens):
+            name, switch = tokens[i], tokens[i + 1]
+            if name not in attributes or switch not in ("on", "off"):
+                raise ValueError(f"bad push attribute {name} {switch}")
+            i += 2
+
+            rate = 10.0
+            if i + 1 < len(tokens) and tokens[i].endswith("freq"):
+                rate = float(tokens[i + 1])
+                i += 2
+
+            if switch == "on":
+                self.push_rates[f"{module} {name}"] = rate
+            else:
+                self.push_rates.pop(f"{module} {name}", None)
+
+
+    def _push(self, stream: str) -> str:
+        """
+        生成一条推送数据 (调用方需持有锁)
+
+        Args:
+            stream (str): 推送名，如 "gimbal attitude"
+        """
+
+        gimbal, chassis = self.gimbal, self.chassis
+        if stream == "gimbal attitude":
+            values = [_fmt(gimbal.pitch), _fmt(gimbal.yaw)]
+        elif stream == "chassis position":
+            values = [_fmt(chassis.x), _fmt(chassis.y)]
+        elif stream == "chassis attitude":
+            values = ["0.000", "0.000", _fmt(chassis.yaw)]
+        else:
+            moving = chassis.vx or chassis.vy or chassis.vz or any(chassis.move_left)
+            values = ["0" if moving else "1"] + ["0"] * 10
+
+        module, name = stream.split()
+        return f"{module} push {name} {' '.join(values)} ;"
+
+
+    def _game_msg(self) -> str:
+        """
+        生成一条 game msg push (调用方需持有锁)
+        """
+
+        keys = self.keys[:3]
+        data = [0, 6, self.mouse_press, self.mouse_x, self.mouse_y, next(self._seq) % 256, len(keys), *keys]
+        return f"game msg push [{', '.join(str(v) for v in data)}];"
+
+
+    def _tick_loop(self) -> None:
+        """
+        运动学更新 / 推送线程
+        """
+
+        dt = 1.0 / self.tick_rate
+        next_tick = time.monotonic()
+        next_game_msg = next_tick
+        next_push: dict[str, float] = {}
+
+        while not self._stop.is_set():
+            next_tick += dt
+            now = time.monotonic()
+
+            with self._lock:
+                self.gimbal.step(dt)
+                self.chassis.step(dt)
+
+                pushes: list[str] = []
+                if self.game_msg_on and self.game_msg_rate > 0 and now >= next_game_msg:
+                    pushes.append(self._game_msg())
+                    next_game_msg = max(next_game_msg + 1.0 / self.game_msg_rate, now)
+
+                for stream, rate in self.push_rates.items():
+                    due = next_push.get(stream, now)
+                    if rate > 0 and now >= due:
+                        pushes.append(self._push(stream))
+                        next_push[stream] = max(due + 1.0 / rate, now)
+
+            for line in pushes:
+                self._send(line)
+
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.monotonic() # 跟不上时不追赶
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="虚拟 RoboMaster S1 下位机 (pty)")
+    parser.add_argument("--baud", type=int, default=115200, help="模拟波特率")
+    parser.add_argument("--latency", type=float, default=0.0, help="应答延迟（秒）")
+    parser.add_argument("--game-msg-rate", type=float, default=10.0, help="game msg push 频率（Hz）")
+    parser.add_argument("--no-throttle", action="store_true", help="不按波特率限速")
+    args = parser.parse_args()
+
+    robot = VirtualRobot(
+        baudrate = args.baud,
+        reply_latency = args.latency,
+        game_msg_rate = args.game_msg_rate,
+        throttle = not args.no_throttle
+    )
+    port = robot.start()
+    sys.stdout.write(port + "\n")
+    sys.stdout.flush()
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("收到退出信号，正在关闭...")
+    finally:
+        robot.stop()
+
+
+__all__ = [
+    "GimbalModel",
+    "ChassisModel",
+    "VirtualRobot",
+]
+
+
+if __name__ == "__main__":
+    main()
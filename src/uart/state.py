@@ -0,0 +1,116 @@
+# state.py
+# 机器人状态快照 (由下位机推送数据更新)
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 只有 DataHolder 所在线程写入；每次更新都生成新的不可变快照并替换引用，
+# 引用赋值在 CPython 中是原子操作，因此任意线程读取 snapshot 都无需加锁，
+# 拿到的快照内部各字段也一定是同一时刻的。
+#
+
+from typing import NamedTuple
+
+
+class GimbalAttitude(NamedTuple):
+    """
+    云台姿态 (gimbal push attitude)
+    """
+
+    pitch:     float # 俯仰角 (°)
+    yaw:       float # 偏航角 (°)
+    timestamp: float # 数据到达时间 time.monotonic()
+
+
+class ChassisPosition(NamedTuple):
+    """
+    底盘位置 (chassis push position) 相对上电位置
+    """
+
+    x:         float # (m)
+    y:         float # (m)
+    timestamp: float # 数据到达时间 time.monotonic()
+
+
+class ChassisAttitude(NamedTuple):
+    """
+    底盘姿态 (chassis push attitude)
+    """
+
+    pitch:     float # (°)
+    roll:      float # (°)
+    yaw:       float # (°)
+    timestamp: float # 数据到达时间 time.monotonic()
+
+
+class ChassisStatus(NamedTuple):
+    """
+    底盘状态 (chassis push status) 各字段为 0 / 1
+    """
+
+    static:      int # 是否静止
+    uphill:      int # 是否上坡
+    downhill:    int # 是否下坡
+    on_slope:    int # 是否溜坡
+    pick_up:     int # 是否被拿起
+    slip:        int # 是否滑行
+    impact_x:    int # x 轴是否感应到撞击
+    impact_y:    int # y 轴是否感应到撞击
+    impact_z:    int # z 轴是否感应到撞击
+    roll_over:   int # 是否翻车
+    hill_static: int # 是否在坡上静止
+    timestamp:   float # 数据到达时间 time.monotonic()
+
+
+class RobotState(NamedTuple):
+    """
+    机器人状态快照 从未收到的部分为 None
+    """
+
+    gimbal_attitude:  GimbalAttitude | None = None
+    chassis_position: ChassisPosition | None = None
+    chassis_attitude: ChassisAttitude | None = None
+    chassis_status:   ChassisStatus | None = None
+    seq:              int = 0 # 快照序号 每次更新加 1
+
+
+class StateStore:
+    """
+    机器人状态存储 单线程写入 多线程无锁读取
+    """
+
+    def __init__(self):
+        self._state: RobotState = RobotState()
+
+
+    @property
+    def snapshot(self) -> RobotState:
+        """
+        当前的状态快照 (不可变，可以长期持有)
+        """
+        return self._state
+
+
+    def update(self, **fields) -> RobotState:
+        """
+        替换部分字段 生成并发布新的快照 (只能由写入线程调用)
+
+        Args:
+            **fields: RobotState 的字段，如 gimbal_attitude=GimbalAttitude(...)
+        Returns:
+            RobotState: 新的快照
+        """
+
+        state = self._state._replace(seq=self._state.seq + 1, **fields)
+        self._state = state
+        return state
+
+
+__all__ = [
+    "GimbalAttitude",
+    "ChassisPosition",
+    "ChassisAttitude",
+    "ChassisStatus",
+    "RobotState",
+    "StateStore",
+]
@@ -0,0 +1,138 @@
+# state_history.py
+# 带时间戳的状态历史 按任意时刻插值 / 短时外推
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 用于把云台 / 底盘反馈对齐到摄像头帧的曝光时刻:
+#   pitch, yaw = DataHolder().gimbal_history.lookup(frame_timestamp)
+#
+# 环形缓冲的每条数据同时写在 i 与 i + capacity 两个位置，
+# 最近 capacity 条数据在底层数组中始终连续，查询时直接在这段连续视图上二分查找，无需拷贝。
+#
+
+import threading
+
+import numpy as np
+
+
+class StateHistory:
+    """
+    多通道状态历史 (单线程写入，多线程读取)
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        capacity: int = 256,
+        max_extrapolation: float = 0.1,
+        angular: tuple[bool, ...] | None = None
+    ):
+        """
+        Args:
+            channels (int): 每条数据的数值个数，如云台 (pitch, yaw) 为 2
+            capacity (int): 最多保存的数据条数
+            max_extrapolation (float): 查询时刻晚于最新数据时允许外推的最长时间（秒）
+            angular (tuple[bool, ...] | None): 各通道是否为角度 (°)，角度通道按最短路径插值，None 表示均不是
+        """
+
+        self.channels: int = channels
+        self.capacity: int = capacity
+        self.max_extrapolation: float = max_extrapolation
+        self._angular: np.ndarray = np.array(angular if angular is not None else (False,) * channels, dtype=bool)
+
+        self._t: np.ndarray = np.zeros(2 * capacity, dtype=np.float64)
+        self._v: np.ndarray = np.zeros((2 * capacity, channels), dtype=np.float64)
+        self._next: int = 0  # 下一条数据写入的位置 [0, capacity)
+        self._count: int = 0 # 已保存的数据条数
+        self._lock = threading.Lock()
+
+
+    def append(self, timestamp: float, *values: float) -> None:
+        """
+        追加一条数据 时间戳需单调递增，回退的数据会被忽略
+
+        Args:
+            timestamp (float): 数据到达时间 time.monotonic()
+            *values (float): 各通道的数值
+        """
+
+        with self._lock:
+            if self._count and timestamp <= self._t[self._next + self.capacity - 1]:
+                return
+
+            i = self._next
+            self._t[i] = self._t[i + self.capacity] = timestamp
+            self._v[i] = self._v[i + self.capacity] = values
+            self._next = (i + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    def _window(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        按时间先后排列的全部数据 (视图，调用方需持有锁)
+        """
+
+        end = self._next + self.capacity
+        start = end - self._count
+        return self._t[start:end], self._v[start:end]
+
+
+    def latest(self) -> tuple[float, np.ndarray] | None:
+        """
+        获取最新的一条数据
+
+        Returns:
+            tuple[float, np.ndarray] | None: (时间戳, 各通道数值)，无数据时返回 None
+        """
+
+        with self._lock:
+            if self._count == 0:
+                return None
+            i = self._next + self.capacity - 1
+            return float(self._t[i]), self._v[i].copy()
+
+
+    def lookup(self, timestamp: float) -> np.ndarray | None:
+        """
+        获取某一时刻的状态
+        落在两条数据之间时线性插值；晚于最新数据时按最后两条数据的速度外推 (不超过 max_extrapolation)
+
+        Args:
+            timestamp (float): 查询时刻 time.monotonic()
+        Returns:
+            np.ndarray | None: 各通道数值，早于最旧数据、数据不足或超出外推范围时返回 None
+        """
+
+        with self._lock:
+            t, v = self._window()
+            n = len(t)
+            if n == 0 or timestamp < t[0]:
+                return None
+
+            if timestamp >= t[-1]:
+                if timestamp - t[-1] > self.max_extrapolation:
+                    return None
+                if n == 1 or timestamp == t[-1]:
+                    return v[-1].copy()
+                i = n - 1
+            else:
+                i = int(np.searchsorted(t, timestamp, side="right"))
+
+            t0, t1 = t[i - 1], t[i]
+            v0, v1 = v[i - 1].copy(), v[i].copy()
+
+        delta = v1 - v0
+        # 角度通道按最短路径插值 避免 179° -> -179° 时转一整圈
+        delta = np.where(self._angular, (delta + 180.0) % 360.0 - 180.0, delta)
+        return v0 + delta * ((timestamp - t0) / (t1 - t0))
+
+
+__all__ = [
+    "StateHistory",
+]
@@ -0,0 +1,233 @@
+# yaw.py
+# 云台绝对偏航角跟踪
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+# 安装滑环后云台可以无限旋转，下位机的绝对角度指令却只覆盖 [-250, 250]°，
+# 超出范围时只能用相对角度分步逼近，误差会逐次累积。
+# 本模块维护一个连续 (多圈) 的偏航角估计:
+#   - 有云台姿态推送时 (gimbal_push_on)，按最短路径展开推送的 yaw，得到连续角度
+#   - 推送之后发出的相对 / 绝对转动指令叠加在最近一次反馈上
+#   - 没有推送时完全按已发出的指令推算
+# 转动时只发送 "目标 - 当前估计" 的残差，见 GimbalMotionExecutor.rotate_to_yaw()。
+#
+# 注意: 速度模式 (gimbal speed) 的转动无法推算，没有推送时估计值会失准。
+#
+
+import time
+import threading
+
+from .events import Event, EventBus, EventType
+
+
+def wrap180(angle: float) -> float:
+    """
+    把角度归一化到 [-180, 180)
+    """
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class YawTracker:
+    """
+    连续偏航角估计 单例类
+    """
+
+    def __init__(self):
+
+        # 单例类 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
+        self._lock = threading.Lock()
+
+        self._base: float = 0.0                   # 最近一次反馈展开后的连续偏航角 (无反馈时为推算值)
+        self._base_time: float | None = None      # 最近一次反馈的时刻
+        self._last_raw: float | None = None       # 最近一次反馈的原始偏航角
+        self._frame: float = 0.0                  # _base 对应的下位机坐标系偏航角 (gimbal moveto 使用的坐标系)
+        self._pending: list[tuple[float, float]] = [] # 最近一次反馈之后发出的转动 (时刻, 角度)
+
+        # 统计
+        self.feedback_count: int = 0
+
+        self._attached: EventBus | None = None
+        self._attach_default()
+
+
+    def _attach_default(self) -> None:
+        """
+        默认订阅 DataHolder 的事件总线
+        """
+
+        from .dataholder import DataHolder
+        self.attach(DataHolder().events)
+
+
+    def attach(self, events: EventBus) -> None:
+        """
+        订阅事件总线上的云台姿态反馈
+
+        Args:
+            events (EventBus): 事件总线
+        """
+
+        if self._attached is events:
+            return
+        if self._attached is not None:
+            self._attached.unsubscribe(self._on_state)
+        events.subscribe(self._on_state, [EventType.ROBOT_STATE])
+        self._attached = events
+
+
+    def _on_state(self, event: Event) -> None:
+        """
+        机器人状态事件回调
+        """
+
+        attitude = event.payload.gimbal_attitude
+        if attitude is None or attitude.timestamp == self._base_time:
+            return
+        self.on_feedback(attitude.yaw, attitude.timestamp)
+
+
+    # === 输入 ===
+
+    def on_feedback(self, yaw: float, timestamp: float) -> None:
+        """
+        输入一次云台姿态反馈
+
+        Args:
+            yaw (float): 下位机报告的偏航角 (°)
+            timestamp (float): 反馈到达时刻 time.monotonic()
+        """
+
+        with self._lock:
+            if self._last_raw is None:
+                # 第一次反馈 认为尚未转过整圈
+                self._base = yaw
+            else:
+                self._base += wrap180(yaw - self._last_raw)
+            self._last_raw = yaw
+            self._frame = yaw
+            self._base_time = timestamp
+            self.feedback_count += 1
+
+            # 反馈之前发出的指令已经 (至少部分) 体现在反馈中
+            self._pending = [(t, d) for t, d in self._pending if t > timestamp]
+
+
+    def on_relative_move(self, delta: float) -> None:
+        """
+        记录一次已发出的相对转动指令
+
+        Args:
+            delta (float): 偏航角增量 (°)
+        """
+
+        with self._lock:
+            if self._base_time is None:
+                self._base += delta
+                self._frame += delta
+            else:
+                self._pending.append((time.monotonic(), delta))
+                if len(self._pending) > 256:
+                    # 反馈长期中断 把最旧的指令并入基准
+                    _, oldest = self._pending.pop(0)
+                    self._base += oldest
+                    self._frame += oldest
+
+
+    def on_absolute_move(self, yaw: float) -> None:
+        """
+        记录一次已发出的绝对转动指令 (gimbal moveto)
+
+        下位机坐标系覆盖 [-250, 250]°，不是 ±180° 的朝向，因此按 "目标 - 下位机坐标系中的当前角度" 记录实际转动
+
+        Args:
+            yaw (float): 下位机坐标系中的目标偏航角 (°)
+        """
+
+        self.on_relative_move(yaw - self.frame_yaw)
+
+
+    def reset(self, yaw: float = 0.0) -> None:
+        """
+        重置估计 (如云台重新上电)
+
+        Args:
+            yaw (float): 当前的偏航角 (°)
+        """
+
+        with self._lock:
+            self._base = yaw
+            self._frame = yaw
+            self._base_time = None
+            self._last_raw = None
+            self._pending = []
+
+
+    # === 输出 ===
+
+    @property
+    def yaw(self) -> float:
+        """
+        当前的连续偏航角估计 (°)
+        """
+
+        with self._lock:
+            return self._base + sum(d for _, d in self._pending)
+
+
+    @property
+    def frame_yaw(self) -> float:
+        """
+        当前偏航角在下位机坐标系中的估计 (°) 没有反馈时与连续偏航角估计相同
+        """
+
+        with self._lock:
+            return self._frame + sum(d for _, d in self._pending)
+
+
+    @property
+    def feedback_age(self) -> float | None:
+        """
+        距最近一次反馈的时间（秒），从未收到反馈时为 None
+        """
+
+        base_time = self._base_time
+        return None if base_time is None else time.monotonic() - base_time
+
+
+    def residual(self, target: float, shortest: bool = False) -> float:
+        """
+        计算到达目标还需转动的角度
+
+        Args:
+            target (float): 目标连续偏航角 (°)
+            shortest (bool): 是否只按朝向计算最短路径 (忽略圈数)
+        Returns:
+            float: 需要转动的角度 (°)
+        """
+
+        delta = target - self.yaw
+        return wrap180(delta) if shortest else delta
+
+
+    # === 单例类机制 ===
+    # 单例类设计
+    _instance: 'YawTracker | None' = None
+    _instance_lock = threading.Lock() # 线程锁 防止多个线程同时访问该类造成问题
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = super(YawTracker, cls).__new__(cls)
+        return cls._instance
+
+
+__all__ = [
+    "wrap180",
+    "YawTracker",
+]
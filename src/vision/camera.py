@@ -87,6 +87,27 @@ class Camera:
         ret, frame = self._cap.read()
         return ret, frame
     
+    def read_timestamped(self) -> tuple[bool, cv2.typing.MatLike | None, float]:
+        """
+        读取一帧图像 并估计该帧的曝光时刻
+        时间戳与串口数据的到达时间同为 time.monotonic()，可直接用于查询当时的云台姿态
+
+        Returns:
+            是否读取成功，读取到的图像 (失败返回None)，曝光时刻
+        """
+
+        if not self._is_opened or not self._cap:
+            return False, None, time.monotonic()
+
+        ret = self._cap.grab()
+        # grab() 返回时这一帧已经传输完毕，减去估计的曝光到传输完成的延迟
+        timestamp = time.monotonic() - config.CAMERA_LATENCY
+        if not ret:
+            return False, None, timestamp
+
+        ret, frame = self._cap.retrieve()
+        return ret, (frame if ret else None), timestamp
+    
     def close(self) -> None:
         """
         关闭摄像头
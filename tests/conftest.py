@@ -0,0 +1,26 @@
+# conftest.py
+# pytest 公共配置
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    """
+    创建单例类的新实例 测试结束后恢复原来的单例
+    """
+
+    def factory(cls, *args, **kwargs):
+        monkeypatch.setattr(cls, "_instance", None)
+        return cls(*args, **kwargs)
+
+    return factory
@@ -0,0 +1,73 @@
+# test_ballistics.py
+# 弹道补偿表
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import numpy as np
+import pytest
+
+from src import config
+from src.aimbot.ballistics import BallisticTable, estimate_distance
+
+
+@pytest.fixture
+def table() -> BallisticTable:
+    # 故意乱序输入 构造时应按距离排序
+    return BallisticTable([3.0, 1.0, 2.0], [3.0, 1.0, 2.0], [-0.3, -0.1, -0.2])
+
+
+def test_lookup_interpolates(table):
+    pitch, yaw = table.lookup(1.5)
+    assert pitch == pytest.approx(1.5)
+    assert yaw == pytest.approx(-0.15)
+
+
+def test_lookup_clamps_outside_range(table):
+    assert table.lookup(0.2) == pytest.approx((1.0, -0.1))
+    assert table.lookup(10.0) == pytest.approx((3.0, -0.3))
+
+
+def test_lookup_box(table):
+    width = config.CAMERA_FX * config.ARMOR_WIDTH / 2.0
+    height = config.CAMERA_FY * config.ARMOR_HEIGHT / 2.0
+    assert table.lookup_box(width, height) == pytest.approx((2.0, -0.2))
+    assert table.lookup_box(0, 0) == (0.0, 0.0)
+
+
+def test_estimate_distance_takes_nearer():
+    width = config.CAMERA_FX * config.ARMOR_WIDTH / 4.0  # 偏转后变窄 估计偏远
+    height = config.CAMERA_FY * config.ARMOR_HEIGHT / 2.0
+    assert estimate_distance(width, height) == pytest.approx(2.0)
+    assert estimate_distance(0, 0) is None
+
+
+def test_from_shots_groups_by_median():
+    shots = np.array([
+        [0.98, 1.0, 0.0],
+        [1.02, 1.2, 0.1],
+        [1.00, 5.0, 0.2],  # 离群值 中位数不受影响
+        [2.01, 2.0, -0.1],
+    ])
+    table = BallisticTable.from_shots(shots, bin_width=0.25)
+
+    assert len(table) == 2
+    assert table.distance == pytest.approx([1.0, 2.01])
+    assert table.pitch == pytest.approx([1.2, 2.0])
+
+
+def test_save_and_load(table, tmp_path):
+    path = str(tmp_path / "ballistics.csv")
+    table.save(path)
+    loaded = BallisticTable.load(path)
+
+    assert loaded.distance == pytest.approx(table.distance)
+    assert loaded.pitch == pytest.approx(table.pitch)
+    assert loaded.yaw == pytest.approx(table.yaw)
+
+
+@pytest.mark.parametrize("distance, pitch, yaw", [([], [], []), ([1.0, 2.0], [1.0], [0.0, 0.0])])
+def test_invalid_table(distance, pitch, yaw):
+    with pytest.raises(ValueError):
+        BallisticTable(distance, pitch, yaw)
@@ -0,0 +1,57 @@
+# test_cancellation.py
+# 协作式取消
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from src.cancellation import CancellationToken, OperationCancelled
+
+
+def test_sleep_interrupted_by_cancel():
+    token = CancellationToken()
+    threading.Timer(0.02, token.cancel).start()
+
+    with pytest.raises(OperationCancelled):
+        token.sleep(5.0)
+
+
+def test_callbacks_run_once():
+    token = CancellationToken()
+    calls: list[str] = []
+    token.add_callback(lambda: calls.append("a"))
+    removed = lambda: calls.append("b")
+    token.add_callback(removed)
+    token.remove_callback(removed)
+
+    token.cancel()
+    token.cancel()
+    token.add_callback(lambda: calls.append("c")) # 已取消时立即执行
+
+    assert calls == ["a", "c"]
+
+
+def test_wait_for_result_and_timeout():
+    token = CancellationToken()
+    done: Future[int] = Future()
+    done.set_result(1)
+
+    assert token.wait_for(done) == 1
+    with pytest.raises(FutureTimeoutError):
+        token.wait_for(Future(), timeout=0.01)
+
+
+def test_wait_for_cancels_future():
+    token = CancellationToken()
+    future: Future[int] = Future()
+    threading.Timer(0.02, token.cancel).start()
+
+    with pytest.raises(OperationCancelled):
+        token.wait_for(future, timeout=5.0)
+    assert future.cancelled()
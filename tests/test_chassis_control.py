@@ -0,0 +1,76 @@
+# test_chassis_control.py
+# 底盘速度流式控制器
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+
+import pytest
+
+from src import config
+from src.uart.chassis_control import ChassisController, _limit_axis
+
+
+@pytest.fixture
+def sent() -> list[tuple[float, float, float]]:
+    return []
+
+
+@pytest.fixture
+def controller(fresh, sent) -> ChassisController:
+    return fresh(ChassisController, send=lambda x, y, z: sent.append((x, y, z)))
+
+
+def test_limit_axis_reaches_target_without_overshoot():
+    velocity, accel = 0.0, 0.0
+    history = []
+    for _ in range(200):
+        velocity, accel = _limit_axis(velocity, accel, 1.0, 0.02, 3.0, 20.0)
+        history.append(velocity)
+
+    assert history[-1] == 1.0
+    assert max(history) == 1.0
+    assert all(b - a <= 3.0 * 0.02 + 1e-9 for a, b in zip(history, history[1:]))
+
+
+def test_watchdog_stops_immediately(controller, sent):
+    controller.set_target(1.0, 0.0, 90.0)
+    now = time.monotonic()
+    for _ in range(10):
+        controller._tick(now, 0.02)
+    assert controller.velocity != (0.0, 0.0, 0.0)
+
+    controller._tick(now + config.CHASSIS_CTRL_TIMEOUT + 0.01, 0.02)
+
+    assert sent[-1] == (0.0, 0.0, 0.0)
+    assert controller.velocity == (0.0, 0.0, 0.0)
+    assert controller.timeouts == 1
+
+
+def test_watchdog_fires_once(controller, sent):
+    controller.set_target(1.0, 0.0, 0.0)
+    now = time.monotonic() + config.CHASSIS_CTRL_TIMEOUT + 0.01
+    controller._tick(now, 0.02)
+    controller._tick(now + 0.02, 0.02)
+
+    assert controller.timeouts == 1
+    assert sent == [(0.0, 0.0, 0.0)]
+
+
+def test_refreshed_target_keeps_running(controller, sent):
+    for _ in range(100):
+        controller.set_target(1.0, 0.0, 0.0)
+        controller._tick(time.monotonic(), 0.02)
+
+    assert controller.timeouts == 0
+    assert controller.velocity == (1.0, 0.0, 0.0)
+    assert sent[-1] == (1.0, 0.0, 0.0)
+
+
+def test_set_target_rejects_out_of_range(controller):
+    with pytest.raises(ValueError):
+        controller.set_target(4.0, 0.0, 0.0)
+    with pytest.raises(ValueError):
+        controller.set_target(0.0, 0.0, 700.0)
@@ -0,0 +1,150 @@
+# test_conn.py
+# 发送队列的优先级 / 安全指令作废
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+import queue
+from concurrent.futures import Future
+
+import pytest
+
+from src import config
+from src.uart import conn
+from src.uart.framing import encode_command
+
+
+@pytest.fixture(autouse=True)
+def tx_queue(monkeypatch):
+    """
+    不启动发送线程 使用空的发送队列
+    """
+
+    monkeypatch.setattr(conn, "start_tx_thread", lambda: None)
+    monkeypatch.setattr(conn, "_tx_queue", queue.PriorityQueue())
+    monkeypatch.setattr(conn, "_tx_pending_by_key", {})
+    monkeypatch.setattr(conn, "_tx_last_sent", {})
+    monkeypatch.setattr(conn, "_tx_stats", dict.fromkeys(conn._tx_stats, 0))
+    return conn._tx_queue
+
+
+def enqueue(data: str, key: str | None = None) -> Future[bool]:
+    future: Future[bool] = Future()
+    conn._enqueue(encode_command(data), conn._classify_priority(data), future, key)
+    return future
+
+
+def queued(tx_queue) -> list[bytes]:
+    return [item.payload for _, _, item in sorted(tx_queue.queue) if not item.cancelled]
+
+
+@pytest.mark.parametrize("data, priority", [
+    ("quit;", conn.TX_PRIORITY_SAFETY),
+    ("gimbal suspend;", conn.TX_PRIORITY_SAFETY),
+    ("gimbal speed p 0 y 0;", conn.TX_PRIORITY_SAFETY),
+    ("chassis speed x 0 y 0 z 0;", conn.TX_PRIORITY_SAFETY),
+    ("gimbal speed p 0 y 10;", conn.TX_PRIORITY_MOTION),
+    ("gimbal move p 0 y 0;", conn.TX_PRIORITY_MOTION),
+    ("blaster fire;", conn.TX_PRIORITY_NORMAL),
+])
+def test_classify_priority(data, priority):
+    assert conn._classify_priority(data) == priority
+
+
+def test_safety_jumps_queue(tx_queue):
+    enqueue("blaster fire;")
+    enqueue("gimbal move p 0 y 10;")
+    enqueue("quit;")
+    assert queued(tx_queue)[0] == encode_command("quit;")
+
+
+def test_zero_speed_cancels_only_same_device(tx_queue):
+    chassis = enqueue("chassis speed x 1 y 0 z 0;", "chassis speed")
+    move = enqueue("gimbal move p 0 y 10;")
+
+    enqueue("gimbal speed p 0 y 0;", "gimbal speed")
+
+    assert move.cancelled()
+    assert not chassis.done()
+    assert encode_command("chassis speed x 1 y 0 z 0;") in queued(tx_queue)
+
+
+def test_quit_cancels_all_motion(tx_queue):
+    chassis = enqueue("chassis speed x 1 y 0 z 0;", "chassis speed")
+    move = enqueue("gimbal move p 0 y 10;")
+    fire = enqueue("blaster fire;")
+
+    enqueue("quit;")
+
+    assert chassis.cancelled() and move.cancelled()
+    assert not fire.done()
+    assert conn._tx_stats["cancelled"] == 2
+
+
+def test_coalesce_keeps_latest(tx_queue):
+    first = enqueue("gimbal speed p 0 y 10;", "gimbal speed")
+    second = enqueue("gimbal speed p 0 y 20;", "gimbal speed")
+
+    assert first.cancelled()
+    assert not second.done()
+    assert queued(tx_queue) == [encode_command("gimbal speed p 0 y 20;")]
+    assert conn._tx_stats["coalesced"] == 1
+
+
+def test_coalesce_keeps_queue_position(tx_queue):
+    enqueue("gimbal speed p 0 y 10;", "gimbal speed")
+    enqueue("chassis speed x 1 y 0 z 0;", "chassis speed")
+    enqueue("gimbal speed p 0 y 20;", "gimbal speed")
+
+    assert queued(tx_queue) == [
+        encode_command("gimbal speed p 0 y 20;"),
+        encode_command("chassis speed x 1 y 0 z 0;"),
+    ]
+
+
+def test_coalesce_zero_requeues_at_safety_priority(tx_queue):
+    moving = enqueue("gimbal speed p 0 y 10;", "gimbal speed")
+    enqueue("blaster fire;")
+    enqueue("gimbal speed p 0 y 0;", "gimbal speed")
+
+    assert moving.cancelled()
+    assert queued(tx_queue) == [
+        encode_command("gimbal speed p 0 y 0;"),
+        encode_command("blaster fire;"),
+    ]
+
+
+def test_dedup_suppresses_repeat_within_window(tx_queue):
+    conn._tx_last_sent["gimbal speed"] = (encode_command("gimbal speed p 0 y 10;"), time.monotonic())
+
+    repeat = enqueue("gimbal speed p 0 y 10;", "gimbal speed")
+    changed = enqueue("gimbal speed p 0 y 20;", "gimbal speed")
+
+    assert repeat.result() is True
+    assert not changed.done()
+    assert queued(tx_queue) == [encode_command("gimbal speed p 0 y 20;")]
+    assert conn._tx_stats["suppressed"] == 1
+
+
+def test_dedup_resends_after_window(tx_queue):
+    sent_at = time.monotonic() - config.SERIAL_TX_DEDUP_WINDOW - 0.01
+    conn._tx_last_sent["gimbal speed"] = (encode_command("gimbal speed p 0 y 10;"), sent_at)
+
+    repeat = enqueue("gimbal speed p 0 y 10;", "gimbal speed")
+
+    assert not repeat.done()
+    assert conn._tx_stats["suppressed"] == 0
+
+
+@pytest.mark.parametrize("baudrate", [115200, 9600])
+def test_link_budget_uses_opened_baudrate(monkeypatch, baudrate):
+    monkeypatch.setattr(conn, "_link_baudrate", baudrate)
+    monkeypatch.setattr(conn, "_link_free_at", 0.0)
+
+    before = time.monotonic()
+    conn._account_link(100)
+
+    expected = 100 * 10 / baudrate / config.SERIAL_TX_LINK_BUDGET
+    assert conn._link_free_at - before == pytest.approx(expected, abs=1e-3)
@@ -0,0 +1,42 @@
+# test_dataholder.py
+# 赛事数据处理
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import pytest
+
+from src.uart.dataholder import DataHolder
+from src.uart.events import Event, EventType
+
+
+@pytest.fixture
+def holder(fresh) -> DataHolder:
+    return fresh(DataHolder)
+
+
+@pytest.fixture
+def packets(holder) -> list[Event]:
+    events: list[Event] = []
+    holder.events.subscribe(events.append, [EventType.GAME_DATA])
+    return events
+
+
+def test_identical_packets_kept_when_seq_static(holder, packets):
+    # 序列号不变的下位机: 鼠标匀速移动时每包都相同，都是有效输入
+    for _ in range(3):
+        holder._handle_game_msg("game msg push [0, 6, 0, 30, 0, 7, 0];")
+
+    assert len(packets) == 3
+    assert holder.game_data_duplicates == 0
+
+
+def test_repeated_seq_dropped_when_seq_advances(holder, packets):
+    holder._handle_game_msg("game msg push [0, 6, 0, 30, 0, 7, 0];")
+    holder._handle_game_msg("game msg push [0, 6, 0, 30, 0, 8, 0];")
+    holder._handle_game_msg("game msg push [0, 6, 0, 30, 0, 8, 0];")
+    holder._handle_game_msg("game msg push [0, 6, 0, 30, 0, 9, 0];")
+
+    assert [event.payload.seq for event in packets] == [7, 8, 9]
+    assert holder.game_data_duplicates == 1
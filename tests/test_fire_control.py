@@ -0,0 +1,97 @@
+# test_fire_control.py
+# 火控
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from src import config
+from src.aimbot.fire_control import BurstPattern, FireControl
+
+
+class FakeBlaster:
+    """
+    按给定序列回填写入结果的发射指令替身
+    """
+
+    def __init__(self, results: list[bool | None]):
+        self._results = list(results)
+        self.beads: list[int] = []
+
+    def fire(self) -> Future[bool]:
+        future: Future[bool] = Future()
+        result = self._results.pop(0)
+        if result is None:
+            future.cancel() # 被安全指令作废
+        else:
+            future.set_result(result)
+        return future
+
+    def set_bead(self, num: int) -> None:
+        self.beads.append(num)
+
+
+@pytest.fixture
+def make(fresh):
+    created: list[FireControl] = []
+
+    def factory(results: list[bool | None]) -> tuple[FireControl, FakeBlaster]:
+        blaster = FakeBlaster(results)
+        created.append(fresh(FireControl, fire=blaster.fire, set_bead=blaster.set_bead))
+        return created[-1], blaster
+
+    yield factory
+    for control in created:
+        control.shutdown()
+
+
+def test_successful_shot_adds_heat(make):
+    control, _ = make([True])
+
+    assert control.fire(require_lock=False).result(1.0) == 1
+    assert control.fired == 1
+    assert control.heat == pytest.approx(config.FIRE_HEAT_PER_BEAD, abs=1.0)
+    assert len(control.shots) == 1
+
+
+@pytest.mark.parametrize("result", [False, None])
+def test_failed_write_is_not_counted(make, result):
+    control, _ = make([result])
+
+    assert control.fire(require_lock=False).result(1.0) == 0
+    assert control.fired == 0
+    assert control.get_stats()["failed"] == 1
+    assert control.heat == 0
+    assert len(control.shots) == 0
+
+
+def test_failed_write_does_not_rate_limit(make):
+    control, _ = make([False, True])
+
+    start = time.monotonic()
+    assert control.fire(BurstPattern(2), require_lock=False).result(1.0) == 1
+    assert time.monotonic() - start < 1.0 / config.FIRE_MAX_RATE
+
+
+def test_failed_write_resends_bead(make):
+    control, blaster = make([False, True])
+
+    control.fire(BurstPattern(1, beads=2), require_lock=False).result(1.0)
+    control.fire(BurstPattern(1, beads=2), require_lock=False).result(1.0)
+
+    assert blaster.beads == [2, 2]
+
+
+def test_lock_expires_after_fire_lock_timeout(make):
+    control, _ = make([])
+    now = time.monotonic()
+    for _ in range(config.FIRE_LOCK_FRAMES):
+        control.update_target(config.CAMERA_CX, config.CAMERA_CY, now)
+
+    assert control._locked(now)
+    assert not control._locked(now + config.FIRE_LOCK_TIMEOUT + 0.01)
@@ -0,0 +1,60 @@
+# test_mouse_control.py
+# 鼠标操控云台
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+
+import pytest
+
+from src import config
+from src.uart.dataholder import GameData
+from src.uart.events import Event, EventType
+from src.uart.mouse_control import MOUSE_RANGE, MouseGimbalControl, mouse_curve
+
+
+@pytest.fixture
+def sent() -> list[tuple[float, float]]:
+    return []
+
+
+@pytest.fixture
+def control(fresh, sent) -> MouseGimbalControl:
+    return fresh(MouseGimbalControl, send=lambda pitch, yaw: sent.append((pitch, yaw)))
+
+
+def packet(mouse_x: int, mouse_y: int = 0) -> Event:
+    data = GameData(0, 6, 0, mouse_x, mouse_y, 0, 0, [])
+    return Event(EventType.GAME_DATA, data, time.monotonic(), 0)
+
+
+def test_disabled_by_default():
+    assert config.MOUSE_CTRL_ENABLED is False
+
+
+def test_mouse_curve():
+    assert mouse_curve(config.MOUSE_CTRL_DEADZONE, 360.0) == 0.0
+    assert mouse_curve(MOUSE_RANGE, 360.0) == pytest.approx(360.0)
+    assert mouse_curve(-MOUSE_RANGE * 2, 360.0) == pytest.approx(-360.0)
+    assert 0 < mouse_curve(50, 360.0) < 180.0
+
+
+def test_idle_sends_single_zero(control, sent):
+    control.on_game_data(packet(MOUSE_RANGE))
+    for _ in range(20):
+        control.on_game_data(packet(0))
+
+    assert sent[0][1] > 0
+    assert sent[-1] == (0.0, 0.0)
+    assert sent.count((0.0, 0.0)) == 1
+
+
+def test_disable_stops_gimbal(control, sent):
+    control.on_game_data(packet(MOUSE_RANGE))
+    control.enabled = False
+    control.on_game_data(packet(MOUSE_RANGE))
+
+    assert sent[-1] == (0.0, 0.0)
+    assert len(sent) == 2
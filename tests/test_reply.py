@@ -0,0 +1,87 @@
+# test_reply.py
+# 应答关联器
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from src.uart.reply import ReplyTracker, parse_numbers
+
+
+def sdk_tracker(timeout: float = 1.0) -> ReplyTracker:
+    tracker = ReplyTracker(timeout)
+    tracker.on_sent(b"command;", None)
+    tracker.on_line("ok")
+    return tracker
+
+
+def test_replies_match_in_write_order():
+    tracker = sdk_tracker()
+    first: Future[str] = Future()
+    second: Future[str] = Future()
+    tracker.on_sent(b"gimbal attitude ?;", first)
+    tracker.on_sent(b"chassis position ?;", second)
+
+    assert tracker.on_line("1.5 -20")
+    assert tracker.on_line("0.1 0.2 30")
+
+    assert first.result(0) == "1.5 -20"
+    assert second.result(0) == "0.1 0.2 30"
+    assert tracker.matched == 2
+
+
+def test_unwatched_reply_keeps_alignment():
+    tracker = sdk_tracker()
+    future: Future[str] = Future()
+    tracker.on_sent(b"gimbal speed p 0 y 0;", None)
+    tracker.on_sent(b"gimbal attitude ?;", future)
+
+    assert not tracker.on_line("ok")
+    assert tracker.on_line("1.5 -20")
+    assert future.result(0) == "1.5 -20"
+
+
+def test_cancelled_request_still_consumes_its_reply():
+    tracker = sdk_tracker()
+    late: Future[str] = Future()
+    future: Future[str] = Future()
+    tracker.on_sent(b"gimbal attitude ?;", late)
+    tracker.on_sent(b"chassis position ?;", future)
+    late.cancel()
+
+    assert tracker.on_line("1.5 -20")
+    assert tracker.on_line("0.1 0.2 30")
+    assert future.result(0) == "0.1 0.2 30"
+
+
+def test_expired_request_times_out():
+    tracker = sdk_tracker(timeout=0.01)
+    future: Future[str] = Future()
+    tracker.on_sent(b"gimbal attitude ?;", future)
+    time.sleep(0.02)
+
+    assert not tracker.on_line("1.5 -20")
+    with pytest.raises(TimeoutError):
+        future.result(0)
+    assert tracker.expired == 1
+
+
+def test_no_reply_outside_sdk_mode():
+    tracker = ReplyTracker(1.0)
+    future: Future[str] = Future()
+
+    assert not tracker.on_sent(b"gimbal attitude ?;", future)
+    with pytest.raises(ConnectionError):
+        future.result(0)
+
+
+def test_parse_numbers():
+    assert parse_numbers("1.5 -20;", 2) == [1.5, -20.0]
+    assert parse_numbers("1.5", 2) is None
+    assert parse_numbers("error", 1) is None
+    assert parse_numbers(None, 1) is None
@@ -0,0 +1,85 @@
+# test_rxbuffer.py
+# 有界接收缓冲
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import threading
+
+import pytest
+
+from src.uart.rxbuffer import OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, RxBuffer
+
+
+def fill(buffer: RxBuffer, count: int) -> list[bool]:
+    return [buffer.put((float(i), str(i))) for i in range(count)]
+
+
+def lines(items: list[tuple[float, str]]) -> list[str]:
+    return [line for _, line in items]
+
+
+def test_drop_oldest_keeps_latest():
+    buffer = RxBuffer(3, OVERFLOW_DROP_OLDEST)
+
+    assert fill(buffer, 5) == [True] * 5
+    assert lines(buffer.drain()) == ["2", "3", "4"]
+    assert buffer.stats()["dropped"] == 2
+
+
+def test_drop_newest_keeps_earliest():
+    buffer = RxBuffer(3, OVERFLOW_DROP_NEWEST)
+
+    assert fill(buffer, 5) == [True, True, True, False, False]
+    assert lines(buffer.drain()) == ["0", "1", "2"]
+    assert buffer.dropped == 2
+
+
+def test_block_times_out_and_drops():
+    buffer = RxBuffer(1, OVERFLOW_BLOCK, block_timeout=0.01)
+
+    assert fill(buffer, 2) == [True, False]
+    assert buffer.dropped == 1
+
+
+def test_block_waits_for_consumer():
+    buffer = RxBuffer(1, OVERFLOW_BLOCK, block_timeout=1.0)
+    buffer.put((0.0, "0"))
+    threading.Timer(0.02, buffer.get).start()
+
+    assert buffer.put((1.0, "1"))
+    assert lines(buffer.drain()) == ["1"]
+    assert buffer.dropped == 0
+
+
+def test_get_and_stats():
+    buffer = RxBuffer(4)
+    fill(buffer, 3)
+
+    assert buffer.get() == (0.0, "0")
+    assert len(buffer) == 2
+    assert buffer.stats()["high_water"] == 3
+    assert buffer.stats()["total"] == 3
+
+    buffer.clear()
+    assert buffer.get() is None
+    assert buffer.get(timeout=0.01) is None
+
+
+@pytest.mark.parametrize("capacity, policy", [(0, OVERFLOW_DROP_OLDEST), (4, "unknown")])
+def test_invalid_arguments(capacity, policy):
+    with pytest.raises(ValueError):
+        RxBuffer(capacity, policy)
+
+
+def test_put_wait_ignores_drop_policy():
+    buffer = RxBuffer(1, OVERFLOW_DROP_OLDEST)
+    buffer.put((0.0, "0"))
+
+    assert not buffer.put_wait((1.0, "1"), timeout=0.01)
+    threading.Timer(0.02, buffer.get).start()
+    assert buffer.put_wait((1.0, "1"), timeout=1.0)
+
+    assert lines(buffer.drain()) == ["1"]
+    assert buffer.dropped == 0
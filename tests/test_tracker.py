@@ -0,0 +1,74 @@
+# test_tracker.py
+# 云台跟踪控制器
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import time
+
+import pytest
+
+from src.aimbot.tracker import GimbalTracker
+
+
+class ScriptedPID:
+    """
+    按给定序列输出偏航速度的 PID 替身
+    """
+
+    def __init__(self, outputs: list[float]):
+        self._outputs = iter(outputs)
+
+    def update(self, error: float, dt: float, feedforward: float = 0.0) -> float:
+        return next(self._outputs)
+
+    def reset(self) -> None:
+        pass
+
+
+@pytest.fixture
+def sent() -> list[tuple[float, float]]:
+    return []
+
+
+@pytest.fixture
+def tracker(sent) -> GimbalTracker:
+    return GimbalTracker(send=lambda pitch, yaw: sent.append((pitch, yaw)))
+
+
+def aim(tracker: GimbalTracker, yaw_outputs: list[float]) -> float:
+    now = time.monotonic()
+    tracker.pitch_pid = ScriptedPID([0.0] * len(yaw_outputs)) # type: ignore[assignment]
+    tracker.yaw_pid = ScriptedPID(yaw_outputs) # type: ignore[assignment]
+    tracker._target = (0.0, 0.0)
+    tracker._target_time = now
+    return now
+
+
+def test_slow_ramp_is_sent(tracker, sent):
+    # 每次只变化 0.3°/s，但相对已发送的指令累计超过阈值后必须发送
+    now = aim(tracker, [0.3, 0.6, 0.9])
+    for _ in range(3):
+        tracker._tick(now, 0.0)
+
+    assert sent == [(0.0, 0.6)]
+
+
+def test_dead_reckoning_integrates_sent_command(tracker):
+    now = aim(tracker, [0.3, 0.6, 0.9])
+    for i in range(3):
+        tracker._tick(now + i * 0.01, 1.0)
+
+    # 0.3 与 0.9 未发送，云台按 0 -> 0.6 -> 0.6 转动
+    assert tracker._estimate[1] == pytest.approx(1.2)
+
+
+def test_lost_target_sends_zero_once(tracker, sent):
+    now = aim(tracker, [10.0])
+    tracker._tick(now, 0.0)
+    tracker._target = None
+    tracker._tick(now, 0.0)
+    tracker._tick(now, 0.0)
+
+    assert sent == [(0.0, 10.0), (0.0, 0.0)]
@@ -0,0 +1,113 @@
+# test_yaw.py
+# 连续偏航角估计
+#
+# @author n1ghts4kura
+# @date 26-10-17
+#
+
+import inspect
+from concurrent.futures import Future
+
+import pytest
+
+from src.uart import conn, gimbal
+from src.uart.motion import GimbalMotionExecutor
+from src.uart.yaw import YawTracker, wrap180
+
+
+@pytest.fixture
+def tracker(fresh, monkeypatch) -> YawTracker:
+    monkeypatch.setattr(YawTracker, "_attach_default", lambda self: None)
+    return fresh(YawTracker)
+
+
+@pytest.mark.parametrize("angle, wrapped", [(0, 0), (180, -180), (-180, -180), (190, -170), (-190, 170), (720, 0)])
+def test_wrap180(angle, wrapped):
+    assert wrap180(angle) == wrapped
+
+
+def test_feedback_unwraps_across_boundary(tracker):
+    for i, raw in enumerate([170, -170, -90, 0, 90, 170, -170]):
+        tracker.on_feedback(raw, float(i))
+
+    assert tracker.yaw == pytest.approx(550)
+    assert tracker.feedback_count == 7
+
+
+def test_relative_moves_pending_until_feedback(tracker):
+    tracker.on_feedback(0, 0.0)
+    tracker.on_relative_move(30)
+    tracker.on_relative_move(30)
+    assert tracker.yaw == pytest.approx(60)
+
+    # 反馈到达后 之前发出的指令已经体现在反馈中
+    tracker.on_feedback(55, 1e9)
+    assert tracker.yaw == pytest.approx(55)
+
+
+def test_absolute_move_uses_firmware_frame(tracker):
+    # moveto 覆盖 ±250°: 从 0 转到 200 是 +200，而不是 -160
+    tracker.reset(0)
+    tracker.on_absolute_move(200)
+    assert tracker.yaw == pytest.approx(200)
+    assert tracker.residual(300) == pytest.approx(100)
+
+    tracker.on_absolute_move(-100)
+    assert tracker.yaw == pytest.approx(-100)
+
+
+def test_absolute_move_after_feedback(tracker):
+    tracker.on_feedback(170, 0.0)
+    tracker.on_feedback(230, 1.0)
+    tracker.on_relative_move(10)
+    assert tracker.frame_yaw == pytest.approx(240)
+
+    # 反转到 -240 需要转 -480°
+    tracker.on_absolute_move(-240)
+    assert tracker.yaw == pytest.approx(-240)
+    assert tracker.frame_yaw == pytest.approx(-240)
+
+
+def test_residual(tracker):
+    tracker.reset(0)
+    assert tracker.residual(720) == pytest.approx(720)
+    assert tracker.residual(720, shortest=True) == pytest.approx(0)
+    assert tracker.residual(-90, shortest=True) == pytest.approx(-90)
+
+
+def test_rotate_to_yaw_keeps_turns_by_default():
+    parameter = inspect.signature(GimbalMotionExecutor.rotate_to_yaw).parameters["shortest"]
+    assert parameter.default is False
+
+
+@pytest.fixture
+def writes(monkeypatch) -> list[Future[bool]]:
+    futures: list[Future[bool]] = []
+
+    def writeline_future(data, priority=None, coalesce_key=None):
+        futures.append(Future())
+        return futures[-1]
+
+    monkeypatch.setattr(conn, "writeline_future", writeline_future)
+    return futures
+
+
+def test_move_recorded_only_when_written(tracker, writes):
+    gimbal._move_gimbal(None, 30, None, 90)
+    assert tracker.yaw == 0
+
+    writes[-1].set_result(True)
+    assert tracker.yaw == pytest.approx(30)
+
+
+@pytest.mark.parametrize("outcome", ["cancel", "fail"])
+def test_move_skipped_when_not_written(tracker, writes, outcome):
+    gimbal._move_gimbal(None, 30, None, 90, coalesce=True)
+    gimbal._move_gimbal_absolute(None, 100, None, 90)
+    for future in writes:
+        if outcome == "cancel":
+            future.cancel()
+        else:
+            future.set_result(False)
+
+    assert tracker.yaw == 0